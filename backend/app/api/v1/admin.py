@@ -7,6 +7,7 @@ ENDPOINTS:
 - Auth: /auth/login
 - System: /system/status, /system/on, /system/off
 - Health: /health
+- LLM: /llm/cache (GET stats, DELETE flush), /llm/telemetry, /llm/breakers (DELETE reset)
 - Database: /init-db, /reset-pipeline-tables
 - Data: /prime-data, /build-active, /prime-status
 - Dashboard: /data/stats, /data/freshness, /data/activity, /data/picks, /data/shortlist, /data/stocks
@@ -109,9 +110,59 @@ async def admin_health_check():
         except Exception:
             pass
 
+    # LLM circuit breakers (shared via Redis) – open = agents are in degraded mode
+    try:
+        from app.services.llm_breaker import get_breakers
+        health["llm_breakers"] = await get_breakers()
+    except Exception as e:
+        health["llm_breakers"] = {"error": str(e)}
+
     return health
 
 
+# ========================= LLM =========================
+@router.get("/llm/cache", dependencies=[Depends(verify_admin_token)])
+async def get_llm_cache_stats():
+    """LLM response cache hit/miss per agent + this process's gateway call stats."""
+    from app.services.llm_cache import get_cache_stats
+    from app.services.cloud_agents.llm_gateway import get_llm_stats
+    return {"cache": await get_cache_stats(), "gateway": get_llm_stats()}
+
+
+@router.delete("/llm/cache", dependencies=[Depends(verify_admin_token)])
+async def clear_llm_cache_entries():
+    """Drop all cached LLM responses (next run calls the providers again)."""
+    from app.services.llm_cache import clear_llm_cache
+    try:
+        removed = await clear_llm_cache()
+        return {"success": True, "removed": removed}
+    except Exception as e:
+        logger.error(f"LLM cache clear failed: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@router.get("/llm/telemetry", dependencies=[Depends(verify_admin_token)])
+async def get_llm_call_telemetry(days: int = 7):
+    """Per agent/provider/model: calls, errors, parse failures, tokens, est. cost, latency + TTFB p50/p95."""
+    from app.services.llm_telemetry import get_llm_telemetry
+    try:
+        return await get_llm_telemetry(max(1, min(days, 90)))
+    except Exception as e:
+        logger.error(f"LLM telemetry query failed: {e}")
+        return {"error": str(e)}
+
+
+@router.delete("/llm/breakers", dependencies=[Depends(verify_admin_token)])
+async def reset_llm_breakers():
+    """Force all LLM circuit breakers closed (provider back before the next probe)."""
+    from app.services.llm_breaker import reset_breakers
+    try:
+        return {"success": True, "reset": await reset_breakers()}
+    except Exception as e:
+        logger.error(f"LLM breaker reset failed: {e}")
+        return {"success": False, "error": str(e)}
+
+
 # ========================= DATABASE =========================
 @router.post("/init-db", dependencies=[Depends(verify_admin_token)])
 async def init_database():
@@ -237,12 +288,17 @@ async def get_data_stats():
 
 # ========================= PIPELINE TRIGGERS =========================
 @router.post("/trigger-prescreen", dependencies=[Depends(verify_admin_token)])
-async def trigger_prescreen():
-    """Trigger prescreen agent manually."""
+async def trigger_prescreen(fresh: bool = False):
+    """Trigger prescreen agent manually. fresh=true bypasses the LLM response cache."""
     try:
         from app.services.agent_manager import get_agent_manager
+        from app.services.llm_cache import bypass_llm_cache
         agent_manager = await get_agent_manager()
-        result = await agent_manager.run_prescreen_agent()
+        if fresh:
+            with bypass_llm_cache():
+                result = await agent_manager.run_prescreen_agent()
+        else:
+            result = await agent_manager.run_prescreen_agent()
         return {"status": "success", "result": result}
     except Exception as e:
         logger.error(f"Prescreen trigger failed: {e}")
@@ -250,17 +306,20 @@ async def trigger_prescreen():
 
 
 @router.post("/trigger-full-pipeline", dependencies=[Depends(verify_admin_token)])
-async def trigger_full_pipeline():
-    """Trigger entire daily pipeline (prescreen → charts → vision → social → arbitrator)."""
+async def trigger_full_pipeline(fresh: bool = False):
+    """
+    Trigger entire daily pipeline (data refresh → prescreen → charts → vision + social → arbitrator).
+    Same-day reruns reuse cached LLM responses; fresh=true forces new calls.
+    """
     try:
-        # Import the async function directly since it's not a module
-        import sys
-        import os
-        scripts_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "scripts")
-        if scripts_path not in sys.path:
-            sys.path.insert(0, scripts_path)
-        from run_daily_pipeline import run_daily_pipeline
-        result = await run_daily_pipeline()
+        # Same DAG as the cron job / Celery beat; pools stay open (shared with the API)
+        from app.services.daily_pipeline import run_daily_pipeline
+        from app.services.llm_cache import bypass_llm_cache
+        if fresh:
+            with bypass_llm_cache():
+                result = await run_daily_pipeline()
+        else:
+            result = await run_daily_pipeline()
         return {"status": "success", "result": result}
     except Exception as e:
         logger.error(f"Full pipeline trigger failed: {e}")
@@ -4,7 +4,7 @@ Picks API - Serves live AI picks to frontend
 Auto-checks target hits on every price fetch (replaces scheduled cron)
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import logging
@@ -417,6 +417,42 @@ async def get_todays_picks():
         return {"bullish": 0, "bearish": 0, "total": 0, "last_updated": None}
 
 
+@router.get("/{pick_id}/chart-spec")
+async def get_pick_chart_spec(pick_id: int, request: Request):
+    """
+    Compact columnar chart spec for client-side rendering: OHLCV + RSI arrays,
+    S/R + pivot levels, volume profile, 3-tier targets and stop loss.
+    gzip'd when accepted; ETag / If-None-Match → 304.
+    """
+    from app.core.database import get_asyncpg_pool
+    from app.services.chart_spec import (
+        CACHE_CONTROL, build_chart_spec, encode_chart_spec, fetch_pick_chart_data,
+    )
+
+    try:
+        db = await get_asyncpg_pool()
+        async with db.acquire() as conn:
+            pick, df = await fetch_pick_chart_data(conn, pick_id)
+    except Exception as e:
+        logger.error(f"Error fetching chart data for pick {pick_id}: {e}")
+        raise HTTPException(status_code=500, detail="Error fetching chart data")
+
+    if pick is None:
+        raise HTTPException(status_code=404, detail="Pick not found")
+    if df is None:
+        raise HTTPException(status_code=404, detail=f"No price history for {pick['symbol']}")
+
+    raw, gz, etag = encode_chart_spec(build_chart_spec(pick, df))
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(content=gz, media_type="application/json",
+                        headers={**headers, "Content-Encoding": "gzip"})
+    return Response(content=raw, media_type="application/json", headers=headers)
+
+
 @router.post("/check-targets")
 async def manual_check_targets():
     """Manually check and update target hits for all picks"""
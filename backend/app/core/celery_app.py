@@ -36,6 +36,8 @@ celery_app = Celery(
         "app.tasks.monitor_pick_outcomes",
         "app.tasks.fetch_short_interest",
         "app.tasks.fetch_fred_calendar",
+        "app.tasks.rollup_llm_telemetry",
+        "app.tasks.run_daily_pipeline",
     ],
 )
 
@@ -84,7 +86,7 @@ celery_app.conf.beat_schedule = {
         "options": {"queue": "default"},
     },
 
-    # 4:00 AM ET - Finnhub short interest (for all ACTIVE stocks)
+    # 4:00 AM ET - Finnhub short interest (for all ACTIVE stocks, ~50 min)
     "fetch-short-interest-daily": {
         "task": "tasks.fetch_short_interest",
         "schedule": crontab(hour=4, minute=0),
@@ -99,58 +101,19 @@ celery_app.conf.beat_schedule = {
     },
 
     # ═══════════════════════════════════════════════════════════════════════
-    # DAILY PICKS PIPELINE (runs before market open, 8:00-8:30 AM ET)
+    # DAILY PICKS PIPELINE (runs before market open, from 8:00 AM ET)
     # ═══════════════════════════════════════════════════════════════════════
 
-    # 8:00 AM ET - Prescreen: Select ~75 candidates from ACTIVE tier
-    "run-prescreen-daily": {
-        "task": "tasks.run_prescreen",
+    # 8:00 AM ET - Whole pipeline as one DAG (app/services/daily_pipeline.py):
+    # prescreen → insider / charts → vision, social → arbitrator → publish to
+    # Firebase (push notifications), on the data refreshed above. No fixed offsets: each stage starts as soon as its
+    # inputs are ready, independent stages run concurrently
+    "run-daily-pipeline": {
+        "task": "tasks.run_daily_pipeline",
         "schedule": crontab(hour=8, minute=0),
         "options": {"queue": "default"},
     },
 
-    # 8:05 AM ET - Insider Trading: Fetch FMP insider data for shortlist
-    "fetch-insider-trading-daily": {
-        "task": "tasks.fetch_insider_trading",
-        "schedule": crontab(hour=8, minute=5),
-        "options": {"queue": "default"},
-    },
-
-    # 8:10 AM ET - Generate charts for shortlist candidates
-    "generate-charts-daily": {
-        "task": "tasks.generate_charts",
-        "schedule": crontab(hour=8, minute=10),
-        "options": {"queue": "default"},
-    },
-
-    # 8:15 AM ET - Vision analysis (chart pattern detection)
-    "run-vision-daily": {
-        "task": "tasks.run_vision",
-        "schedule": crontab(hour=8, minute=15),
-        "options": {"queue": "default"},
-    },
-
-    # 8:17 AM ET - Social/Grok analysis (sentiment + headlines)
-    "run-social-daily": {
-        "task": "tasks.run_grok_social",
-        "schedule": crontab(hour=8, minute=17),
-        "options": {"queue": "default"},
-    },
-
-    # 8:20 AM ET - Arbitrator: Select final 3-6 picks
-    "run-arbitrator-daily": {
-        "task": "tasks.run_arbitrator",
-        "schedule": crontab(hour=8, minute=20),
-        "options": {"queue": "default"},
-    },
-
-    # 8:30 AM ET - Publish picks to Firebase (triggers push notifications)
-    "publish-to-firebase-daily": {
-        "task": "tasks.publish_to_firebase",
-        "schedule": crontab(hour=8, minute=30),
-        "options": {"queue": "default"},
-    },
-
     # ═══════════════════════════════════════════════════════════════════════
     # OUTCOME MONITORING (runs during/after market hours)
     # ═══════════════════════════════════════════════════════════════════════
@@ -187,6 +150,13 @@ celery_app.conf.beat_schedule = {
         "options": {"queue": "default"},
     },
 
+    # 11:45 PM ET - Roll up today's LLM call telemetry (llm_calls → llm_calls_daily)
+    "rollup-llm-telemetry-nightly": {
+        "task": "tasks.rollup_llm_telemetry",
+        "schedule": crontab(hour=23, minute=45),
+        "options": {"queue": "default"},
+    },
+
     # Weekly: Rebuild ACTIVE symbols list (Sunday 2 AM ET)
     "build-active-symbols-weekly": {
         "task": "tasks.build_active_symbols",
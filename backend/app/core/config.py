@@ -36,6 +36,47 @@ class Settings(BaseSettings):
     KILL_SWITCH_VIX_THRESHOLD: float = 35.0
     KILL_SWITCH_SPY_DROP_PCT: float = 2.0
 
+    # Chart rendering – each render process ≈ 70–90 MB RSS (512 MB Render worker)
+    CHART_RENDER_WORKERS: int = 2       # 0 = render in a background thread
+    CHART_UPLOAD_CONCURRENCY: int = 8   # Parallel Firebase uploads
+    CHART_HANDOFF: bool = True          # Spool PNGs locally for the vision agent
+    CHART_SPOOL_DIR: str = "/tmp/bullsbears/charts"
+    VISION_IMAGE_MAX_BYTES: int = 16000  # Vision image budget (palette PNG → WebP)
+    VISION_BATCH_ENABLED: bool = True    # K charts per vision request (vision_agent.pack_batches)
+    VISION_BATCH_MAX_IMAGES: int = 8     # Provider per-request image limit
+    VISION_CONTEXT_TOKENS: int = 32768   # Model context window used for K
+    VISION_BATCH_MAX_OUTPUT_TOKENS: int = 16384  # 2048 per chart → caps K at 8
+
+    # LLM gateway (cloud_agents/llm_gateway.py)
+    LLM_FIREWORKS_CONCURRENCY: int = 20  # Max in-flight Fireworks calls per process
+    LLM_XAI_CONCURRENCY: int = 32        # Max in-flight xAI (Grok) calls per process
+    LLM_MAX_RETRIES: int = 3             # Retries on 429 / 5xx / transport errors
+    LLM_CACHE_ENABLED: bool = True       # Redis response cache for agent calls (llm_cache)
+    LLM_CACHE_TTL_HOURS: float = 20.0    # Same-day reruns hit; next morning is fresh
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+    LLM_FIREWORKS_BASE_URL: str = ""     # Override, e.g. http://127.0.0.1:8900/fireworks (scripts/llm_standin)
+    LLM_XAI_BASE_URL: str = ""           # Override, e.g. http://127.0.0.1:8900/xai
+    LLM_BREAKER_ENABLED: bool = True     # Per provider/model circuit breakers (llm_breaker)
+    LLM_BREAKER_FAILURES: int = 5        # Consecutive failed attempts → open
+    LLM_BREAKER_SLOW_S: float = 90.0     # Slower attempts count as failures (0 = off)
+    LLM_BREAKER_OPEN_S: float = 60.0     # Short-circuit this long, then one half-open probe
+    LLM_BREAKER_OPEN_MAX_S: float = 600.0
+
+    # Social agent batching (social_agent._analyze_batched)
+    SOCIAL_BATCH_SIZE: int = 10          # Symbols per Grok request (1 = one request per symbol)
+    SOCIAL_BATCH_CONCURRENCY: int = 4    # Batch requests in flight
+    SOCIAL_BATCH_FALLBACK: bool = True   # Retry missing/malformed symbols as single requests
+    SOCIAL_FRESH_HOURS: float = 20.0     # Reuse a symbol's social read this long (social_store)
+    SOCIAL_HOT_FRESH_HOURS: float = 4.0  # …or this long when mention_velocity is high
+    SOCIAL_HOT_VELOCITY: float = 2.0
+    SOCIAL_DEGRADED_MAX_HOURS: float = 72.0  # Grok breaker open → last stored read up to this old (0 = neutral)
+
+    # Arbitrator hedged race (primary vs failover)
+    ARBITRATOR_HEDGE_ENABLED: bool = True
+    ARBITRATOR_HEDGE_PERCENTILE: float = 90.0  # Fire failover once primary exceeds its p90
+    ARBITRATOR_HEDGE_DEFAULT_S: float = 30.0   # Until there is latency history
+    ARBITRATOR_HEDGE_MIN_S: float = 5.0
+
     # Permanent winner — no rotation ever again
     ARBITRATOR_MODEL: str = "accounts/fireworks/models/qwen2.5-72b-instruct"
 
@@ -5,7 +5,9 @@ Uses Firebase Admin SDK (service account) — NOT Realtime Database REST API
 
 import os
 import json
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 from datetime import datetime
 
@@ -15,6 +17,8 @@ from firebase_admin import credentials, firestore
 from firebase_admin import db
 from firebase_admin import storage
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 # Initialize Firebase Admin SDK
@@ -275,13 +279,17 @@ async def update_agent_status(agent_data: Dict[str, Any]) -> bool:
 
 
 async def close_firebase():
-    """Close Firebase client"""
-    global _firebase_client
+    """Close Firebase client (and drain the Storage upload pool)"""
+    global _firebase_client, _upload_executor
     
     if _firebase_client:
         await _firebase_client.close()
         _firebase_client = None
 
+    if _upload_executor is not None:
+        executor, _upload_executor = _upload_executor, None
+        await asyncio.to_thread(executor.shutdown, True)
+
 # Add this at the very bottom of the file
 def update_firebase_sync(path: str, data: Dict[str, Any]):
     """Sync wrapper for your existing async functions — used by Celery tasks"""
@@ -293,51 +301,112 @@ def update_firebase_sync(path: str, data: Dict[str, Any]):
         logger.error(f"Firebase sync update failed: {e}")
 
 
-def upload_chart_to_storage(symbol: str, date_str: str, png_bytes: bytes, folder: str = "charts") -> Optional[str]:
-    """
-    Upload chart PNG to Firebase Storage and return public URL.
-    Path: {folder}/{YYYY-MM-DD}/{symbol}_v{timestamp}.png
+# Charts get a fresh versioned path per upload, so the object itself must never be cached stale
+CHART_CACHE_CONTROL = "no-cache, no-store, must-revalidate"
+
+_upload_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_upload_executor() -> ThreadPoolExecutor:
+    """Bounded pool for blocking Storage SDK calls (shared by all async uploads)"""
+    global _upload_executor
+    if _upload_executor is None:
+        _upload_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.CHART_UPLOAD_CONCURRENCY),
+            thread_name_prefix="storage-upload",
+        )
+    return _upload_executor
 
-    Args:
-        symbol: Stock ticker
-        date_str: Date string (YYYY-MM-DD)
-        png_bytes: PNG image bytes
-        folder: Storage folder (default: "charts", can be "pretty" for annotated charts)
-    """
-    import time
 
+def upload_bytes_to_storage(
+    blob_path: str,
+    data: bytes,
+    content_type: str = "image/png",
+    cache_control: str = CHART_CACHE_CONTROL,
+) -> Optional[str]:
+    """
+    Single-request upload: content type, cache-control and the public-read ACL
+    all travel with the upload itself (no follow-up patch()/make_public()).
+    Returns the public URL, or None on failure.
+    """
     if storage_bucket is None:
         logger.error("Firebase Storage not initialized")
         return None
 
     try:
-        # Create blob path with version timestamp for cache busting
-        version = int(time.time())
-        blob_path = f"{folder}/{date_str}/{symbol}_v{version}.png"
         blob = storage_bucket.blob(blob_path)
+        blob.cache_control = cache_control
+        blob.upload_from_string(data, content_type=content_type, predefined_acl="publicRead")
+        return blob.public_url
+    except Exception as e:
+        logger.error(f"Storage upload failed for {blob_path}: {e}")
+        return None
 
-        # Upload PNG bytes with no-cache headers
-        blob.upload_from_string(
-            png_bytes,
-            content_type="image/png"
-        )
 
-        # Set cache control to no-cache
-        blob.cache_control = "no-cache, no-store, must-revalidate"
-        blob.patch()
+def upload_chart_to_storage(
+    symbol: str,
+    date_str: str,
+    png_bytes: bytes,
+    folder: str = "charts",
+    content_type: str = "image/png",
+    suffix: str = "",
+) -> Optional[str]:
+    """
+    Upload chart image to Firebase Storage and return public URL.
+    Path: {folder}/{YYYY-MM-DD}/{symbol}_v{timestamp}{suffix}.{png|webp}
 
-        # Make public
-        blob.make_public()
+    Args:
+        symbol: Stock ticker
+        date_str: Date string (YYYY-MM-DD)
+        png_bytes: Image bytes (PNG, or WebP for thumbnails)
+        folder: Storage folder (default: "charts", can be "pretty" for annotated charts)
+        content_type: MIME type of png_bytes – also picks the file extension
+        suffix: Variant tag appended to the file name (e.g. "_thumb")
+    """
+    import time
 
-        # Get public URL
-        public_url = blob.public_url
+    ext = content_type.split("/")[-1].replace("jpeg", "jpg")
+    # Versioned blob path for cache busting
+    blob_path = f"{folder}/{date_str}/{symbol}_v{int(time.time())}{suffix}.{ext}"
+    public_url = upload_bytes_to_storage(blob_path, png_bytes, content_type=content_type)
+    if public_url:
         logger.info(f"📊 Uploaded chart: {blob_path} -> {public_url}")
+    else:
+        logger.error(f"Chart upload failed for {symbol}")
+    return public_url
+
+
+async def upload_chart_async(
+    symbol: str,
+    date_str: str,
+    png_bytes: bytes,
+    folder: str = "charts",
+    content_type: str = "image/png",
+    suffix: str = "",
+) -> Optional[str]:
+    """upload_chart_to_storage on the bounded upload pool – never blocks the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_upload_executor(), upload_chart_to_storage,
+        symbol, date_str, png_bytes, folder, content_type, suffix,
+    )
+
+
+def chart_blob_exists(public_url: str) -> bool:
+    """True if a previously uploaded chart (by its public URL) is still in Storage"""
+    if storage_bucket is None or not public_url:
+        return False
 
-        return public_url
+    prefix = f"https://storage.googleapis.com/{storage_bucket.name}/"
+    if not public_url.startswith(prefix):
+        return False
 
+    try:
+        from urllib.parse import unquote
+        return storage_bucket.blob(unquote(public_url[len(prefix):])).exists()
     except Exception as e:
-        logger.error(f"Chart upload failed for {symbol}: {e}")
-        return None
+        logger.warning(f"Chart existence check failed for {public_url}: {e}")
+        return False
 
 
 def get_storage_bucket():
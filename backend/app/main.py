@@ -28,6 +28,8 @@ async def lifespan(app: FastAPI):
     # Startup
     yield
     # Shutdown (e.g. close DB pools if you add them later)
+    from app.services.cloud_agents.llm_gateway import close_llm_clients
+    await close_llm_clients()
 
 app.router.lifespan_context = lifespan
 
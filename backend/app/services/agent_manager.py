@@ -34,6 +34,7 @@ class AgentManager:
     async def run_vision_agent(self) -> dict:
         """Run vision analysis on shortlist charts"""
         from app.services.cloud_agents.vision_agent import run_vision_analysis
+        from app.services.chart_spool import ensure_chart_columns
         
         if not self.db:
             self.db = await get_asyncpg_pool()
@@ -47,17 +48,18 @@ class AgentManager:
             
             shortlist_date = latest['latest_date']
             
-            # Get charts for analysis
+            # Get charts for analysis (spooled locally and/or uploaded)
+            await ensure_chart_columns(conn)
             charts = await conn.fetch("""
-                SELECT symbol, chart_url
+                SELECT symbol, chart_url, chart_vision_url, chart_fingerprint
                 FROM shortlist_candidates
-                WHERE date = $1 AND chart_url IS NOT NULL
+                WHERE date = $1 AND (chart_url IS NOT NULL OR chart_fingerprint IS NOT NULL)
             """, shortlist_date)
         
         if not charts:
             return {"status": "error", "message": "No charts found"}
         
-        chart_list = [{"symbol": c["symbol"], "chart_url": c["chart_url"]} for c in charts]
+        chart_list = [dict(c) for c in charts]
         results = await run_vision_analysis(chart_list)
         
         success = sum(1 for r in results if any(v for k, v in r["vision_flags"].items() if isinstance(v, bool) and v))
@@ -0,0 +1,237 @@
+# backend/app/services/chart_render_pool.py
+"""
+Chart Render Pool – BullsBears v6
+CPU-bound matplotlib rendering off the event loop, across worker processes.
+
+- Bars are shipped as plain NumPy arrays (cheap to pickle), not DataFrames
+- Each worker warms up the Agg backend once (pyplot import, font cache,
+  first savefig, vision figure template) so the first real chart isn't
+  paying for it
+- Workers stream PNG bytes back – or, with `variants`, the encoded
+  vision / share / thumb images (image_encoding) so encoding also stays
+  off the main process; callers overlap uploads + DB writes
+- Pool size = CHART_RENDER_WORKERS (each worker ≈ 70–90 MB RSS, so the
+  default of 2 fits the 512 MB Render worker). 0 = render in a thread
+- The pool lives for one batch (async context manager) – no idle workers
+  holding memory between pipeline runs
+
+Workers start via forkserver (spawn where unavailable) – forking the
+pipeline process would copy its asyncpg connections, event loop and
+to_thread workers mid-flight. Celery prefork children are daemonic and
+can't spawn processes; that, or a pool whose probe job fails, falls back to
+a single render thread (still off the loop).
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.image_encoding import EncodedImage, encode_variants
+
+logger = logging.getLogger(__name__)
+
+BAR_COLUMNS = ("open_price", "high_price", "low_price", "close_price", "volume")
+PROBE_TIMEOUT_S = 60            # Worker start-up incl. imports + warm-up render
+
+# Raw PNG bytes, or {variant: EncodedImage} when variants were requested
+RenderResult = Union[bytes, Dict[str, EncodedImage]]
+
+
+# =============================================================================
+# BAR SHIPPING
+# =============================================================================
+
+def frame_to_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """DataFrame (date index) → dict of contiguous float64 / datetime64 arrays"""
+    arrays = {"date": df.index.to_numpy(dtype="datetime64[ns]")}
+    for col in BAR_COLUMNS:
+        arrays[col] = np.ascontiguousarray(df[col].to_numpy(dtype=float))
+    return arrays
+
+
+def arrays_to_frame(arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Inverse of frame_to_arrays – same layout as the generators' 90d fetch"""
+    df = pd.DataFrame({col: arrays[col] for col in BAR_COLUMNS})
+    df.index = pd.DatetimeIndex(arrays["date"], name="date")
+    return df
+
+
+# =============================================================================
+# WORKER SIDE
+# =============================================================================
+
+def _warm_worker():
+    """Process initializer: load Agg + chart modules, render one throwaway PNG"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # Importing the generators pulls in their colour constants / icon paths
+    from app.services.chart_rendering import get_figure_template
+    from app.tasks.generate_charts import VisionChartTemplate
+    import app.tasks.generate_pretty_charts  # noqa: F401
+
+    # Build the reusable vision scaffolding before the first job arrives
+    get_figure_template("vision", VisionChartTemplate)
+
+    fig = plt.figure(figsize=(1, 1), dpi=50)
+    fig.text(0.5, 0.5, "BullsBears", fontweight="bold", style="italic")
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+
+
+def _render_vision(symbol: str, df: pd.DataFrame, options: Dict[str, Any]) -> bytes:
+    from app.tasks.generate_charts import ChartGenerator
+    return ChartGenerator()._render_chart(df, symbol)
+
+
+def _render_pretty(symbol: str, df: pd.DataFrame, options: Dict[str, Any]) -> bytes:
+    from app.tasks.generate_pretty_charts import PrettyChartGenerator
+    return PrettyChartGenerator()._render_pretty_chart(df=df, symbol=symbol, **options)
+
+
+RENDERERS = {
+    "vision": _render_vision,
+    "pretty": _render_pretty,
+}
+
+
+def _probe() -> int:
+    """No-op job – proves the workers actually started"""
+    return os.getpid()
+
+
+def render_job(kind: str, symbol: str, arrays: Dict[str, np.ndarray],
+               options: Optional[Dict[str, Any]] = None,
+               variants: Optional[Sequence[str]] = None) -> Tuple[str, RenderResult, float]:
+    """Runs in the worker. Returns (symbol, png_bytes | variants, render_seconds)"""
+    start = time.perf_counter()
+    png_bytes = RENDERERS[kind](symbol, arrays_to_frame(arrays), options or {})
+    result = encode_variants(png_bytes, variants) if variants else png_bytes
+    return symbol, result, time.perf_counter() - start
+
+
+# =============================================================================
+# POOL
+# =============================================================================
+
+def _process_context():
+    """forkserver where available (clean parent, no inherited loop/sockets), else spawn"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ChartRenderPool:
+    """
+    Batch-scoped render pool.
+
+        async with ChartRenderPool() as pool:
+            async for symbol, png, err in pool.render_many("vision", jobs):
+                ...
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        if workers is None:
+            workers = settings.CHART_RENDER_WORKERS
+        self.workers = max(0, min(workers, os.cpu_count() or 1))
+        self.mode = "thread"
+        self._executor: Optional[Executor] = None
+        self._start_lock = asyncio.Lock()
+
+    def start(self):
+        """Blocking (process start-up + probe) – async callers go through _ensure_started"""
+        if self._executor is not None:
+            return
+        if self.workers >= 1 and multiprocessing.current_process().daemon:
+            logger.warning("Render pool unavailable (daemonic process, e.g. Celery prefork) – falling back to thread")
+        elif self.workers >= 1:
+            executor = None
+            try:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=_process_context(),
+                    initializer=_warm_worker,
+                )
+                # Workers only spawn on the first submit – probe so start-up errors surface here
+                executor.submit(_probe).result(timeout=PROBE_TIMEOUT_S)
+                self._executor = executor
+                self.mode = "process"
+            except Exception as e:
+                # No semaphores / spawn failure / broken worker – keep going in-process
+                logger.warning(f"Render pool unavailable ({type(e).__name__}: {e}) – falling back to thread")
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, initializer=_warm_worker)
+            self.mode = "thread"
+        logger.info(f"🖼️ Chart render pool: {self.mode} x{self.workers if self.mode == 'process' else 1}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _ensure_started(self):
+        async with self._start_lock:
+            if self._executor is None:
+                await asyncio.to_thread(self.start)
+
+    async def __aenter__(self):
+        await self._ensure_started()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.to_thread(self.shutdown)
+
+    async def render(self, kind: str, symbol: str, arrays: Dict[str, np.ndarray],
+                     options: Optional[Dict[str, Any]] = None,
+                     variants: Optional[Sequence[str]] = None) -> RenderResult:
+        """Render one chart without blocking the event loop"""
+        await self._ensure_started()
+        loop = asyncio.get_running_loop()
+        _, result, _ = await loop.run_in_executor(
+            self._executor, render_job, kind, symbol, arrays, options, variants
+        )
+        return result
+
+    async def render_many(
+        self,
+        kind: str,
+        jobs: Iterable[Tuple[str, Dict[str, np.ndarray], Optional[Dict[str, Any]]]],
+        variants: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[Tuple[str, Optional[RenderResult], Optional[BaseException]]]:
+        """
+        Submit every (symbol, arrays, options) job at once and yield
+        (symbol, png_bytes | variants, error) in completion order.
+        """
+        await self._ensure_started()
+        loop = asyncio.get_running_loop()
+        pending = {}
+        for symbol, arrays, options in jobs:
+            try:
+                fut = loop.run_in_executor(self._executor, render_job, kind, symbol, arrays, options, variants)
+            except (BrokenProcessPool, RuntimeError) as e:
+                # Pool died mid-batch – report per job instead of aborting the generator
+                yield symbol, None, e
+                continue
+            pending[fut] = symbol
+
+        while pending:
+            done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                symbol = pending.pop(fut)
+                try:
+                    _, result, _ = fut.result()
+                    yield symbol, result, None
+                except Exception as e:
+                    yield symbol, None, e
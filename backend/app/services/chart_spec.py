@@ -0,0 +1,213 @@
+# backend/app/services/chart_spec.py
+"""
+Chart Spec – BullsBears v6
+Compact, cacheable description of a pick's chart for client-side rendering
+(GET /api/v1/picks/{id}/chart-spec), instead of a server-rendered PNG.
+
+- Columnar JSON: one array per field (t/o/h/l/c/v/rsi), dates as day
+  offsets from `start`, prices rounded to the tick the chart can show
+- Levels: S/R (market_structure), weekly pivots, volume profile + POC,
+  3-tier targets, stop loss, entry, swing low/high
+- Served gzip'd with a content ETag → 304s for unchanged specs
+
+Pretty PNG charts are still rendered server-side, but only as the social
+share image; pick_chart_levels() is shared with that renderer so both see
+the same targets / stop.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.market_structure import support_resistance, volume_profile
+
+logger = logging.getLogger(__name__)
+
+SPEC_VERSION = 1
+RSI_PERIOD = 14
+GZIP_LEVEL = 6
+CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=3600"
+
+PICK_CHART_QUERY = """
+    SELECT p.id, p.symbol, p.direction, p.confidence,
+           p.target_primary, p.target_medium, p.target_moonshot,
+           p.confluence_score, p.confluence_methods,
+           p.rsi_divergence, p.gann_alignment,
+           p.weekly_pivots,
+           p.pick_context,
+           p.created_at,
+           sc.price_at_selection as entry_price
+    FROM picks p
+    LEFT JOIN shortlist_candidates sc
+        ON sc.symbol = p.symbol AND sc.date = p.created_at::date
+"""
+
+
+def _as_dict(value: Any) -> Optional[Dict]:
+    """JSONB column → dict (asyncpg hands some back as str)"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return None
+    return value if isinstance(value, dict) else None
+
+
+def _float(value: Any) -> Optional[float]:
+    return float(value) if value else None
+
+
+def pick_chart_levels(pick) -> Dict[str, Any]:
+    """
+    Targets / stop / pivots for a pick row (PICK_CHART_QUERY columns).
+    Stop loss falls back to the swing low/high, then ±8% of entry.
+    """
+    direction = pick["direction"]
+    entry_price = _float(pick["entry_price"])
+    conf_analysis = (_as_dict(pick["pick_context"]) or {}).get("confluence_analysis", {})
+    stop_loss = conf_analysis.get("stop_loss")
+    swing_low = conf_analysis.get("swing_low")
+    swing_high = conf_analysis.get("swing_high")
+
+    # Estimate stop_loss if not provided
+    if stop_loss is None:
+        if direction == "bullish":
+            stop_loss = swing_low or (entry_price * 0.92 if entry_price else None)
+        else:
+            stop_loss = swing_high or (entry_price * 1.08 if entry_price else None)
+
+    return {
+        "direction": direction,
+        "entry_price": entry_price,
+        "target_primary": _float(pick["target_primary"]),
+        "target_medium": _float(pick["target_medium"]),
+        "target_moonshot": _float(pick["target_moonshot"]),
+        "stop_loss": stop_loss,
+        "confluence_score": int(pick["confluence_score"] or 0),
+        "confluence_methods": list(pick["confluence_methods"] or []),
+        "weekly_pivots": _as_dict(pick["weekly_pivots"]),
+        "rsi_divergence": bool(pick["rsi_divergence"]),
+        "gann_alignment": bool(pick["gann_alignment"]),
+        "swing_low": swing_low,
+        "swing_high": swing_high,
+    }
+
+
+def rsi(closes: pd.Series, period: int = RSI_PERIOD) -> pd.Series:
+    """Simple-average RSI – same formula as the chart renderers"""
+    delta = closes.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def _price_decimals(closes: np.ndarray) -> int:
+    """2 dp for normal stocks, 4 dp below $1 – more precision than the chart can show is wasted bytes"""
+    return 4 if len(closes) and float(np.nanmax(closes)) < 1 else 2
+
+
+def _column(values: np.ndarray, decimals: int) -> list:
+    """Rounded list with NaN → null"""
+    rounded = np.round(np.asarray(values, dtype=float), decimals)
+    return [None if np.isnan(x) else (int(x) if decimals == 0 else float(x)) for x in rounded]
+
+
+def _level(value: Any, decimals: int) -> Optional[float]:
+    return round(float(value), decimals) if value is not None else None
+
+
+def build_chart_spec(pick, df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Pick row + 90-day OHLCV frame (date index, *_price columns) → chart spec.
+    Arrays are aligned: t[i] is the day offset of bar i from `start`.
+    """
+    levels = pick_chart_levels(pick)
+    closes = df["close_price"].to_numpy(dtype=float)
+    highs = df["high_price"].to_numpy(dtype=float)
+    lows = df["low_price"].to_numpy(dtype=float)
+    volumes = df["volume"].to_numpy(dtype=float)
+    dp = _price_decimals(closes)
+
+    dates = pd.DatetimeIndex(df.index).normalize()
+    start = dates[0] if len(dates) else None
+    offsets = ((dates - start).days.tolist()) if start is not None else []
+
+    sr = support_resistance(highs, lows) if len(closes) else {"resistance": [], "support": []}
+    profile = volume_profile(closes, volumes, float(lows.min()), float(highs.max())) if len(closes) else None
+    pivots = levels["weekly_pivots"] or {}
+
+    return {
+        "v": SPEC_VERSION,
+        "symbol": pick["symbol"],
+        "direction": levels["direction"],
+        "start": start.date().isoformat() if start is not None else None,
+        "bars": {
+            "t": offsets,
+            "o": _column(df["open_price"].to_numpy(), dp),
+            "h": _column(highs, dp),
+            "l": _column(lows, dp),
+            "c": _column(closes, dp),
+            "v": _column(volumes, 0),
+            "rsi": _column(rsi(df["close_price"]).to_numpy(), 1),
+        },
+        "levels": {
+            "entry": _level(levels["entry_price"], dp),
+            "stop_loss": _level(levels["stop_loss"], dp),
+            "targets": {
+                "primary": _level(levels["target_primary"], dp),
+                "medium": _level(levels["target_medium"], dp),
+                "moonshot": _level(levels["target_moonshot"], dp),
+            },
+            "support": [_level(x, dp) for x in sr["support"]],
+            "resistance": [_level(x, dp) for x in sr["resistance"]],
+            "pivots": {k: _level(v, dp) for k, v in pivots.items() if v is not None},
+            "swing_low": _level(levels["swing_low"], dp),
+            "swing_high": _level(levels["swing_high"], dp),
+        },
+        "volume_profile": {
+            "edges": _column(profile.edges, dp),
+            "volumes": _column(profile.volumes, 0),
+            **{k: round(v, dp) for k, v in profile.to_dict().items()},
+        } if profile is not None else None,
+        "confluence": {
+            "score": levels["confluence_score"],
+            "methods": levels["confluence_methods"],
+            "rsi_divergence": levels["rsi_divergence"],
+            "gann_alignment": levels["gann_alignment"],
+        },
+    }
+
+
+def encode_chart_spec(spec: Dict[str, Any]) -> Tuple[bytes, bytes, str]:
+    """Spec → (compact JSON bytes, gzip bytes, strong ETag)"""
+    raw = json.dumps(spec, separators=(",", ":"), allow_nan=False).encode("utf-8")
+    etag = f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+    # mtime=0 → identical gzip bytes for identical specs
+    return raw, gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0), etag
+
+
+async def fetch_pick_chart_data(conn, pick_id: int) -> Tuple[Optional[Any], Optional[pd.DataFrame]]:
+    """(pick row, 90-day OHLCV frame) – (None, None) for an unknown pick"""
+    pick = await conn.fetchrow(PICK_CHART_QUERY + " WHERE p.id = $1", pick_id)
+    if pick is None:
+        return None, None
+
+    rows = await conn.fetch("""
+        SELECT date, open_price, high_price, low_price, close_price, volume
+        FROM prime_ohlc_90d
+        WHERE symbol = $1
+        ORDER BY date ASC
+    """, pick["symbol"])
+    if not rows:
+        return pick, None
+
+    df = pd.DataFrame([dict(r) for r in rows])
+    df["date"] = pd.to_datetime(df["date"])
+    for col in ["open_price", "high_price", "low_price", "close_price", "volume"]:
+        df[col] = df[col].astype(float)
+    return pick, df.set_index("date")
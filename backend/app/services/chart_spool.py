@@ -0,0 +1,92 @@
+# backend/app/services/chart_spool.py
+"""
+Chart Spool – BullsBears v6
+Local, content-addressed handoff of rendered charts (the size-budgeted
+vision variant – palette PNG or WebP) from chart generation to the vision
+agent.
+
+- Files are named by chart fingerprint: {CHART_SPOOL_DIR}/{fp}.img
+  (format is sniffed from the bytes when read)
+- Writes are atomic (tmp file + rename) so a reader never sees half a PNG
+- shortlist_candidates.chart_fingerprint is set as soon as a chart is
+  spooled, so vision can start before the Firebase upload has finished
+  (chart_url is filled in by the background upload for the frontend)
+- Vision falls back to downloading chart_vision_url (the same budgeted
+  image, uploaded alongside the share PNG) when the file isn't here –
+  other host, pruned, or reused chart from an earlier run
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAX_AGE_HOURS = 48
+
+
+def spool_dir() -> Path:
+    path = Path(settings.CHART_SPOOL_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def spool_path(fingerprint: str) -> Path:
+    return spool_dir() / f"{fingerprint}.img"
+
+
+def spool_chart(fingerprint: str, image_bytes: bytes) -> Optional[Path]:
+    """Write image bytes under their fingerprint; None if the spool isn't writable"""
+    try:
+        path = spool_path(fingerprint)
+        if path.exists():
+            return path
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(image_bytes)
+        os.replace(tmp, path)
+        return path
+    except OSError as e:
+        logger.warning(f"Chart spool write failed ({fingerprint[:12]}): {e}")
+        return None
+
+
+def read_spooled_chart(fingerprint: Optional[str]) -> Optional[bytes]:
+    """Image bytes for a fingerprint, or None if not spooled on this host"""
+    if not fingerprint:
+        return None
+    try:
+        return spool_path(fingerprint).read_bytes()
+    except OSError:
+        return None
+
+
+def prune_spool(max_age_hours: float = SPOOL_MAX_AGE_HOURS) -> int:
+    """Delete spooled charts older than max_age_hours; returns files removed"""
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    try:
+        for path in spool_dir().glob("*.img"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+    except OSError as e:
+        logger.warning(f"Chart spool prune failed: {e}")
+    return removed
+
+
+async def ensure_chart_columns(conn):
+    """Idempotent – also applied by db_migration v7"""
+    await conn.execute("""
+        ALTER TABLE shortlist_candidates ADD COLUMN IF NOT EXISTS chart_url TEXT;
+        ALTER TABLE shortlist_candidates ADD COLUMN IF NOT EXISTS chart_thumb_url TEXT;
+        ALTER TABLE shortlist_candidates ADD COLUMN IF NOT EXISTS chart_vision_url TEXT;
+        ALTER TABLE shortlist_candidates ADD COLUMN IF NOT EXISTS chart_fingerprint VARCHAR(64);
+        CREATE INDEX IF NOT EXISTS idx_shortlist_chart_fp ON shortlist_candidates(chart_fingerprint);
+    """)
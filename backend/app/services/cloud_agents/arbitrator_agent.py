@@ -4,58 +4,215 @@ Final Arbitrator Agent – BullsBears v5.1 (Dec 2025)
 Primary: Grok 4.1-fast (xAI)
 Failover: gpt-oss-120b (Fireworks)
 Robust JSON parsing + no hard candidate limit
+Calls go through llm_gateway (pooled clients, retries with backoff), streamed:
+the connection closes as soon as the {"final_picks": [...]} object is complete
+
+Hedged race: if the primary hasn't answered within its observed
+ARBITRATOR_HEDGE_PERCENTILE latency, the failover is fired in parallel.
+The first valid JSON wins, the loser is cancelled, and the winner +
+latency saved are returned under result["race"]. A cancelled leg records
+its elapsed time as a (lower-bound) latency sample, so slow primaries keep
+pulling the hedge percentile up instead of the history keeping only wins.
 """
 
-import httpx
+import asyncio
 import json
 import logging
-import re
+import time
 from pathlib import Path
+from typing import Optional
 from app.core.config import settings
+from app.services.cloud_agents.json_stream import has_keys
+from app.services.cloud_agents.llm_gateway import LLMResponse, chat_completion, get_provider, latency_percentile
+from app.services.llm_cache import CacheKey, fingerprint, get_redis, template_hash
 
 logger = logging.getLogger(__name__)
 
 PROMPT_PATH = Path(__file__).parent.parent / "prompts" / "arbitrator_prompt.txt"
 BIAS_PATH   = Path(__file__).parent.parent / "prompts" / "arbitrator_bias.json"
 
+LATENCY_HISTORY_KEY = "arbitrator:latency:"   # + model → list of recent latencies (ms)
+LATENCY_HISTORY_LEN = 60
+
 PROVIDERS = [
     {
         "name": "grok-4.1-fast",
         "model": "grok-4.1-fast",
-        "base_url": "https://api.x.ai/v1",
-        "api_key": settings.GROK_API_KEY,
+        "provider": "xai",
     },
     {
         "name": "gpt-oss-120b",
         "model": "accounts/fireworks/models/gpt-oss-120b",
-        "base_url": "https://api.fireworks.ai/inference/v1",
-        "api_key": settings.FIREWORKS_API_KEY,
+        "provider": "fireworks",
     },
 ]
 
-def extract_json(text: str) -> str:
-    """Extract JSON from LLM output, even if wrapped in markdown."""
-    text = text.strip()
-    text = re.sub(r"^```json\s*|```$", "", text, flags=re.MULTILINE)
-    start = text.find("{")
-    end = text.rfind("}") + 1
-    if start == -1 or end == 0:
-        raise ValueError("No JSON object found")
-    return text[start:end]
-
-async def call_provider(provider: dict, payload: dict) -> dict:
-    headers = {
-        "Authorization": f"Bearer {provider['api_key']}",
-        "Content-Type": "application/json"
-    }
-    async with httpx.AsyncClient(timeout=90.0) as client:
-        resp = await client.post(
-            f"{provider['base_url']}/chat/completions",
-            headers=headers,
-            json=payload,
-        )
-        resp.raise_for_status()
-        return resp.json()
+async def call_provider(provider: dict, payload: dict, cache: CacheKey = None) -> LLMResponse:
+    """One arbitrator call via the gateway"""
+    return await chat_completion(
+        provider["provider"],
+        provider["model"],
+        payload["messages"],
+        temperature=payload["temperature"],
+        max_tokens=payload["max_tokens"],
+        timeout=90.0,
+        cache=cache,
+        stream=True,
+        accept=has_keys("final_picks"),
+    )
+
+async def _latency_history(model: str) -> list:
+    """Recent arbitrator latencies (ms) – one call a day, so history lives in Redis, not the process"""
+    client = get_redis()
+    if client is None:
+        return []
+    try:
+        raw = await asyncio.wait_for(client.lrange(LATENCY_HISTORY_KEY + model, 0, -1), timeout=2)
+        return [float(x) for x in raw]
+    except Exception:
+        return []
+
+
+async def _record_latency(model: str, latency_ms: float):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.lpush(LATENCY_HISTORY_KEY + model, round(latency_ms, 1))
+            pipe.ltrim(LATENCY_HISTORY_KEY + model, 0, LATENCY_HISTORY_LEN - 1)
+            await asyncio.wait_for(pipe.execute(), timeout=2)
+    except Exception:
+        pass
+
+
+def _percentile(samples: list, pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(pct / 100 * len(samples)))]
+
+
+async def hedge_delay(provider: dict) -> float:
+    """
+    Seconds to wait on the primary before firing the failover:
+    ARBITRATOR_HEDGE_PERCENTILE of its Redis latency history, else of this
+    process's gateway samples, else ARBITRATOR_HEDGE_DEFAULT_S.
+    """
+    pct = settings.ARBITRATOR_HEDGE_PERCENTILE
+    history = await _latency_history(provider["model"])
+    if len(history) >= 5:
+        delay = _percentile(history, pct) / 1000
+    else:
+        delay = latency_percentile(provider["provider"], provider["model"], pct)
+    if delay is None:
+        delay = settings.ARBITRATOR_HEDGE_DEFAULT_S
+    return max(settings.ARBITRATOR_HEDGE_MIN_S, delay)
+
+
+async def _attempt(provider: dict, payload: dict, cache: CacheKey) -> dict:
+    """One provider leg: call + parse. Raises on transport error or unusable JSON."""
+    started = time.perf_counter()
+    logger.info(f"Arbitrator calling {provider['name']}...")
+    try:
+        response = await call_provider(provider, payload, cache)
+    except asyncio.CancelledError:
+        # Lost the race – it took at least this long; dropping it would bias the p90 low
+        await _record_latency(provider["model"], (time.perf_counter() - started) * 1000)
+        raise
+    try:
+        result = response.parsed
+        if not isinstance(result, dict) or not isinstance(result.get("final_picks"), list):
+            raise ValueError(f"No final_picks object in response: {response.content[:200]}")
+    except Exception:
+        await response.discard_cache()
+        raise
+
+    latency_ms = (time.perf_counter() - started) * 1000
+    if not response.cached:
+        await _record_latency(provider["model"], latency_ms)
+
+    result.setdefault("model_used", provider["model"])
+    result.setdefault("provider", provider["name"])
+    if response.cached:
+        result["cached"] = True
+    result["_latency_ms"] = latency_ms
+    return result
+
+
+async def _race(primary: dict, failover: dict, payload: dict, cache: CacheKey) -> dict:
+    """
+    Primary alone until hedge_delay(); then (or as soon as the primary fails)
+    the failover runs alongside. First valid result wins, the other is cancelled.
+    """
+    delay = await hedge_delay(primary)
+    t0 = time.perf_counter()
+
+    def elapsed_ms() -> float:
+        return (time.perf_counter() - t0) * 1000
+
+    first = asyncio.create_task(_attempt(primary, payload, cache))
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done and first.exception() is None:
+        result = first.result()
+        result["race"] = {"winner": primary["name"], "hedged": False, "hedge_after_s": round(delay, 2),
+                          "latency_saved_ms": 0.0}
+        return result
+
+    primary_failed_ms = elapsed_ms() if done else None
+    if done:
+        logger.warning(f"Arbitrator failed on {primary['name']}: {first.exception()}")
+    else:
+        logger.info(f"Arbitrator: {primary['name']} still pending after {delay:.1f}s → racing {failover['name']}")
+    hedge_fired_ms = elapsed_ms()
+    second = asyncio.create_task(_attempt(failover, payload, cache))
+
+    pending = {second} if done else {first, second}
+    last_error = first.exception() if done else None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    name = primary["name"] if task is first else failover["name"]
+                    logger.warning(f"Arbitrator failed on {name}: {last_error}")
+                    if task is first:
+                        primary_failed_ms = elapsed_ms()
+                    continue
+
+                result = task.result()
+                total_ms = elapsed_ms()
+                winner = primary if task is first else failover
+                if task is first:
+                    saved_ms, exact = 0.0, True
+                elif primary_failed_ms is not None:
+                    # Sequential failover would have started the backup only once the primary failed
+                    saved_ms, exact = primary_failed_ms + result["_latency_ms"] - total_ms, True
+                else:
+                    # Primary cancelled mid-flight – estimate against its usual tail
+                    p95 = _percentile(await _latency_history(primary["model"]), 95) or delay * 1000
+                    saved_ms, exact = max(p95, total_ms) - total_ms, False
+                result["race"] = {
+                    "winner": winner["name"],
+                    "hedged": True,
+                    "hedge_after_s": round(delay, 2),
+                    "hedge_fired_ms": round(hedge_fired_ms, 1),
+                    "total_ms": round(total_ms, 1),
+                    "latency_saved_ms": round(max(0.0, saved_ms), 1),
+                    "latency_saved_exact": exact,
+                }
+                logger.info(f"Arbitrator race won by {winner['name']} in {total_ms:.0f}ms "
+                            f"(saved ~{result['race']['latency_saved_ms']:.0f}ms)")
+                return result
+        raise last_error
+    finally:
+        for task in (first, second):
+            if not task.done():
+                task.cancel()
+        # Let the loser record its censored latency before returning
+        await asyncio.gather(first, second, return_exceptions=True)
+
 
 async def get_final_picks(phase_data: dict) -> dict:
     base_prompt = PROMPT_PATH.read_text(encoding="utf-8").strip()
@@ -121,33 +278,35 @@ Return valid JSON with "final_picks" array.
         "max_tokens": 4096,
     }
 
-    last_error = None
+    # Same candidates + bias + prompt → same picks on a same-day rerun
+    cache = CacheKey("arbitrator", template_hash(base_prompt), fingerprint(payload_base["messages"]))
+
+    available = [p for p in PROVIDERS if get_provider(p["provider"]).api_key]
     for provider in PROVIDERS:
-        if not provider["api_key"]:
+        if provider not in available:
             logger.info(f"Skipping {provider['name']} - no API key")
-            continue
-            
-        payload = payload_base.copy()
-        payload["model"] = provider["model"]
 
+    last_error = None
+    if settings.ARBITRATOR_HEDGE_ENABLED and len(available) >= 2:
         try:
-            logger.info(f"Arbitrator calling {provider['name']}...")
-            response = await call_provider(provider, payload)
-            content = response["choices"][0]["message"]["content"]
-
-            clean_json = extract_json(content)
-            result = json.loads(clean_json)
-
-            result.setdefault("model_used", provider["model"])
-            result.setdefault("provider", provider["name"])
-            picks_count = len(result.get("final_picks", []))
-            logger.info(f"Arbitrator success with {provider['name']}: {picks_count} picks")
+            result = await _race(available[0], available[1], payload_base, cache)
+            result.pop("_latency_ms", None)
+            logger.info(f"Arbitrator success with {result['race']['winner']}: {len(result['final_picks'])} picks")
             return result
-
         except Exception as e:
             last_error = e
-            logger.warning(f"Arbitrator failed on {provider['name']}: {e}")
-            continue
+    else:
+        for provider in available:
+            try:
+                result = await _attempt(provider, payload_base, cache)
+                result.pop("_latency_ms", None)
+                picks_count = len(result.get("final_picks", []))
+                logger.info(f"Arbitrator success with {provider['name']}: {picks_count} picks")
+                return result
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Arbitrator failed on {provider['name']}: {e}")
+                continue
 
     logger.error(f"All providers failed. Last error: {last_error}")
     return {
@@ -0,0 +1,161 @@
+# backend/app/services/cloud_agents/json_stream.py
+"""
+Incremental JSON Extraction – BullsBears v6
+Finds the result object in LLM output while it is still streaming, so the
+gateway can close the connection as soon as the payload is complete.
+
+- feed(chunk) scans only the new text: brace depth + string/escape state,
+  so braces inside strings don't count
+- Thinking preambles are ignored: anything inside <think>…</think> and
+  everything before a bare </think> (thinking models often omit the
+  opening tag) is dropped
+- Markdown fences and prose around the object are skipped
+- accept(obj) decides which closed object is *the* result (e.g. it has a
+  "final_picks" key) – other objects (examples in the reasoning) are skipped
+- Top-level arrays are only considered when the predicate asks for them
+  (array_of(...), used by batched vision)
+
+extract_json_object(text) runs the same scan over a complete response
+(non-streamed, cached) and falls back to the last parsable object.
+"""
+
+import json
+from typing import Any, Callable, List, Optional
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+Accept = Callable[[Any], bool]
+
+
+def has_keys(*keys: str) -> Accept:
+    """accept= predicate: a dict with at least one of `keys`"""
+    return lambda obj: isinstance(obj, dict) and any(k in obj for k in keys)
+
+
+def array_of(item: Accept) -> Accept:
+    """accept= predicate: a non-empty array whose items pass `item` (scans top-level [...] too)"""
+    def accept(obj: Any) -> bool:
+        return isinstance(obj, list) and bool(obj) and any(item(x) for x in obj)
+    accept.arrays = True
+    return accept
+
+
+class JSONObjectStream:
+    """Feed streamed text; `.result` is set when an accepted top-level object closes"""
+
+    def __init__(self, accept: Optional[Accept] = None):
+        self.accept = accept or (lambda obj: isinstance(obj, dict))
+        self._openers = "{[" if getattr(accept, "arrays", False) else "{"
+        self.result: Any = None
+        self.candidates: List[Any] = []    # Every object that parsed, accepted or not
+        self._buf = ""
+        self._pos = 0                   # Next char to scan
+        self._start = -1                # Start of the current top-level object
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._thinking = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    @property
+    def text(self) -> str:
+        return self._buf
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; True once the result object is complete"""
+        if self.done or not chunk:
+            return self.done
+        self._buf += chunk
+
+        # A closing think tag resets everything scanned so far – the JSON is after it
+        close = self._buf.rfind(THINK_CLOSE, max(0, self._pos - len(THINK_CLOSE)))
+        if close != -1:
+            self._reset(close + len(THINK_CLOSE))
+
+        buf = self._buf
+        while self._pos < len(buf):
+            if self._thinking:
+                # Opening tag seen, wait for the close (handled above on the next chunk)
+                self._pos = len(buf)
+                break
+
+            ch = buf[self._pos]
+            if self._depth == 0:
+                if ch == "<" and buf.startswith(THINK_OPEN, self._pos):
+                    self._thinking = True
+                    continue
+                if ch == "<" and len(buf) - self._pos < len(THINK_OPEN) and THINK_OPEN.startswith(buf[self._pos:]):
+                    break       # Possible partial tag at the end of the chunk
+                if ch in self._openers:
+                    self._start = self._pos
+                    self._depth = 1
+                self._pos += 1
+                continue
+
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0 and self._close(buf[self._start:self._pos]):
+                    return True
+        return False
+
+    def finish(self) -> Any:
+        """End of stream: the accepted object, else the last object that parsed"""
+        if self.result is None and self.candidates:
+            return self.candidates[-1]
+        return self.result
+
+    def _close(self, candidate: str) -> bool:
+        self._start = -1
+        try:
+            obj = json.loads(candidate)
+        except ValueError:
+            return False
+        self.candidates.append(obj)
+        if self.accept(obj):
+            self.result = obj
+            return True
+        return False
+
+    def _reset(self, pos: int):
+        self._pos = pos
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._thinking = False
+        self.candidates.clear()
+
+
+def extract_json_object(text: str, accept: Optional[Accept] = None) -> Any:
+    """Result object from a complete response; raises ValueError if there is none"""
+    stream = JSONObjectStream(accept)
+    stream.feed(text)
+    obj = stream.finish()
+    # An unbalanced "{" in prose can swallow the object – rescan from each later brace
+    opener = "[" if getattr(accept, "arrays", False) else "{"
+    start = text.find(opener)
+    while obj is None and start != -1:
+        start = text.find(opener, start + 1)
+        if start != -1:
+            stream = JSONObjectStream(accept)
+            stream.feed(text[start:])
+            obj = stream.finish()
+    if obj is None:
+        raise ValueError(f"No JSON object found: {text[:200]}")
+    return obj
@@ -1,11 +1,10 @@
 # backend/app/services/cloud_agents/learner_agent.py
-import httpx
 import json
 import logging
 from datetime import date
 from pathlib import Path
-from app.core.config import settings
 from app.core.database import get_asyncpg_pool
+from app.services.cloud_agents.llm_gateway import chat_completion
 
 logger = logging.getLogger(__name__)
 
@@ -124,19 +123,16 @@ async def run_weekly_learner(week_start: date, week_end: date):
     prompt = template.replace("{{CANDIDATE_SAMPLES}}", json.dumps(candidates, indent=2))
 
     # 4. Call Fireworks qwen2.5-72b
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        resp = await client.post(
-            "https://api.fireworks.ai/inference/v1/chat/completions",
-            headers={"Authorization": f"Bearer {settings.FIREWORKS_API_KEY}"},
-            json={
-                "model": "accounts/fireworks/models/qwen2.5-72b-instruct",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.1,
-                "max_tokens": 8192,
-            },
-        )
-        resp.raise_for_status()
-        content = resp.json()["choices"][0]["message"]["content"]
+    response = await chat_completion(
+        "fireworks",
+        "accounts/fireworks/models/qwen2.5-72b-instruct",
+        [{"role": "user", "content": prompt}],
+        temperature=0.1,
+        max_tokens=8192,
+        timeout=300.0,
+        agent="learner",
+    )
+    content = response.content
 
     # 5. Extract JSON safely
     json_str = content
@@ -147,6 +143,7 @@ async def run_weekly_learner(week_start: date, week_end: date):
         data = json.loads(json_str.strip())
     except Exception as e:
         logger.error(f"Invalid JSON from LLM: {e}\nRaw:\n{content}")
+        await response.discard_cache()
         raise
 
     # 6. Write files — instantly used by prescreen/arbitrator next morning
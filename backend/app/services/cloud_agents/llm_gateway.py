@@ -0,0 +1,618 @@
+# backend/app/services/cloud_agents/llm_gateway.py
+"""
+LLM Gateway – BullsBears v6
+One place every cloud agent sends chat completions through.
+
+- One pooled httpx.AsyncClient per provider (HTTP/2 when the h2 package is
+  installed), reused across calls instead of a client per agent run
+- Per-provider concurrency semaphore (LLM_*_CONCURRENCY) – 75 social calls
+  no longer open 75 sockets to xAI at once
+- Retries on 429 / 5xx / transport errors with full-jitter exponential
+  backoff; Retry-After is honoured when the provider sends it
+- Optional hedge: if the primary hasn't answered after `after_s`, the same
+  request goes to a failover provider and the first success wins
+- Circuit breaker per provider/model (llm_breaker): after repeated
+  failures/timeouts calls raise CircuitOpenError instantly instead of
+  waiting out their timeouts; a hedge fires its failover right away
+- Per provider/model stats: calls, errors, retries, hedges, latency
+  p50/p95, prompt/completion tokens (get_llm_stats)
+- Every call (including cache hits and failures) is written to llm_calls
+  for per-agent latency / cost / parse-failure telemetry (llm_telemetry)
+- Optional response cache (llm_cache): pass cache=CacheKey(...) and an
+  identical call within LLM_CACHE_TTL_HOURS returns the stored completion
+- Optional streaming (stream=True): SSE deltas feed json_stream's
+  incremental extractor and the response is closed as soon as the result
+  object (accept=...) is complete – thinking preambles are skipped.
+  response.parsed holds that object for streamed, plain and cached calls.
+  Usage only arrives in the last SSE chunk, so an early-closed stream
+  reports estimated tokens (chars / 4 + IMAGE_TOKENS per image) and
+  tokens_estimated=True
+- LLM_*_BASE_URL points a provider at another OpenAI-compatible endpoint
+  (scripts/llm_standin.py for offline benchmarks / fault injection)
+
+Celery tasks run each job in a fresh asyncio.run() loop and httpx clients
+are bound to the loop that created them, so clients + semaphores are rebuilt
+when the running loop changes.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.cloud_agents.json_stream import Accept, JSONObjectStream, extract_json_object
+from app.services.llm_breaker import CircuitOpenError, allow_call, breaker_name, record_failure, record_success
+from app.services.llm_cache import CacheKey, discard_cached, get_cached, store_cached
+from app.services.llm_telemetry import mark_parse_failed, record_llm_call
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 – enables httpx HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 8.0
+RETRY_AFTER_MAX_S = 30.0
+LATENCY_WINDOW = 500        # Samples kept per provider/model for percentiles
+CHARS_PER_TOKEN = 4         # Token estimate for streams closed before their usage chunk
+IMAGE_TOKENS = 256          # ~ one 500x400 vision chart at 28px vision patches
+
+
+@dataclass(frozen=True)
+class Provider:
+    name: str
+    base_url: str
+    base_url_setting: str       # Settings attribute overriding base_url (e.g. scripts/llm_standin)
+    api_key_setting: str        # Settings attribute holding the key
+    concurrency_setting: str    # Settings attribute holding max in-flight calls
+    timeout: float = 90.0
+
+    @property
+    def url(self) -> str:
+        return getattr(settings, self.base_url_setting, "") or self.base_url
+
+    @property
+    def api_key(self) -> str:
+        return getattr(settings, self.api_key_setting, "") or ""
+
+    @property
+    def concurrency(self) -> int:
+        return max(1, int(getattr(settings, self.concurrency_setting, 8)))
+
+
+PROVIDERS: Dict[str, Provider] = {
+    "fireworks": Provider(
+        name="fireworks",
+        base_url="https://api.fireworks.ai/inference/v1",
+        base_url_setting="LLM_FIREWORKS_BASE_URL",
+        api_key_setting="FIREWORKS_API_KEY",
+        concurrency_setting="LLM_FIREWORKS_CONCURRENCY",
+    ),
+    "xai": Provider(
+        name="xai",
+        base_url="https://api.x.ai/v1",
+        base_url_setting="LLM_XAI_BASE_URL",
+        api_key_setting="GROK_API_KEY",
+        concurrency_setting="LLM_XAI_CONCURRENCY",
+    ),
+}
+
+
+@dataclass
+class Hedge:
+    """Failover target fired when the primary is still pending after `after_s`"""
+    provider: str
+    model: str
+    after_s: float
+
+
+@dataclass
+class LLMResponse:
+    content: str
+    provider: str
+    model: str
+    latency_ms: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    attempts: int = 1
+    hedged: bool = False        # A hedge request was fired
+    cached: bool = False        # Served from llm_cache, no provider call
+    cache_key: Optional[str] = None
+    parsed: Any = None          # Result object (when the caller passed accept=)
+    streamed: bool = False
+    ttfb_ms: Optional[float] = None         # Response headers received
+    first_token_ms: Optional[float] = None  # First content delta (streamed)
+    closed_early: bool = False  # Stream closed once the result object was complete
+    tokens_estimated: bool = False          # No usage chunk – token counts are estimates
+    finish_reason: Optional[str] = None     # "length" = cut off at max_tokens
+    http_status: Optional[int] = None
+    call_id: Optional[int] = None           # llm_calls row
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    async def discard_cache(self):
+        """Caller couldn't use this content (bad JSON…) – don't replay it on the next run"""
+        await discard_cached(self.cache_key)
+        await mark_parse_failed(self.call_id)
+
+
+# =============================================================================
+# STATS
+# =============================================================================
+
+@dataclass
+class _CallStats:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    early_closes: int = 0
+    short_circuits: int = 0     # Calls refused by an open circuit breaker
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    first_token_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def to_dict(self) -> Dict[str, Any]:
+        def pct(values: Deque[float], p: float) -> Optional[float]:
+            samples = sorted(values)
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))], 1)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "early_closes": self.early_closes,
+            "short_circuits": self.short_circuits,
+            "latency_p50_ms": pct(self.latencies_ms, 50),
+            "latency_p95_ms": pct(self.latencies_ms, 95),
+            "first_token_p50_ms": pct(self.first_token_ms, 50),
+        }
+
+
+_stats: Dict[str, _CallStats] = {}
+
+
+def _stat(provider: str, model: str) -> _CallStats:
+    key = f"{provider}/{model}"
+    if key not in _stats:
+        _stats[key] = _CallStats()
+    return _stats[key]
+
+
+def get_llm_stats() -> Dict[str, Dict[str, Any]]:
+    """Per provider/model counters + latency percentiles since process start"""
+    return {key: s.to_dict() for key, s in sorted(_stats.items())}
+
+
+def latency_percentile(provider: str, model: str, pct: float) -> Optional[float]:
+    """Observed latency percentile in seconds (None until there are samples)"""
+    samples = sorted(_stat(provider, model).latencies_ms)
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(pct / 100 * len(samples)))] / 1000
+
+
+# =============================================================================
+# CLIENT POOL
+# =============================================================================
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_clients: Dict[str, httpx.AsyncClient] = {}
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _bind_loop():
+    """Drop clients/semaphores created on a previous event loop"""
+    global _loop
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        _clients.clear()
+        _semaphores.clear()
+        _loop = loop
+
+
+def get_provider(name: str) -> Provider:
+    try:
+        return PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def _client(provider: Provider) -> httpx.AsyncClient:
+    _bind_loop()
+    client = _clients.get(provider.name)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=provider.url,
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(provider.timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=provider.concurrency,
+                max_keepalive_connections=provider.concurrency,
+                keepalive_expiry=60.0,
+            ),
+        )
+        _clients[provider.name] = client
+    return client
+
+
+def _semaphore(provider: Provider) -> asyncio.Semaphore:
+    _bind_loop()
+    sem = _semaphores.get(provider.name)
+    if sem is None:
+        sem = _semaphores[provider.name] = asyncio.Semaphore(provider.concurrency)
+    return sem
+
+
+async def close_llm_clients():
+    """Close pooled provider clients (end of a Celery task / app shutdown)"""
+    global _loop
+    clients = list(_clients.values())
+    _clients.clear()
+    _semaphores.clear()
+    _loop = None
+    for client in clients:
+        try:
+            await client.aclose()
+        except RuntimeError:
+            pass    # Client belonged to a loop that's already gone
+
+
+# =============================================================================
+# CALLS
+# =============================================================================
+
+def _retry_delay(attempt: int, resp: Optional[httpx.Response]) -> float:
+    """Retry-After (seconds or HTTP date) if given, else full-jitter exponential backoff"""
+    if resp is not None:
+        retry_after = resp.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_AFTER_MAX_S)
+            except ValueError:
+                from email.utils import parsedate_to_datetime
+                try:
+                    wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(wait, 0.0), RETRY_AFTER_MAX_S)
+                except (TypeError, ValueError):
+                    pass
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+async def _send(provider: Provider, payload: Dict[str, Any], headers: Dict[str, str],
+                timeout: Optional[float], retry_ok: bool) -> LLMResponse:
+    """One non-streamed request"""
+    start = time.perf_counter()
+    async with _client(provider).stream(
+        "POST", "/chat/completions", json=payload, headers=headers,
+        **({"timeout": timeout} if timeout else {}),
+    ) as resp:
+        ttfb_ms = (time.perf_counter() - start) * 1000
+        if resp.status_code in RETRY_STATUSES and retry_ok:
+            raise httpx.HTTPStatusError(f"retryable {resp.status_code}", request=resp.request, response=resp)
+        await resp.aread()
+        resp.raise_for_status()
+    data = resp.json()
+    usage = data.get("usage") or {}
+    return LLMResponse(
+        content=data["choices"][0]["message"]["content"] or "",
+        finish_reason=data["choices"][0].get("finish_reason"),
+        provider=provider.name,
+        model=payload["model"],
+        latency_ms=(time.perf_counter() - start) * 1000,
+        prompt_tokens=int(usage.get("prompt_tokens") or 0),
+        completion_tokens=int(usage.get("completion_tokens") or 0),
+        ttfb_ms=ttfb_ms,
+        http_status=resp.status_code,
+        raw=data,
+    )
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _estimate_prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Text parts at CHARS_PER_TOKEN, image parts at IMAGE_TOKENS each"""
+    tokens = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += _estimate_tokens(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "image_url":
+                tokens += IMAGE_TOKENS
+            else:
+                tokens += _estimate_tokens(part.get("text") or "")
+    return tokens
+
+
+async def _send_stream(provider: Provider, payload: Dict[str, Any], headers: Dict[str, str],
+                       timeout: Optional[float], retry_ok: bool, accept: Optional[Accept]) -> LLMResponse:
+    """
+    One SSE request. Deltas go through JSONObjectStream; once the accepted
+    object closes we stop reading and leave the stream (closes the response).
+    Without a usage chunk (closed early) tokens are estimated from the
+    request and every delta received, reasoning included.
+    """
+    start = time.perf_counter()
+    extractor = JSONObjectStream(accept)
+    usage: Dict[str, Any] = {}
+    reasoning_chars = 0
+    first_token_ms = None
+    finish_reason = None
+    closed_early = False
+    body = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+    async with _client(provider).stream(
+        "POST", "/chat/completions", json=body, headers=headers,
+        **({"timeout": timeout} if timeout else {}),
+    ) as resp:
+        ttfb_ms = (time.perf_counter() - start) * 1000
+        if resp.status_code in RETRY_STATUSES and retry_ok:
+            raise httpx.HTTPStatusError(f"retryable {resp.status_code}", request=resp.request, response=resp)
+        if resp.status_code >= 400:
+            await resp.aread()
+            resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            usage = event.get("usage") or usage
+            for choice in event.get("choices") or []:
+                finish_reason = choice.get("finish_reason") or finish_reason
+                reasoning_chars += len((choice.get("delta") or {}).get("reasoning_content") or "")
+                delta = (choice.get("delta") or {}).get("content")
+                if not delta:
+                    continue
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                if extractor.feed(delta):
+                    closed_early = True
+                    break
+            if closed_early:
+                break
+
+    estimated = not usage
+    if estimated:
+        usage = {
+            "prompt_tokens": _estimate_prompt_tokens(payload["messages"]),
+            "completion_tokens": _estimate_tokens(extractor.text) + reasoning_chars // CHARS_PER_TOKEN,
+        }
+    return LLMResponse(
+        content=extractor.text,
+        provider=provider.name,
+        model=payload["model"],
+        latency_ms=(time.perf_counter() - start) * 1000,
+        prompt_tokens=int(usage.get("prompt_tokens") or 0),
+        completion_tokens=int(usage.get("completion_tokens") or 0),
+        tokens_estimated=estimated,
+        parsed=extractor.finish(),
+        streamed=True,
+        ttfb_ms=ttfb_ms,
+        first_token_ms=first_token_ms,
+        closed_early=closed_early,
+        finish_reason=finish_reason,
+        http_status=resp.status_code,
+    )
+
+
+async def _post_with_retry(provider: Provider, payload: Dict[str, Any],
+                           timeout: Optional[float], max_retries: int,
+                           stream: bool = False, accept: Optional[Accept] = None) -> LLMResponse:
+    model = payload["model"]
+    stats = _stat(provider.name, model)
+    headers = {"Authorization": f"Bearer {provider.api_key}", "Content-Type": "application/json"}
+    breaker = breaker_name(provider.name, model)
+    attempt = 0
+    while True:
+        try:
+            async with _semaphore(provider):
+                # Checked per attempt: calls queued or backing off when the breaker trips stop here
+                await allow_call(breaker)
+                if stream:
+                    result = await _send_stream(provider, payload, headers, timeout, attempt < max_retries, accept)
+                else:
+                    result = await _send(provider, payload, headers, timeout, attempt < max_retries)
+        except CircuitOpenError:
+            stats.short_circuits += 1
+            raise
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            resp = e.response if isinstance(e, httpx.HTTPStatusError) else None
+            retryable = resp is None or resp.status_code in RETRY_STATUSES
+            if retryable:
+                await record_failure(breaker, f"{resp.status_code if resp is not None else type(e).__name__}")
+            if not retryable or attempt >= max_retries:
+                stats.calls += 1
+                stats.errors += 1
+                raise
+            delay = _retry_delay(attempt, resp)
+            stats.retries += 1
+            attempt += 1
+            logger.warning(f"LLM {provider.name}/{model} retry {attempt}/{max_retries} in {delay:.1f}s: "
+                           f"{resp.status_code if resp is not None else type(e).__name__}")
+            await asyncio.sleep(delay)
+            continue
+
+        await record_success(breaker, result.latency_ms)
+        result.attempts = attempt + 1
+        stats.calls += 1
+        stats.latencies_ms.append(result.latency_ms)
+        if result.first_token_ms is not None:
+            stats.first_token_ms.append(result.first_token_ms)
+        stats.early_closes += int(result.closed_early)
+        stats.prompt_tokens += result.prompt_tokens
+        stats.completion_tokens += result.completion_tokens
+        return result
+
+
+async def _hedged(primary: Provider, payload: Dict[str, Any], hedge: Hedge,
+                  timeout: Optional[float], max_retries: int, **call: Any) -> LLMResponse:
+    """Primary first; after hedge.after_s also the failover – first success wins, loser cancelled"""
+    backup = get_provider(hedge.provider)
+    first = asyncio.create_task(_post_with_retry(primary, payload, timeout, max_retries, **call))
+    done, _ = await asyncio.wait({first}, timeout=max(0.0, hedge.after_s))
+    if done and not first.exception():
+        return first.result()
+
+    if not backup.api_key:
+        return await first
+
+    logger.info(f"LLM hedge: {primary.name}/{payload['model']} slow or failed → firing {backup.name}/{hedge.model}")
+    _stat(primary.name, payload["model"]).hedges += 1
+    second = asyncio.create_task(_post_with_retry(backup, {**payload, "model": hedge.model}, timeout, max_retries, **call))
+    pending = {second} if done else {first, second}
+    last_error: Optional[BaseException] = first.exception() if done else None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    result = task.result()
+                    result.hedged = True
+                    if task is second:
+                        _stat(primary.name, payload["model"]).hedge_wins += 1
+                    return result
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in (first, second):
+            if not task.done():
+                task.cancel()
+
+
+async def _record(agent: str, response: LLMResponse, accept: Optional[Accept]) -> Optional[int]:
+    return await record_llm_call(
+        agent, response.provider, response.model,
+        prompt_tokens=response.prompt_tokens,
+        completion_tokens=response.completion_tokens,
+        tokens_estimated=response.tokens_estimated,
+        ttfb_ms=response.ttfb_ms,
+        latency_ms=response.latency_ms,
+        http_status=response.http_status,
+        retries=max(0, response.attempts - 1),
+        cached=response.cached,
+        streamed=response.streamed,
+        parse_ok=(response.parsed is not None) if accept is not None else None,
+    )
+
+
+def _parse(content: str, accept: Optional[Accept]) -> Any:
+    try:
+        return extract_json_object(content, accept)
+    except ValueError:
+        return None
+
+
+async def chat_completion(
+    provider: str,
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: float = 0.0,
+    max_tokens: int = 1024,
+    timeout: Optional[float] = None,
+    hedge: Optional[Hedge] = None,
+    max_retries: Optional[int] = None,
+    cache: Optional[CacheKey] = None,
+    use_cache: bool = True,
+    stream: bool = False,
+    accept: Optional[Accept] = None,
+    agent: Optional[str] = None,
+    **extra: Any,
+) -> LLMResponse:
+    """
+    POST {url}/chat/completions through the pooled client.
+    Raises the last httpx error once retries (LLM_MAX_RETRIES) are exhausted.
+    With `cache`, identical calls (model, params, template, input) are served
+    from llm_cache; use_cache=False skips the lookup but still refreshes it.
+    With stream=True the result object (first closed JSON object passing
+    `accept`) ends the read early; response.parsed is None if none was found.
+    `agent` labels the llm_calls telemetry row (defaults to cache.agent).
+    """
+    primary = get_provider(provider)
+    if not primary.api_key:
+        raise RuntimeError(f"No API key configured for {provider} ({primary.api_key_setting})")
+
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        **extra,
+    }
+    retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+    agent = agent or (cache.agent if cache is not None else "unknown")
+
+    key = None
+    if cache is not None:
+        key = cache.redis_key(model, {"temperature": temperature, "max_tokens": max_tokens, **extra})
+        entry = await get_cached(key, cache.agent) if use_cache else None
+        if entry is not None:
+            response = LLMResponse(
+                content=entry["content"],
+                provider=entry.get("provider", provider),
+                model=entry.get("model", model),
+                latency_ms=0.0,
+                prompt_tokens=int(entry.get("prompt_tokens", 0)),
+                completion_tokens=int(entry.get("completion_tokens", 0)),
+                tokens_estimated=bool(entry.get("tokens_estimated", False)),
+                attempts=0,
+                cached=True,
+                cache_key=key,
+                parsed=_parse(entry["content"], accept) if accept else None,
+            )
+            response.call_id = await _record(agent, response, accept)
+            return response
+
+    try:
+        if hedge is not None:
+            response = await _hedged(primary, payload, hedge, timeout, retries, stream=stream, accept=accept)
+        else:
+            response = await _post_with_retry(primary, payload, timeout, retries, stream=stream, accept=accept)
+    except Exception as e:
+        status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+        # Non-retryable errors fail on the first try; short-circuited calls never reach the provider
+        exhausted = not isinstance(e, CircuitOpenError) and (status is None or status in RETRY_STATUSES)
+        await record_llm_call(agent, provider, model, http_status=status, retries=retries if exhausted else 0,
+                              streamed=stream, error=f"{type(e).__name__}: {e}")
+        raise
+    if accept is not None and not response.streamed:
+        response.parsed = _parse(response.content, accept)
+    response.call_id = await _record(agent, response, accept)
+
+    if key is not None and response.content:
+        response.cache_key = key
+        await store_cached(key, cache.agent, {
+            "content": response.content,
+            "provider": response.provider,
+            "model": response.model,
+            "prompt_tokens": response.prompt_tokens,
+            "completion_tokens": response.completion_tokens,
+            "tokens_estimated": response.tokens_estimated,
+            "stored_at": time.time(),
+        })
+    return response
@@ -12,6 +12,10 @@ import logging
 from datetime import date, timedelta
 from app.core.config import settings
 from app.core.database import get_asyncpg_pool
+from app.services.indicator_state import ensure_indicator_state_table
+from app.services.cloud_agents.json_stream import has_keys
+from app.services.cloud_agents.llm_gateway import chat_completion
+from app.services.llm_cache import CacheKey, fingerprint, template_hash
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +73,7 @@ class PrescreenAgent:
 
         # Get active stocks with calculated metrics
         async with self.db.acquire() as conn:
+            await ensure_indicator_state_table(conn)
             stocks = await conn.fetch("""
                 WITH latest_date AS (
                     SELECT MAX(date) as max_date FROM prime_ohlc_90d
@@ -84,10 +89,12 @@ class PrescreenAgent:
                         ROUND(avg_vol.avg_volume::numeric, 0) as avg_volume_30d,
                         -- Volume ratio (today vs 30d avg)
                         ROUND((p.volume / NULLIF(avg_vol.avg_volume, 0))::numeric, 2) as volume_ratio,
-                        -- 30-day volatility (stdev of daily returns)
-                        ROUND(vol.volatility::numeric, 2) as volatility_30d
+                        -- 30-day volatility (stdev of daily returns) – O(1) from indicator_state
+                        ROUND(COALESCE(ist.volatility_30d, vol.volatility)::numeric, 2) as volatility_30d
                     FROM prime_ohlc_90d p
                     CROSS JOIN latest_date ld
+                    LEFT JOIN indicator_state ist
+                        ON ist.symbol = p.symbol AND ist.last_date = p.date
                     -- 30-day ago price
                     LEFT JOIN LATERAL (
                         SELECT close_price
@@ -101,11 +108,12 @@ class PrescreenAgent:
                         FROM prime_ohlc_90d
                         WHERE symbol = p.symbol AND date > ld.max_date - INTERVAL '30 days'
                     ) avg_vol ON true
-                    -- 30-day volatility
+                    -- 30-day volatility (fallback when state is missing or stale)
                     LEFT JOIN LATERAL (
                         SELECT STDDEV((close_price - open_price) / NULLIF(open_price, 0) * 100) as volatility
                         FROM prime_ohlc_90d
-                        WHERE symbol = p.symbol AND date > ld.max_date - INTERVAL '30 days'
+                        WHERE ist.volatility_30d IS NULL
+                          AND symbol = p.symbol AND date > ld.max_date - INTERVAL '30 days'
                     ) vol ON true
                     WHERE p.date = ld.max_date
                 )
@@ -213,33 +221,29 @@ class PrescreenAgent:
         bearish_picks = []
         summary = ""
 
-        try:
-            async with httpx.AsyncClient(timeout=180.0) as client:
-                resp = await client.post(
-                    "https://api.fireworks.ai/inference/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {settings.FIREWORKS_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.0,
-                        "max_tokens": 8192
-                    }
-                )
-                resp.raise_for_status()
-                content = resp.json()["choices"][0]["message"]["content"]
+        # Canonicalized stock table → identical screens on reruns come from cache
+        cache = CacheKey("prescreen", template_hash(PRESCREEN_PROMPT),
+                         fingerprint(sorted(stock_data, key=lambda s: s["symbol"])))
 
-            logger.info(f"Fireworks response received ({len(content)} chars)")
-
-            # Parse JSON response - handle markdown code blocks
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-
-            result = json.loads(content.strip())
+        response = None
+        try:
+            response = await chat_completion(
+                "fireworks", self.model,
+                [{"role": "user", "content": prompt}],
+                temperature=0.0,
+                max_tokens=8192,
+                timeout=180.0,
+                cache=cache,
+                stream=True,
+                accept=has_keys("bullish", "bearish"),
+            )
+            logger.info(f"Fireworks response received ({len(response.content)} chars, "
+                        f"first token {response.first_token_ms or 0:.0f}ms, total {response.latency_ms:.0f}ms)")
+
+            # Streamed + parsed incrementally (markdown fences / prose skipped)
+            result = response.parsed
+            if not isinstance(result, dict):
+                raise ValueError(f"No JSON object in response: {response.content[:200]}")
             bullish_picks = result.get("bullish", [])[:50]  # Cap bullish at 50
             bearish_picks = result.get("bearish", [])[:25]  # Cap bearish at 25
             summary = result.get("summary", "")
@@ -253,6 +257,8 @@ class PrescreenAgent:
 
         except Exception as e:
             logger.error(f"Fireworks API error: {e}")
+            if response is not None:
+                await response.discard_cache()
             # Fallback: select top stocks by volume ratio
             sorted_stocks = sorted(stock_data, key=lambda x: x["volume_ratio"], reverse=True)
             for s in sorted_stocks[:75]:
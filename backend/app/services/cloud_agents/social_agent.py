@@ -1,141 +1,289 @@
 # backend/app/services/cloud_agents/social_agent.py
 """
 Social Context Agent – Grok-4 (Phase 4)
-75 parallel calls → social_score (-7 to +7) + headlines + events + Polymarket
+SOCIAL_BATCH_SIZE symbols per Grok call, keyed JSON answer (pooled + throttled by llm_gateway)
+→ social_score (-7 to +7) + headlines + events + Polymarket
 Includes: bullish_ratio, mention_velocity, engagement_weight, platform_consensus, contrarian_flag
+Score adjustments (velocity, consensus, contrarian flip) applied server-side per symbol (adjust_social)
+Fresh reads from social_results are reused – only stale/new symbols go to Grok (social_store)
+Grok circuit breaker open → last stored read (≤ SOCIAL_DEGRADED_MAX_HOURS) else neutral, no waiting
 Pure async. No classes. No legacy.
 """
 
 import asyncio
 import json
 import logging
-import os
-from datetime import date  # noqa: F401 - used for type hints
+from datetime import date
 from pathlib import Path
 from typing import List, Dict, Any
 
-import httpx
+from app.core.config import settings
 from app.core.database import get_asyncpg_pool
+from app.services.cloud_agents.json_stream import has_keys
+from app.services.cloud_agents.llm_gateway import chat_completion
+from app.services.llm_breaker import CircuitOpenError, is_circuit_open
+from app.services.llm_cache import CacheKey, fingerprint, template_hash
+from app.services.social_store import (
+    ensure_social_results_table, load_fresh_social, load_last_social, save_social_results,
+)
 
 logger = logging.getLogger(__name__)
 
 # Grok API — locked in
-GROK_API_KEY = os.getenv("GROK_API_KEY")
-GROK_URL = "https://api.x.ai/v1/chat/completions"
+PROVIDER = "xai"
 MODEL = "grok-4-fast-reasoning"
 
 # Hot-reloaded prompt
 PROMPT = (Path(__file__).parent.parent / "prompts" / "social_prompt.txt").read_text(encoding="utf-8").strip()
 
+BATCH_INSTRUCTIONS = """BATCH MODE: analyze each symbol ({symbols}) independently with the rules above.
+Return ONLY one JSON object keyed by ticker symbol, each value being the JSON object described above for that symbol:
+{{"AAPL": {{"social_score": 3, "bullish_ratio": 0.7, ...}}, "NVDA": {{...}}}}
+Include every symbol exactly once."""
+BATCH_TOKENS_PER_SYMBOL = 256
 
-async def run_social_analysis(symbols: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+
+async def run_social_analysis(symbols: List[Dict[str, Any]], force: bool = False) -> List[Dict[str, Any]]:
     """
     Input: List of symbol dicts from SHORT_LIST
     Output: List with social_score, headlines, events, polymarket_prob
+    (+ analyzed_at, and reused=True for reads taken from social_results)
+    force=True ignores freshness and re-analyzes every symbol.
     """
-    logger.info(f"Social agent: analyzing {len(symbols)} symbols via Grok-4")
+    tickers = [s["symbol"] for s in symbols]
+    db = await get_asyncpg_pool()
+
+    reused: Dict[str, Dict[str, Any]] = {}
+    if not force:
+        try:
+            async with db.acquire() as conn:
+                await ensure_social_results_table(conn)
+                reused = await load_fresh_social(conn, tickers)
+        except Exception as e:
+            logger.warning(f"Social store read failed, analyzing all symbols: {e}")
+    stale = [t for t in tickers if t not in reused]
+
+    batch_size = max(1, settings.SOCIAL_BATCH_SIZE)
+    logger.info(f"Social agent: {len(tickers)} symbols – {len(reused)} fresh reused, "
+                f"{len(stale)} via Grok-4 (batch size {batch_size})")
+
+    results: Dict[str, Any] = {}
+    if stale and batch_size > 1:
+        results = await _analyze_batched(stale, batch_size)
+    elif stale:
+        singles = await asyncio.gather(*(_analyze_one(t) for t in stale), return_exceptions=True)
+        results = dict(zip(stale, singles))
 
-    async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=100)) as client:
-        tasks = [_analyze_one(client, symbol["symbol"]) for symbol in symbols]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Degraded mode: Grok short-circuited → an older stored read beats a neutral score
+    failed = [t for t in stale if isinstance(results.get(t), Exception) or results.get(t) is None]
+    degraded: Dict[str, Dict[str, Any]] = {}
+    if failed and await is_circuit_open(PROVIDER, MODEL):
+        if settings.SOCIAL_DEGRADED_MAX_HOURS > 0:
+            try:
+                async with db.acquire() as conn:
+                    degraded = await load_last_social(conn, failed, settings.SOCIAL_DEGRADED_MAX_HOURS)
+            except Exception as e:
+                logger.warning(f"Social store read failed in degraded mode: {e}")
+        logger.warning(f"Social degraded (circuit open): {len(failed)} symbols – "
+                       f"{len(degraded)} from older reads, {len(failed) - len(degraded)} neutral")
 
     # Process results
     processed = []
-    for symbol, result in zip([s["symbol"] for s in symbols], results):
-        if isinstance(result, Exception):
-            logger.error(f"Social analysis failed for {symbol}: {result}")
-            processed.append({
-                "symbol": symbol,
-                "social_score": 0,
-                "bullish_ratio": 0.5,
-                "headlines": [],
-                "events": [],
-                "polymarket_prob": None,
-                "mention_velocity": 1.0,
-                "engagement_weight": 1.0,
-                "platform_consensus": 0.0,
-                "contrarian_flag": False,
-            })
+    new_reads = []
+    for symbol in tickers:
+        if symbol in reused:
+            processed.append({**reused[symbol], "reused": True})
+            continue
+        if symbol in degraded:
+            processed.append({**degraded[symbol], "reused": True, "degraded": True})
+            continue
+        result = results.get(symbol)
+        if isinstance(result, CircuitOpenError):
+            processed.append({**neutral_social(symbol), "degraded": True})
+        elif isinstance(result, Exception) or result is None:
+            logger.error(f"Social analysis failed for {symbol}: {result or 'missing from batch'}")
+            processed.append(neutral_social(symbol))
         else:
-            processed.append({"symbol": symbol, **result})
+            read = {"symbol": symbol, **result}
+            new_reads.append(read)
+            processed.append(read)
+
+    # Keep the new reads for the next shortlist (failures are not stored → retried)
+    if new_reads:
+        try:
+            async with db.acquire() as conn:
+                await ensure_social_results_table(conn)
+                analyzed_at = await save_social_results(conn, new_reads)
+            for read in new_reads:
+                read["analyzed_at"] = analyzed_at
+        except Exception as e:
+            logger.error(f"Failed to save social results: {e}")
 
     # Store in DB
     await _store_social_results(processed)
 
-    logger.info(f"Social analysis complete: {len(processed)} symbols")
+    logger.info(f"Social analysis complete: {len(processed)} symbols ({len(reused)} reused, {len(new_reads)} refreshed)")
     return processed
 
 
-async def _analyze_one(client: httpx.AsyncClient, symbol: str) -> Dict[str, Any]:
-    payload = {
-        "model": MODEL,
-        "messages": [
-            {"role": "user", "content": PROMPT.replace("{SYMBOL}", symbol)}
-        ],
-        "temperature": 0.0,
-        "max_tokens": 256,
+def neutral_social(symbol: str) -> Dict[str, Any]:
+    """Result used when Grok gave nothing usable for a symbol"""
+    return {
+        "symbol": symbol,
+        "social_score": 0,
+        "bullish_ratio": 0.5,
+        "headlines": [],
+        "events": [],
+        "polymarket_prob": None,
+        "mention_velocity": 1.0,
+        "engagement_weight": 1.0,
+        "platform_consensus": 0.0,
+        "contrarian_flag": False,
+    }
+
+
+def adjust_social(symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Grok's raw object → stored social result. Same rules for single and
+    batched answers; raises (TypeError/ValueError) on a malformed object.
+    """
+    # ═══════════════════════════════════════════════════════════════════
+    # v9 DYNAMIC SCORE ADJUSTMENTS (server-side enforcement)
+    # Grok returns base score; we apply velocity scaling + contrarian flip
+    # ═══════════════════════════════════════════════════════════════════
+
+    # Extract raw base score from Grok
+    base_score = int(data.get("social_score", 0))  # -5 to +5 (or already adjusted)
+
+    # Extract dynamic factors
+    velocity = float(data.get("mention_velocity", 1.0))
+    consensus = float(data.get("platform_consensus", 0.5))
+
+    # Scale: base * velocity if >1.5; divide by 1.2 if consensus <0.6
+    adjusted_score = float(base_score)
+    if velocity > 1.5:
+        adjusted_score *= velocity
+    if consensus < 0.6:
+        adjusted_score /= 1.2
+
+    # Cap to -7 to +7 range
+    adjusted_score = max(-7.0, min(7.0, adjusted_score))
+
+    # Contrarian flip: if |base| ≥4 and velocity >3x, flip sign by 20%
+    # This catches overhyped stocks that may reverse
+    contrarian = False
+    if abs(base_score) >= 4 and velocity > 3.0:
+        adjusted_score *= 0.8 * (-1 if base_score > 0 else 1)  # Flip direction, reduce 20%
+        contrarian = True
+        logger.info(f"🔄 {symbol}: Contrarian flip triggered (base={base_score}, velocity={velocity}x)")
+
+    return {
+        "social_score": int(round(adjusted_score)),  # No decimals per prompt
+        "bullish_ratio": float(data.get("bullish_ratio", 0.5)),
+        "headlines": data.get("headlines", [])[:3],
+        "events": data.get("events", []),
+        "polymarket_prob": data.get("polymarket_prob"),
+        "mention_velocity": velocity,
+        "engagement_weight": float(data.get("engagement_weight", 1.0)),
+        "platform_consensus": consensus,
+        "contrarian_flag": contrarian or bool(data.get("contrarian_flag", False)),
     }
 
+
+async def _analyze_one(symbol: str) -> Dict[str, Any]:
+    messages = [
+        {"role": "user", "content": PROMPT.replace("{SYMBOL}", symbol)}
+    ]
+
+    # One social read per symbol per day – reruns reuse it
+    cache = CacheKey("social", template_hash(PROMPT), fingerprint({"symbol": symbol, "date": date.today().isoformat()}))
+
+    response = None
     try:
-        resp = await client.post(
-            GROK_URL,
-            json=payload,
-            headers={"Authorization": f"Bearer {GROK_API_KEY}"},
-        )
-        resp.raise_for_status()
-        content = resp.json()["choices"][0]["message"]["content"]
-
-        # Strict JSON parse
-        start = content.find("{")
-        end = content.rfind("}") + 1
-        data = json.loads(content[start:end])
-
-        # ═══════════════════════════════════════════════════════════════════
-        # v9 DYNAMIC SCORE ADJUSTMENTS (server-side enforcement)
-        # Grok returns base score; we apply velocity scaling + contrarian flip
-        # ═══════════════════════════════════════════════════════════════════
-
-        # Extract raw base score from Grok
-        base_score = int(data.get("social_score", 0))  # -5 to +5 (or already adjusted)
-
-        # Extract dynamic factors
-        velocity = float(data.get("mention_velocity", 1.0))
-        consensus = float(data.get("platform_consensus", 0.5))
-
-        # Scale: base * velocity if >1.5; divide by 1.2 if consensus <0.6
-        adjusted_score = float(base_score)
-        if velocity > 1.5:
-            adjusted_score *= velocity
-        if consensus < 0.6:
-            adjusted_score /= 1.2
-
-        # Cap to -7 to +7 range
-        adjusted_score = max(-7.0, min(7.0, adjusted_score))
-
-        # Contrarian flip: if |base| ≥4 and velocity >3x, flip sign by 20%
-        # This catches overhyped stocks that may reverse
-        contrarian = False
-        if abs(base_score) >= 4 and velocity > 3.0:
-            adjusted_score *= 0.8 * (-1 if base_score > 0 else 1)  # Flip direction, reduce 20%
-            contrarian = True
-            logger.info(f"🔄 {symbol}: Contrarian flip triggered (base={base_score}, velocity={velocity}x)")
-
-        return {
-            "social_score": int(round(adjusted_score)),  # No decimals per prompt
-            "bullish_ratio": float(data.get("bullish_ratio", 0.5)),
-            "headlines": data.get("headlines", [])[:3],
-            "events": data.get("events", []),
-            "polymarket_prob": data.get("polymarket_prob"),
-            "mention_velocity": velocity,
-            "engagement_weight": float(data.get("engagement_weight", 1.0)),
-            "platform_consensus": consensus,
-            "contrarian_flag": contrarian or bool(data.get("contrarian_flag", False)),
-        }
+        response = await chat_completion(PROVIDER, MODEL, messages, temperature=0.0, max_tokens=256,
+                                         timeout=30.0, cache=cache, accept=has_keys("social_score"))
+        data = response.parsed
+        if not isinstance(data, dict):
+            raise ValueError(f"No JSON object in response: {response.content[:200]}")
+        return adjust_social(symbol, data)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Grok failed for {symbol}: {e}")
+        if response is not None:
+            await response.discard_cache()
         raise
 
 
+# =============================================================================
+# BATCHED MODE
+# =============================================================================
+
+async def _analyze_batched(tickers: List[str], batch_size: int) -> Dict[str, Any]:
+    """
+    SOCIAL_BATCH_SIZE symbols per request, at most SOCIAL_BATCH_CONCURRENCY
+    batches in flight. Symbols missing/malformed in a batch answer go to
+    single requests when SOCIAL_BATCH_FALLBACK is on (else neutral).
+    """
+    sem = asyncio.Semaphore(max(1, settings.SOCIAL_BATCH_CONCURRENCY))
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+    async def run(batch: List[str]) -> Dict[str, Any]:
+        async with sem:
+            try:
+                results = await _analyze_batch(batch)
+            except CircuitOpenError as e:
+                return {t: e for t in batch}       # Singles would short-circuit too
+            except Exception as e:
+                logger.warning(f"Grok batch of {len(batch)} failed: {e}")
+                results = {}
+        missing = [t for t in batch if t not in results]
+        if missing and settings.SOCIAL_BATCH_FALLBACK:
+            if results:
+                logger.info(f"Social batch: {len(missing)}/{len(batch)} missing or invalid → single requests")
+            singles = await asyncio.gather(*(_analyze_one(t) for t in missing), return_exceptions=True)
+            results.update(zip(missing, singles))
+        return results
+
+    merged: Dict[str, Any] = {}
+    for results in await asyncio.gather(*(run(b) for b in batches)):
+        merged.update(results)
+    logger.info(f"Social batched: {len(batches)} batch requests for {len(tickers)} symbols")
+    return merged
+
+
+async def _analyze_batch(batch: List[str]) -> Dict[str, Dict[str, Any]]:
+    """One request for several symbols → {symbol: adjusted result} for the valid entries"""
+    prompt = PROMPT.replace("{SYMBOL}", "each of these symbols: " + ", ".join(batch))
+    prompt += "\n\n" + BATCH_INSTRUCTIONS.format(symbols=", ".join(batch))
+    cache = CacheKey("social", template_hash(PROMPT + BATCH_INSTRUCTIONS),
+                     fingerprint({"symbols": batch, "date": date.today().isoformat()}))
+
+    response = await chat_completion(
+        PROVIDER, MODEL, [{"role": "user", "content": prompt}],
+        temperature=0.0,
+        max_tokens=BATCH_TOKENS_PER_SYMBOL * len(batch),
+        timeout=30.0 + 5.0 * len(batch),
+        cache=cache,
+        accept=has_keys(*batch),
+    )
+
+    data = response.parsed if isinstance(response.parsed, dict) else {}
+    by_upper = {str(k).strip().upper().lstrip("$"): v for k, v in data.items()}
+    results: Dict[str, Dict[str, Any]] = {}
+    for symbol in batch:
+        entry = by_upper.get(symbol.upper())
+        if not isinstance(entry, dict) or "social_score" not in entry:
+            continue
+        try:
+            results[symbol] = adjust_social(symbol, entry)
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.warning(f"Grok batch entry for {symbol} malformed: {e}")
+    if not results:
+        await response.discard_cache()
+    return results
+
+
 async def _store_social_results(results: List[Dict[str, Any]]):
     """Store social data in shortlist_candidates table"""
     try:
@@ -161,6 +309,7 @@ async def _store_social_results(results: List[Dict[str, Any]]):
                     "engagement_weight": r.get("engagement_weight", 1.0),
                     "platform_consensus": r.get("platform_consensus", 0.0),
                     "contrarian_flag": r.get("contrarian_flag", False),
+                    "analyzed_at": r.get("analyzed_at"),
                 }
 
                 result = await conn.execute("""
@@ -1,25 +1,49 @@
 # backend/app/services/cloud_agents/vision_agent.py
 """
 Vision Agent – Fireworks.ai Qwen3-VL-30B-A3B (Phase 3)
-Fetches chart images from Firebase Storage → sends to Fireworks Vision API
+Reads chart PNGs from the local chart spool (handoff from chart generation),
+falling back to Firebase Storage → sends to Fireworks Vision API (llm_gateway)
 Returns 6 boolean pattern flags per chart
+
+Batched mode (VISION_BATCH_ENABLED): charts are packed K per request, each
+image preceded by a "Chart i: SYMBOL" label, and the model answers with a
+JSON array – the prompt text is sent once per batch instead of per chart.
+K adapts to image token cost, VISION_BATCH_MAX_IMAGES,
+VISION_CONTEXT_TOKENS and VISION_BATCH_MAX_OUTPUT_TOKENS – every chart in a
+batch gets the single-chart output budget. A batch cut off at max_tokens
+(finish_reason "length") retries its missing charts as two half-size
+batches; other missing or invalid symbols are retried as single-chart
+requests.
+
+Responses are streamed: the flags object is picked out after the model's
+<think> preamble and the stream closed right away; each symbol's flags are
+written to shortlist_candidates as soon as they arrive, not after the batch.
+With the Fireworks circuit breaker open, charts get DEFAULT_FLAGS at once.
 """
 
 import asyncio
 import base64
 import json
 import logging
+import math
+import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 import httpx
 from app.core.config import settings
 from app.core.database import get_asyncpg_pool
+from app.services.chart_spool import read_spooled_chart
+from app.services.image_encoding import image_size, sniff_mime
+from app.services.cloud_agents.json_stream import array_of, has_keys
+from app.services.cloud_agents.llm_gateway import LLMResponse, chat_completion
+from app.services.llm_breaker import CircuitOpenError
+from app.services.llm_cache import CacheKey, fingerprint, template_hash
 
 logger = logging.getLogger(__name__)
 
 # Fireworks Vision API (Qwen3-VL-30B-A3B Thinking)
-FIREWORKS_URL = "https://api.fireworks.ai/inference/v1/chat/completions"
+PROVIDER = "fireworks"
 MODEL = "accounts/fireworks/models/qwen3-vl-30b-a3b-thinking"
 
 # Hot-reloaded prompt
@@ -37,11 +61,25 @@ DEFAULT_FLAGS = {
     "dominant_pattern": "none",
     "trend_direction": "neutral",
 }
+FLAG_KEYS = tuple(DEFAULT_FLAGS)
+
+# Batched mode: K labelled charts per request, answered as a JSON array
+BATCH_INSTRUCTIONS = """BATCH MODE: you are given {n} charts, each preceded by a label "Chart i: SYMBOL" ({symbols}).
+Analyze each chart independently. Return ONLY a JSON array with one object per chart, in the same order,
+each object containing "symbol" plus all fields of the response format above:
+[{{"symbol": "AAPL", "volume_shelf_breakout": false, ...}}, ...]"""
+VL_PATCH_PX = 28                 # Qwen-VL: 14px patches merged 2×2 → 1 token per 28×28
+DEFAULT_IMAGE_SIZE = (500, 400)     # generate_charts vision figure (5×4 in @ 100 dpi)
+LABEL_TOKENS = 12
+SINGLE_MAX_TOKENS = 2048         # Thinking model: reasoning + JSON object for one chart
 
 
 async def run_vision_analysis(charts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Input: List of dicts with 'symbol' and 'chart_url' (Firebase Storage URL)
+    Input: List of dicts with 'symbol' and any of
+        'png_bytes' (in-process handoff), 'chart_fingerprint' (local spool),
+        'chart_vision_url' / 'chart_url' (Firebase Storage – downloaded only
+        as a fallback)
     Output: List with 'symbol' and 'vision_flags' (6 booleans)
     """
     logger.info(f"Vision agent: analyzing {len(charts)} charts via Fireworks Qwen3-VL-30B-A3B")
@@ -49,132 +87,289 @@ async def run_vision_analysis(charts: List[Dict[str, Any]]) -> List[Dict[str, An
     # Reload prompt each run (hot-reload)
     prompt = PROMPT_PATH.read_text(encoding="utf-8").strip()
 
-    async with httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_connections=20)) as client:
-        tasks = [_analyze_one(client, item, prompt) for item in charts]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    # Process results
-    processed = []
-    for item, result in zip(charts, results):
-        symbol = item["symbol"]
-        if isinstance(result, Exception):
-            logger.error(f"Vision analysis failed for {symbol}: {result}")
-            processed.append({"symbol": symbol, "vision_flags": DEFAULT_FLAGS.copy()})
+    db = await get_asyncpg_pool()
+    shortlist_date = await _latest_shortlist_date(db)
+    started = time.perf_counter()
+    first_stored_s = None
+    requests = 0
+    prompt_tokens = 0
+    degraded = 0
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async def store(result: Dict[str, Any]):
+        nonlocal first_stored_s
+        results[result["symbol"]] = result
+        if await _store_vision_result(db, shortlist_date, result) and first_stored_s is None:
+            first_stored_s = time.perf_counter() - started
+
+    async def analyze_single(symbol: str, chart_bytes: bytes):
+        nonlocal requests, prompt_tokens, degraded
+        try:
+            result, response = await _analyze_one(symbol, chart_bytes, prompt)
+            requests += int(not response.cached)
+            prompt_tokens += response.prompt_tokens
+        except CircuitOpenError:
+            degraded += 1
+            result = {"symbol": symbol, "vision_flags": DEFAULT_FLAGS.copy()}
+        except Exception as e:
+            logger.error(f"Vision analysis failed for {symbol}: {e}")
+            result = {"symbol": symbol, "vision_flags": DEFAULT_FLAGS.copy()}
+        await store(result)
+
+    async def analyze_batch(batch: List[Tuple[str, bytes]]):
+        nonlocal requests, prompt_tokens, degraded
+        batch_results: Dict[str, Dict[str, Any]] = {}
+        response = None
+        try:
+            batch_results, response = await _analyze_batch(batch, prompt)
+            requests += int(not response.cached)
+            prompt_tokens += response.prompt_tokens
+        except CircuitOpenError:
+            # Provider is down – default flags without a single-chart retry each
+            degraded += len(batch)
+            for symbol, _ in batch:
+                await store({"symbol": symbol, "vision_flags": DEFAULT_FLAGS.copy()})
+            return
+        except Exception as e:
+            logger.warning(f"Vision batch of {len(batch)} failed, falling back to single charts: {e}")
+        for result in batch_results.values():
+            await store(result)
+        missing = [(sym, data) for sym, data in batch if sym not in batch_results]
+        if len(missing) > 1 and response is not None and response.finish_reason == "length":
+            # Out of output tokens – halve K rather than paying for every chart singly
+            half = (len(missing) + 1) // 2
+            logger.info(f"Vision batch of {len(batch)} truncated → {len(missing)} charts as batches of ≤{half}")
+            await asyncio.gather(*(
+                analyze_batch(part) if len(part) > 1 else analyze_single(*part[0])
+                for part in (missing[:half], missing[half:])
+            ))
+            return
+        if missing and batch_results:
+            logger.info(f"Vision batch: {len(missing)}/{len(batch)} missing or invalid → single requests")
+        await asyncio.gather(*(analyze_single(sym, data) for sym, data in missing))
+
+    # Chart bytes first (spool / in-memory / download) – unreadable charts get default flags
+    loaded = await asyncio.gather(*(_load_chart_png(item) for item in charts), return_exceptions=True)
+    ready: List[Tuple[str, bytes]] = []
+    for item, chart_bytes in zip(charts, loaded):
+        if isinstance(chart_bytes, Exception):
+            logger.error(f"Vision analysis failed for {item['symbol']}: {chart_bytes}")
+            await store({"symbol": item["symbol"], "vision_flags": DEFAULT_FLAGS.copy()})
         else:
-            processed.append(result)
+            ready.append((item["symbol"], chart_bytes))
 
-    # Store in DB
-    await _store_vision_results(processed)
+    # Concurrency / retries are enforced per provider by the gateway
+    batches = pack_batches(ready, prompt) if settings.VISION_BATCH_ENABLED else [[c] for c in ready]
+    await asyncio.gather(*(
+        analyze_batch(batch) if len(batch) > 1 else analyze_single(*batch[0])
+        for batch in batches
+    ))
 
+    processed = [results.get(item["symbol"]) or {"symbol": item["symbol"], "vision_flags": DEFAULT_FLAGS.copy()}
+                 for item in charts]
     success_count = sum(1 for p in processed if p["vision_flags"] != DEFAULT_FLAGS)
-    logger.info(f"Vision analysis complete: {success_count}/{len(processed)} analyzed successfully")
+    if degraded:
+        logger.warning(f"Vision degraded: {degraded} charts got default flags (circuit open for {PROVIDER}/{MODEL})")
+    logger.info(f"Vision analysis complete: {success_count}/{len(processed)} analyzed successfully "
+                f"({requests} requests, {len(batches)} batches, {prompt_tokens} prompt tokens; "
+                f"first stored {first_stored_s or 0:.1f}s, total {time.perf_counter() - started:.1f}s, "
+                f"date: {shortlist_date})")
     return processed
 
 
-async def _analyze_one(client: httpx.AsyncClient, item: Dict[str, Any], prompt: str) -> Dict[str, Any]:
-    symbol = item["symbol"]
-    chart_url = item["chart_url"]
+# =============================================================================
+# BATCHING
+# =============================================================================
 
-    # Download chart image from Firebase Storage
-    try:
-        img_resp = await client.get(chart_url)
-        img_resp.raise_for_status()
-        base64_png = base64.b64encode(img_resp.content).decode("utf-8")
-    except Exception as e:
-        logger.error(f"Failed to download chart for {symbol}: {e}")
-        raise
+def image_tokens(chart_bytes: bytes) -> int:
+    """Qwen-VL visual tokens: one per 28×28 patch (fallback: assume a full-size chart)"""
+    size = image_size(chart_bytes) or DEFAULT_IMAGE_SIZE
+    return math.ceil(size[0] / VL_PATCH_PX) * math.ceil(size[1] / VL_PATCH_PX) + 2
 
-    # Send to Fireworks Vision API (Qwen3-VL-30B-A3B)
-    payload = {
-        "model": MODEL,
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": f"Stock: {symbol}\n\n{prompt}"},
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{base64_png}"}
-                    }
-                ]
-            }
-        ],
-        "temperature": 0.0,
-        "max_tokens": 2048,  # Thinking model needs more tokens for reasoning + JSON output
+
+def _text_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _batch_max_tokens(k: int) -> int:
+    """Same output budget per chart as a single-chart call"""
+    return SINGLE_MAX_TOKENS * k
+
+
+def pack_batches(charts: List[Tuple[str, bytes]], prompt: str) -> List[List[Tuple[str, bytes]]]:
+    """
+    Greedy K per request: add charts while the batch stays within
+    VISION_BATCH_MAX_IMAGES, VISION_BATCH_MAX_OUTPUT_TOKENS and the context
+    budget (prompt + image tokens + labels + the output the thinking model
+    needs for K answers).
+    Small (budgeted) chart images → bigger batches.
+    """
+    max_images = max(1, min(settings.VISION_BATCH_MAX_IMAGES,
+                            settings.VISION_BATCH_MAX_OUTPUT_TOKENS // SINGLE_MAX_TOKENS))
+    budget = settings.VISION_CONTEXT_TOKENS - _text_tokens(prompt) - _text_tokens(BATCH_INSTRUCTIONS)
+
+    batches: List[List[Tuple[str, bytes]]] = []
+    current: List[Tuple[str, bytes]] = []
+    used = 0
+    for symbol, chart_bytes in charts:
+        cost = image_tokens(chart_bytes) + LABEL_TOKENS
+        fits = used + cost + _batch_max_tokens(len(current) + 1) <= budget
+        if current and (len(current) >= max_images or not fits):
+            batches.append(current)
+            current, used = [], 0
+        current.append((symbol, chart_bytes))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _image_part(chart_bytes: bytes) -> Dict[str, Any]:
+    # Spooled charts are the budgeted vision encoding (palette PNG or WebP)
+    base64_img = base64.b64encode(chart_bytes).decode("utf-8")
+    return {"type": "image_url", "image_url": {"url": f"data:{sniff_mime(chart_bytes)};base64,{base64_img}"}}
+
+
+def _flags(raw: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "volume_shelf_breakout": bool(raw.get("volume_shelf_breakout", False)),
+        "wyckoff_phase_2": bool(raw.get("wyckoff_phase_2", False)),
+        "spring_setup": bool(raw.get("spring_setup", False)),
+        "higher_high_higher_low": bool(raw.get("higher_high_higher_low", False)),
+        "vcp_tightness": bool(raw.get("vcp_tightness", False)),
+        "parabolic_curve": bool(raw.get("parabolic_curve", False)),
+        "stop_hunt_liquidity_grab": bool(raw.get("stop_hunt_liquidity_grab", False)),
+        "dominant_pattern": str(raw.get("dominant_pattern", "none")),
+        "trend_direction": str(raw.get("trend_direction", "neutral")),
     }
 
+
+async def _analyze_batch(batch: List[Tuple[str, bytes]], prompt: str) -> Tuple[Dict[str, Dict[str, Any]], LLMResponse]:
+    """
+    K labelled charts in one request → JSON array of flag objects.
+    Returns only the symbols with a valid object; the caller retries the rest singly.
+    """
+    symbols = [symbol for symbol, _ in batch]
+    content: List[Dict[str, Any]] = [
+        {"type": "text", "text": f"{prompt}\n\n{BATCH_INSTRUCTIONS.format(n=len(batch), symbols=', '.join(symbols))}"}
+    ]
+    for i, (symbol, chart_bytes) in enumerate(batch, 1):
+        content.append({"type": "text", "text": f"Chart {i}: {symbol}"})
+        content.append(_image_part(chart_bytes))
+
+    cache = CacheKey("vision", template_hash(prompt + BATCH_INSTRUCTIONS),
+                     fingerprint([[symbol, fingerprint(chart_bytes)] for symbol, chart_bytes in batch]))
+    response = await chat_completion(
+        PROVIDER, MODEL, [{"role": "user", "content": content}],
+        temperature=0.0,
+        max_tokens=_batch_max_tokens(len(batch)),
+        timeout=60.0 + 15.0 * len(batch),
+        cache=cache,
+        stream=True,
+        accept=array_of(has_keys("symbol")),
+    )
+
+    items = response.parsed if isinstance(response.parsed, list) else []
+    wanted = {symbol.upper(): symbol for symbol in symbols}
+    results: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        if not isinstance(item, dict) or not any(k in item for k in FLAG_KEYS):
+            continue
+        symbol = wanted.get(str(item.get("symbol", "")).strip().upper())
+        if symbol and symbol not in results:
+            results[symbol] = {"symbol": symbol, "vision_flags": _flags(item)}
+    if not results or response.finish_reason == "length":
+        await response.discard_cache()
+    return results, response
+
+
+async def _analyze_one(symbol: str, chart_bytes: bytes, prompt: str) -> Tuple[Dict[str, Any], LLMResponse]:
+    # Send to Fireworks Vision API (Qwen3-VL-30B-A3B)
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": f"Stock: {symbol}\n\n{prompt}"},
+                _image_part(chart_bytes),
+            ]
+        }
+    ]
+
+    # Same chart bytes + same prompt → same answer: cached across same-day reruns
+    cache = CacheKey("vision", template_hash(prompt), fingerprint({"symbol": symbol, "chart": fingerprint(chart_bytes)}))
+
+    response = None
     try:
-        resp = await client.post(
-            FIREWORKS_URL,
-            json=payload,
-            headers={
-                "Authorization": f"Bearer {settings.FIREWORKS_API_KEY}",
-                "Content-Type": "application/json"
-            },
+        response = await chat_completion(
+            PROVIDER, MODEL, messages,
+            temperature=0.0,
+            max_tokens=SINGLE_MAX_TOKENS,  # Thinking model needs more tokens for reasoning + JSON output
+            timeout=60.0,
+            cache=cache,
+            stream=True,
+            accept=has_keys(*FLAG_KEYS),   # Ignores example objects inside <think>
         )
-        resp.raise_for_status()
-        content = resp.json()["choices"][0]["message"]["content"]
-
-        # Parse JSON from response - for thinking models, look after </think> tag
-        json_content = content
-        if "</think>" in content:
-            json_content = content.split("</think>")[-1].strip()
-
-        # Strip markdown code blocks (```json ... ```)
-        import re
-        json_content = re.sub(r"^```json\s*|```$", "", json_content, flags=re.MULTILINE).strip()
-
-        # Find the last JSON object (most reliable for thinking models)
-        start = json_content.rfind("{")
-        end = json_content.rfind("}") + 1
-        if start == -1 or end == 0:
-            raise ValueError(f"No JSON found in response: {content[:200]}")
-
-        flags = json.loads(json_content[start:end])
-
-        return {
-            "symbol": symbol,
-            "vision_flags": {
-                "volume_shelf_breakout": bool(flags.get("volume_shelf_breakout", False)),
-                "wyckoff_phase_2": bool(flags.get("wyckoff_phase_2", False)),
-                "spring_setup": bool(flags.get("spring_setup", False)),
-                "higher_high_higher_low": bool(flags.get("higher_high_higher_low", False)),
-                "vcp_tightness": bool(flags.get("vcp_tightness", False)),
-                "parabolic_curve": bool(flags.get("parabolic_curve", False)),
-                "stop_hunt_liquidity_grab": bool(flags.get("stop_hunt_liquidity_grab", False)),
-                "dominant_pattern": str(flags.get("dominant_pattern", "none")),
-                "trend_direction": str(flags.get("trend_direction", "neutral")),
-            }
-        }
+        flags = response.parsed
+        if not isinstance(flags, dict):
+            raise ValueError(f"No JSON found in response: {response.content[:200]}")
+        return {"symbol": symbol, "vision_flags": _flags(flags)}, response
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Fireworks Vision failed for {symbol}: {e}")
+        if response is not None:
+            await response.discard_cache()
         raise
 
 
-async def _store_vision_results(results: List[Dict[str, Any]]):
-    """Store vision flags in shortlist_candidates table"""
+async def _load_chart_png(item: Dict[str, Any]) -> bytes:
+    """
+    Image bytes: in-memory handoff → local spool → download the uploaded
+    vision variant (same bytes as the spool, so the same cache key) →
+    full-size chart_url for rows from before vision variants were uploaded
+    """
+    symbol = item["symbol"]
+    png_bytes = item.get("png_bytes") or read_spooled_chart(item.get("chart_fingerprint"))
+    if png_bytes:
+        return png_bytes
+
+    chart_url = item.get("chart_vision_url") or item.get("chart_url")
+    if not chart_url:
+        raise ValueError(f"No spooled chart or chart URL for {symbol}")
+
+    # Download chart image from Firebase Storage
     try:
-        db = await get_asyncpg_pool()
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            img_resp = await client.get(chart_url)
+            img_resp.raise_for_status()
+            return img_resp.content
+    except Exception as e:
+        logger.error(f"Failed to download chart for {symbol}: {e}")
+        raise
 
-        # Get latest shortlist date
-        async with db.acquire() as conn:
-            latest = await conn.fetchrow("SELECT MAX(date) as latest_date FROM shortlist_candidates")
 
-        if not latest or not latest['latest_date']:
-            logger.error("No shortlist found for storing vision results")
-            return
+async def _latest_shortlist_date(db):
+    async with db.acquire() as conn:
+        latest = await conn.fetchrow("SELECT MAX(date) as latest_date FROM shortlist_candidates")
+    if not latest or not latest['latest_date']:
+        logger.error("No shortlist found for storing vision results")
+        return None
+    return latest['latest_date']
 
-        shortlist_date = latest['latest_date']
 
+async def _store_vision_result(db, shortlist_date, result: Dict[str, Any]) -> bool:
+    """Store one symbol's vision flags in shortlist_candidates"""
+    if shortlist_date is None:
+        return False
+    try:
         async with db.acquire() as conn:
-            for r in results:
-                await conn.execute("""
-                    UPDATE shortlist_candidates
-                    SET vision_flags = $1,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE date = $2 AND symbol = $3
-                """, json.dumps(r["vision_flags"]), shortlist_date, r["symbol"])
-
-        logger.info(f"Vision results stored for {len(results)} symbols (date: {shortlist_date})")
+            await conn.execute("""
+                UPDATE shortlist_candidates
+                SET vision_flags = $1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE date = $2 AND symbol = $3
+            """, json.dumps(result["vision_flags"]), shortlist_date, result["symbol"])
+        return True
     except Exception as e:
-        logger.error(f"Failed to store vision results: {e}")
\ No newline at end of file
+        logger.error(f"Failed to store vision result for {result['symbol']}: {e}")
+        return False
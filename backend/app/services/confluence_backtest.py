@@ -0,0 +1,421 @@
+# backend/app/services/confluence_backtest.py
+"""
+Confluence Backtest Engine – BullsBears v6
+Replays compute_confluence_targets() at every historical bar for every
+symbol and walks the forward path to see what actually got hit.
+
+- Bars are packed once into a multiprocessing.shared_memory block
+  (open/high/low/close float64 + bar dates + per-symbol offsets) – workers
+  attach by name, nothing is pickled per task except a symbol index range
+- signal_from / signal_until restrict replay to a date range (walk-forward
+  splits); a signal counts before signal_until only if its whole forward
+  window closes before it, so in-sample paths never see held-out bars
+- ProcessPoolExecutor fans symbol chunks out across all cores
+- Each signal is resolved against the next `horizon` bars: stop checked
+  first on every bar (conservative, gaps through the stop fill at the
+  open), then primary/medium/moonshot targets
+- Signals whose stop or primary target is already on the wrong side of
+  entry can't be traded – they're counted as invalid, not as outcomes
+- Aggregated per (direction, confluence_score): hit rates, stop rate,
+  expectancy (% return per signal), avg bars to primary
+
+Historical headlines / earnings / short interest are not available, so
+only the technical methods (fib, pivot, gann, rsi) contribute to the score.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.fib_calculator import (
+    ConfluenceParams,
+    calculate_rsi,
+    compute_confluence_targets,
+    detect_swings,
+    load_confluence_params,
+)
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("bullish", "bearish")
+
+
+@dataclass
+class BacktestConfig:
+    lookback: int = 90            # Bars fed to the calculator (matches prime_ohlc_90d)
+    horizon: int = 30             # Forward bars to resolve target/stop (matches outcome monitor)
+    step: int = 1                 # Replay every Nth bar
+    min_bars: int = 20            # Calculator falls back to defaults below this
+    directions: Tuple[str, ...] = DIRECTIONS
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    chunk_symbols: int = 25       # Symbols per pool task
+    signal_from: Optional[str] = None     # ISO date – first signal bar (inclusive)
+    signal_until: Optional[str] = None    # ISO date – signal + forward window end before this
+
+
+@dataclass
+class BarData:
+    """Flat OHLC arrays for the whole universe (oldest first per symbol)"""
+    symbols: List[str]
+    offsets: np.ndarray           # int64, len(symbols) + 1
+    ohlc: np.ndarray              # float64, shape (total_bars, 4) = open, high, low, close
+    days: np.ndarray              # int64 days since epoch per bar (walk-forward splits)
+
+    @classmethod
+    def from_series(cls, series: Dict[str, Tuple[List, List, List[float], List[float], List[float]]]) -> "BarData":
+        """
+        series: symbol → (dates, opens, highs, lows, closes), dates as
+        date / ISO string; a missing open falls back to the prior close
+        """
+        symbols = sorted(series)
+        offsets = np.zeros(len(symbols) + 1, dtype=np.int64)
+        for i, sym in enumerate(symbols):
+            offsets[i + 1] = offsets[i] + len(series[sym][4])
+        ohlc = np.empty((int(offsets[-1]), 4), dtype=np.float64)
+        days = np.empty(int(offsets[-1]), dtype=np.int64)
+        for i, sym in enumerate(symbols):
+            dates, opens, highs, lows, closes = series[sym]
+            days[offsets[i]:offsets[i + 1]] = np.array(dates, dtype="datetime64[D]").astype(np.int64)
+            prev_closes = [closes[0]] + list(closes[:-1]) if closes else []
+            ohlc[offsets[i]:offsets[i + 1], 0] = [o if o else pc for o, pc in zip(opens, prev_closes)]
+            ohlc[offsets[i]:offsets[i + 1], 1] = highs
+            ohlc[offsets[i]:offsets[i + 1], 2] = lows
+            ohlc[offsets[i]:offsets[i + 1], 3] = closes
+        return cls(symbols=symbols, offsets=offsets, ohlc=ohlc, days=days)
+
+    def date_quantile(self, q: float) -> str:
+        """ISO date below which a fraction q of all bars fall (walk-forward split point)"""
+        day = int(np.quantile(self.days, q, method="lower")) if len(self.days) else 0
+        return str(np.datetime64(day, "D"))
+
+
+# =============================================================================
+# STATS
+# =============================================================================
+
+def _empty_bucket() -> Dict[str, float]:
+    return {
+        "signals": 0, "hit_primary": 0, "hit_medium": 0, "hit_moonshot": 0,
+        "stopped": 0, "expired": 0, "invalid": 0, "return_sum": 0.0, "bars_to_primary_sum": 0,
+    }
+
+
+def _merge(into: Dict, other: Dict):
+    for key, bucket in other.items():
+        target = into.setdefault(key, _empty_bucket())
+        for k, v in bucket.items():
+            target[k] += v
+
+
+def summarize(stats: Dict[Tuple[str, int], Dict]) -> List[Dict]:
+    """Flatten raw buckets into per-score rows with rates and expectancy (invalid signals excluded)"""
+    rows = []
+    for (direction, score), b in sorted(stats.items()):
+        n = b["signals"]
+        if not n:
+            continue
+        rows.append({
+            "direction": direction,
+            "confluence_score": score,
+            "signals": n,
+            "invalid_signals": b["invalid"],
+            "hit_rate_primary": round(b["hit_primary"] / n, 4),
+            "hit_rate_medium": round(b["hit_medium"] / n, 4),
+            "hit_rate_moonshot": round(b["hit_moonshot"] / n, 4),
+            "stop_rate": round(b["stopped"] / n, 4),
+            "expired_rate": round(b["expired"] / n, 4),
+            "expectancy_pct": round(b["return_sum"] / n, 3),
+            "avg_bars_to_primary": round(b["bars_to_primary_sum"] / b["hit_primary"], 1) if b["hit_primary"] else None,
+        })
+    return rows
+
+
+# =============================================================================
+# PATH EVALUATION
+# =============================================================================
+
+def evaluate_path(
+    direction: str,
+    entry: float,
+    stop: float,
+    targets: Tuple[float, Optional[float], Optional[float]],
+    fwd_opens: np.ndarray,
+    fwd_highs: np.ndarray,
+    fwd_lows: np.ndarray,
+    fwd_closes: np.ndarray,
+) -> Dict:
+    """
+    Walk forward bars. Stop is checked before targets on each bar (a bar
+    that spans both counts as stopped); a bar that opens through the stop
+    fills at the open. The trade exits at primary target, stop, or the last
+    close of the horizon; medium/moonshot are tracked as "touched before
+    stop" only. A stop or primary target on the wrong side of entry makes
+    the signal "invalid" (no trade, zero return).
+    """
+    primary, medium, moonshot = targets
+    bullish = direction == "bullish"
+    sign = 1 if bullish else -1
+    bars_to_primary, hit_medium, hit_moonshot = None, False, False
+    if sign * (entry - stop) <= 0 or sign * (primary - entry) <= 0:
+        return {"outcome": "invalid", "return_pct": 0.0, "bars_to_primary": None,
+                "hit_medium": False, "hit_moonshot": False}
+    exit_price = float(fwd_closes[-1]) if len(fwd_closes) else entry
+    outcome = "expired"
+
+    for i in range(len(fwd_closes)):
+        hi, lo = fwd_highs[i], fwd_lows[i]
+        if (lo <= stop) if bullish else (hi >= stop):
+            if bars_to_primary is None:
+                fill = min(fwd_opens[i], stop) if bullish else max(fwd_opens[i], stop)
+                outcome, exit_price = "stopped", float(fill)
+            break
+        extreme = hi if bullish else -lo
+        if medium is not None and extreme >= sign * medium:
+            hit_medium = True
+        if moonshot is not None and extreme >= sign * moonshot:
+            hit_moonshot = True
+        if bars_to_primary is None and extreme >= sign * primary:
+            bars_to_primary = i + 1
+            outcome, exit_price = "target", primary
+
+    ret = (exit_price - entry) / entry * 100
+    return {
+        "outcome": outcome,
+        "return_pct": ret if bullish else -ret,
+        "bars_to_primary": bars_to_primary,
+        "hit_medium": hit_medium,
+        "hit_moonshot": hit_moonshot,
+    }
+
+
+# =============================================================================
+# WORKER (runs inside pool processes)
+# =============================================================================
+
+_SHM: Optional[shared_memory.SharedMemory] = None
+_OHLC: Optional[np.ndarray] = None
+_DAYS: Optional[np.ndarray] = None
+_OFFSETS: Optional[np.ndarray] = None
+_PARAMS: List[ConfluenceParams] = []
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], offsets: np.ndarray, params_list: List[ConfluenceParams]):
+    global _SHM, _OHLC, _DAYS, _OFFSETS, _PARAMS
+    _SHM = shared_memory.SharedMemory(name=shm_name)
+    _OHLC = np.ndarray(shape, dtype=np.float64, buffer=_SHM.buf)
+    _DAYS = np.ndarray((shape[0],), dtype=np.int64, buffer=_SHM.buf, offset=_OHLC.nbytes)
+    _OFFSETS = offsets
+    _PARAMS = params_list
+    # Step 9 sanity warnings would flood the worker logs during replay
+    logging.getLogger("app.services.fib_calculator").setLevel(logging.ERROR)
+
+
+def _day(iso: Optional[str]) -> Optional[int]:
+    return int(np.datetime64(iso, "D").astype(np.int64)) if iso else None
+
+
+def _replay_symbol(
+    ohlc: np.ndarray,
+    days: np.ndarray,
+    cfg: BacktestConfig,
+    params_list: List[ConfluenceParams],
+    stats: Dict
+):
+    """
+    Stats are keyed (param_index, direction, confluence_score). Per bar the
+    RSI series is computed once, swings once per (min_pct, min_bars) and each
+    distinct target/stop geometry is walked forward once – every parameter
+    set then reuses them.
+    """
+    n = len(ohlc)
+    opens_all, highs_all, lows_all, closes_all = ohlc[:, 0], ohlc[:, 1], ohlc[:, 2], ohlc[:, 3]
+    first = max(cfg.min_bars, 1) - 1
+    day_from, day_until = _day(cfg.signal_from), _day(cfg.signal_until)
+
+    for t in range(first, n - cfg.horizon, cfg.step):
+        if day_from is not None and days[t] < day_from:
+            continue
+        if day_until is not None and days[t + cfg.horizon] >= day_until:
+            break
+        start = max(0, t + 1 - cfg.lookback)
+        highs = highs_all[start:t + 1].tolist()
+        lows = lows_all[start:t + 1].tolist()
+        closes = closes_all[start:t + 1].tolist()
+        entry = closes[-1]
+        if entry <= 0:
+            continue
+
+        fwd = (
+            opens_all[t + 1:t + 1 + cfg.horizon],
+            highs_all[t + 1:t + 1 + cfg.horizon],
+            lows_all[t + 1:t + 1 + cfg.horizon],
+            closes_all[t + 1:t + 1 + cfg.horizon],
+        )
+        rsi_values = calculate_rsi(closes)
+        swing_cache: Dict[Tuple[float, int], list] = {}
+        path_cache: Dict[tuple, Dict] = {}
+
+        for pi, params in enumerate(params_list):
+            swing_key = (params.swing_min_pct, params.swing_min_bars)
+            if swing_key not in swing_cache:
+                swing_cache[swing_key] = detect_swings(highs, lows, *swing_key)
+
+            for direction in cfg.directions:
+                targets = compute_confluence_targets(
+                    symbol="", current_price=entry, direction=direction,
+                    highs=highs, lows=lows, closes=closes,
+                    params=params, swings=swing_cache[swing_key], rsi_values=rsi_values,
+                )
+                geometry = (direction, targets.stop_loss, targets.target_primary,
+                            targets.target_medium, targets.target_moonshot)
+                result = path_cache.get(geometry)
+                if result is None:
+                    result = path_cache[geometry] = evaluate_path(
+                        direction, entry, targets.stop_loss, geometry[2:], *fwd
+                    )
+
+                b = stats.setdefault((pi, direction, targets.confluence_score), _empty_bucket())
+                if result["outcome"] == "invalid":
+                    b["invalid"] += 1
+                    continue
+                b["signals"] += 1
+                b["return_sum"] += result["return_pct"]
+                if result["outcome"] == "target":
+                    b["hit_primary"] += 1
+                    b["bars_to_primary_sum"] += result["bars_to_primary"]
+                elif result["outcome"] == "stopped":
+                    b["stopped"] += 1
+                else:
+                    b["expired"] += 1
+                b["hit_medium"] += result["hit_medium"]
+                b["hit_moonshot"] += result["hit_moonshot"]
+
+
+def _run_chunk(sym_start: int, sym_end: int, cfg: BacktestConfig) -> Dict:
+    stats: Dict = {}
+    for i in range(sym_start, sym_end):
+        a, b = int(_OFFSETS[i]), int(_OFFSETS[i + 1])
+        if b - a > cfg.min_bars + cfg.horizon:
+            _replay_symbol(_OHLC[a:b], _DAYS[a:b], cfg, _PARAMS, stats)
+    return stats
+
+
+# =============================================================================
+# DRIVER
+# =============================================================================
+
+def run_param_grid(data: BarData, params_list: List[ConfluenceParams], cfg: Optional[BacktestConfig] = None) -> Dict:
+    """
+    Fan the replay out over a process pool for one or more parameter sets.
+    Returns raw buckets keyed (param_index, direction, confluence_score).
+    """
+    cfg = cfg or BacktestConfig()
+    shm = shared_memory.SharedMemory(create=True, size=max(1, data.ohlc.nbytes + data.days.nbytes))
+    try:
+        np.ndarray(data.ohlc.shape, dtype=np.float64, buffer=shm.buf)[:] = data.ohlc
+        np.ndarray(data.days.shape, dtype=np.int64, buffer=shm.buf, offset=data.ohlc.nbytes)[:] = data.days
+
+        chunks = [
+            (i, min(i + cfg.chunk_symbols, len(data.symbols)))
+            for i in range(0, len(data.symbols), cfg.chunk_symbols)
+        ]
+        stats: Dict = {}
+        with ProcessPoolExecutor(
+            max_workers=cfg.workers,
+            initializer=_init_worker,
+            initargs=(shm.name, data.ohlc.shape, data.offsets, list(params_list)),
+        ) as pool:
+            futures = [pool.submit(_run_chunk, a, b, cfg) for a, b in chunks]
+            for done, fut in enumerate(as_completed(futures), 1):
+                _merge(stats, fut.result())
+                if done % 10 == 0 or done == len(futures):
+                    logger.info(f"Backtest: {done}/{len(futures)} chunks")
+    finally:
+        shm.close()
+        shm.unlink()
+    return stats
+
+
+def run_backtest(
+    data: BarData,
+    cfg: Optional[BacktestConfig] = None,
+    params: Optional[ConfluenceParams] = None
+) -> Dict:
+    """Backtest one parameter set (default: production thresholds) per confluence score"""
+    cfg = cfg or BacktestConfig()
+    params = params or load_confluence_params()
+    t0 = time.time()
+
+    stats = run_param_grid(data, [params], cfg)
+
+    elapsed = time.time() - t0
+    rows = summarize({(d, score): b for (_, d, score), b in stats.items()})
+    invalid = sum(b["invalid"] for b in stats.values())
+    logger.info(f"Backtest done: {sum(r['signals'] for r in rows)} signals "
+                f"({invalid} invalid skipped), {len(data.symbols)} symbols in {elapsed:.1f}s")
+    return {
+        "config": asdict(cfg),
+        "params": params.to_dict(),
+        "symbols": len(data.symbols),
+        "bars": int(data.offsets[-1]),
+        "elapsed_seconds": round(elapsed, 2),
+        "invalid_signals": invalid,
+        "by_score": rows,
+    }
+
+
+# =============================================================================
+# LOADERS
+# =============================================================================
+
+async def load_bars_from_db(
+    symbols: Optional[List[str]] = None,
+    table: str = "prime_ohlc_90d"
+) -> BarData:
+    """Load OHLC for the universe (or a subset) from Postgres"""
+    from app.core.database import get_asyncpg_pool
+
+    db = await get_asyncpg_pool()
+    async with db.acquire() as conn:
+        query = f"""
+            SELECT symbol, date, open_price, high_price, low_price, close_price
+            FROM {table}
+            {"WHERE symbol = ANY($1::text[])" if symbols else ""}
+            ORDER BY symbol, date
+        """
+        rows = await conn.fetch(query, symbols) if symbols else await conn.fetch(query)
+
+    series: Dict[str, Tuple[List, List, List[float], List[float], List[float]]] = {}
+    for r in rows:
+        d, o, h, l, c = series.setdefault(r["symbol"], ([], [], [], [], []))
+        d.append(r["date"])
+        o.append(float(r["open_price"] or 0))
+        h.append(float(r["high_price"]))
+        l.append(float(r["low_price"]))
+        c.append(float(r["close_price"]))
+    return BarData.from_series(series)
+
+
+def load_bars_from_csv_dir(path: str, symbols: Optional[List[str]] = None) -> BarData:
+    """
+    Load multi-year history from <path>/<SYMBOL>.csv (FMP historical-price-full
+    export: date, open, high, low, close, volume). Rows are sorted by date.
+    """
+    import pandas as pd
+
+    series = {}
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(".csv"):
+            continue
+        sym = name[:-4].upper()
+        if symbols and sym not in symbols:
+            continue
+        df = pd.read_csv(os.path.join(path, name)).sort_values("date")
+        series[sym] = (df["date"].astype(str).str[:10].tolist(), df["open"].fillna(0).tolist(), df["high"].tolist(), df["low"].tolist(), df["close"].tolist())
+    return BarData.from_series(series)
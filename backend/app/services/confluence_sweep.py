@@ -0,0 +1,224 @@
+# backend/app/services/confluence_sweep.py
+"""
+Confluence Parameter Sweep – BullsBears v6
+Grid / random search over the fib_calculator thresholds on historical bars.
+
+Runs on the backtest engine's shared-memory process pool in a single pass:
+every parameter set is evaluated inside the same per-bar loop, so RSI,
+swings (per min_pct/min_bars pair) and forward target/stop paths are
+computed once and shared across configurations.
+
+Walk-forward: bars are split by date into in-sample, validation and test
+ranges (default: the last 30% of bars are held out, the final 15% of them
+as the test window). Configurations are ranked in-sample by expectancy then
+primary hit rate over the signals that would actually surface (confluence
+≥ min_score); the top `shortlist` are re-scored on the validation range
+and the best validation config is the candidate. The test window is only
+used to accept it: the candidate must beat the current params there – a
+score it wasn't selected on, so the comparison isn't biased towards it.
+The winner is written to a candidate file
+(prompts/confluence_params.candidate.json); apply=True promotes it to
+prompts/confluence_params.json, which compute_confluence_targets() picks
+up on its next call.
+"""
+
+import itertools
+import json
+import logging
+import random
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from app.services.confluence_backtest import BacktestConfig, BarData, run_param_grid
+from app.services.fib_calculator import (
+    DEFAULT_PARAMS,
+    PARAMS_PATH,
+    ConfluenceParams,
+    load_confluence_params,
+)
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_PATH = PARAMS_PATH.with_name("confluence_params.candidate.json")
+
+# Historical short interest isn't stored, so short_squeeze_pct is inert in a
+# replay and left out of the default search space.
+DEFAULT_GRID = {
+    "swing_min_pct": [5.0, 6.5, 8.0, 10.0, 12.0],
+    "swing_min_bars": [8, 10, 12, 15],
+    "pivot_threshold_pct": [1.5, 2.0, 3.0, 4.0],
+    "gann_threshold_pct": [1.0, 2.0, 3.0],
+}
+
+DEFAULT_RANGES = {
+    "swing_min_pct": (4.0, 14.0),
+    "swing_min_bars": (6, 20),
+    "pivot_threshold_pct": (1.0, 5.0),
+    "gann_threshold_pct": (0.5, 4.0),
+}
+
+
+def build_grid(space: Optional[Dict[str, List]] = None) -> List[ConfluenceParams]:
+    """Cartesian product of the given values; unspecified fields keep defaults"""
+    space = space or DEFAULT_GRID
+    keys = list(space)
+    base = DEFAULT_PARAMS.to_dict()
+    return [
+        ConfluenceParams.from_dict({**base, **dict(zip(keys, combo))})
+        for combo in itertools.product(*(space[k] for k in keys))
+    ]
+
+
+def sample_random(
+    n: int,
+    ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    seed: int = 42
+) -> List[ConfluenceParams]:
+    """
+    Uniform random sample. min_bars is drawn as int and min_pct rounded to
+    0.5 so swing results still get reused across samples.
+    """
+    ranges = ranges or DEFAULT_RANGES
+    rng = random.Random(seed)
+    base = DEFAULT_PARAMS.to_dict()
+    out = []
+    for _ in range(n):
+        values = dict(base)
+        for key, (lo, hi) in ranges.items():
+            if isinstance(base[key], int):
+                values[key] = rng.randint(int(lo), int(hi))
+            elif key == "swing_min_pct":
+                values[key] = round(rng.uniform(lo, hi) * 2) / 2
+            else:
+                values[key] = round(rng.uniform(lo, hi), 2)
+        out.append(ConfluenceParams.from_dict(values))
+    return list(dict.fromkeys(out))  # frozen dataclass → drop duplicates, keep order
+
+
+def rank_configs(
+    stats: Dict,
+    params_list: List[ConfluenceParams],
+    min_score: int = 2,
+    min_signals: int = 30
+) -> List[Dict]:
+    """Collapse (param, direction, score) buckets into one ranked row per config"""
+    totals = {i: {"signals": 0, "hit_primary": 0, "stopped": 0, "return_sum": 0.0,
+                  "all_signals": 0, "all_return_sum": 0.0} for i in range(len(params_list))}
+    for (pi, _direction, score), b in stats.items():
+        t = totals[pi]
+        t["all_signals"] += b["signals"]
+        t["all_return_sum"] += b["return_sum"]
+        if score >= min_score:
+            t["signals"] += b["signals"]
+            t["hit_primary"] += b["hit_primary"]
+            t["stopped"] += b["stopped"]
+            t["return_sum"] += b["return_sum"]
+
+    rows = []
+    for pi, t in totals.items():
+        n = t["signals"]
+        rows.append({
+            "params": params_list[pi].to_dict(),
+            "signals": n,
+            "hit_rate": round(t["hit_primary"] / n, 4) if n else 0.0,
+            "stop_rate": round(t["stopped"] / n, 4) if n else 0.0,
+            "expectancy_pct": round(t["return_sum"] / n, 3) if n else 0.0,
+            "all_signals_expectancy_pct": round(t["all_return_sum"] / t["all_signals"], 3) if t["all_signals"] else 0.0,
+            "sufficient": n >= min_signals,
+        })
+
+    rows.sort(key=lambda r: (r["sufficient"], r["expectancy_pct"], r["hit_rate"]), reverse=True)
+    for rank, r in enumerate(rows, 1):
+        r["rank"] = rank
+    return rows
+
+
+def run_sweep(
+    data: BarData,
+    params_list: List[ConfluenceParams],
+    cfg: Optional[BacktestConfig] = None,
+    min_score: int = 2,
+    min_signals: int = 30,
+    holdout: float = 0.3,
+    split_date: Optional[str] = None,
+    shortlist: int = 10,
+    test: float = 0.15,
+    test_date: Optional[str] = None
+) -> Dict:
+    """
+    In-sample ranking on bars before split_date (default: the date leaving
+    `holdout` of all bars after it). The top `shortlist` sufficient configs
+    plus the current params are re-scored on split_date..test_date (default:
+    the date leaving `test` of all bars after it) and the best one there is
+    the candidate; candidate vs current params on bars from test_date
+    decides whether it's accepted.
+    """
+    cfg = cfg or BacktestConfig()
+    split_date = split_date or data.date_quantile(1 - holdout)
+    test_date = test_date or data.date_quantile(1 - test)
+    if test_date <= split_date:
+        raise ValueError(f"Test window ({test_date}) must start after the held-out split ({split_date})")
+    t0 = time.time()
+    logger.info(f"Sweep: {len(params_list)} configs × {len(data.symbols)} symbols, "
+                f"validation from {split_date}, test from {test_date}")
+
+    in_sample = run_param_grid(data, params_list, replace(cfg, signal_until=split_date))
+    ranked = rank_configs(in_sample, params_list, min_score=min_score, min_signals=min_signals)
+
+    current = load_confluence_params()
+    finalists = [ConfluenceParams.from_dict(r["params"]) for r in ranked if r["sufficient"]][:shortlist]
+    validation_list = list(dict.fromkeys([current] + finalists))
+    validation = rank_configs(
+        run_param_grid(data, validation_list, replace(cfg, signal_from=split_date, signal_until=test_date)),
+        validation_list, min_score=min_score, min_signals=min_signals,
+    )
+    # Current params on top of validation → nothing to promote
+    chosen = validation[0] if validation[0]["sufficient"] and validation[0]["params"] != current.to_dict() else None
+
+    test_list = [current] + ([ConfluenceParams.from_dict(chosen["params"])] if chosen else [])
+    test_rows = rank_configs(
+        run_param_grid(data, test_list, replace(cfg, signal_from=test_date)),
+        test_list, min_score=min_score, min_signals=min_signals,
+    )
+    baseline = next(r for r in test_rows if r["params"] == current.to_dict())
+    best = next((r for r in test_rows if r["params"] != baseline["params"]), None)
+    if best and not best["sufficient"]:
+        logger.info(f"Validation winner has too few test signals ({best['signals']})")
+        best = None
+    elif best and best["expectancy_pct"] <= baseline["expectancy_pct"]:
+        logger.info(f"Validation winner ({best['expectancy_pct']:.3f}% on test) doesn't beat "
+                    f"current params ({baseline['expectancy_pct']:.3f}%)")
+        best = None
+
+    elapsed = time.time() - t0
+    logger.info(f"Sweep done in {elapsed:.1f}s – winner: {best['params'] if best else None}")
+    return {
+        "configs": len(params_list),
+        "symbols": len(data.symbols),
+        "bars": int(data.offsets[-1]),
+        "min_score": min_score,
+        "split_date": split_date,
+        "test_date": test_date,
+        "elapsed_seconds": round(elapsed, 2),
+        "ranked": ranked,
+        "validation": validation,
+        "test": test_rows,
+        "baseline": baseline,
+        "best": best,
+    }
+
+
+def write_best_params(result: Dict, apply: bool = False) -> Optional[Dict]:
+    """
+    Persist the walk-forward winner – to the candidate file for review, or
+    (apply=True) to confluence_params.json for compute_confluence_targets()
+    """
+    best = result.get("best")
+    if not best:
+        logger.warning("No config beat the current params on the test window – nothing written")
+        return None
+    path = PARAMS_PATH if apply else CANDIDATE_PATH
+    path.write_text(json.dumps(best["params"], indent=2))
+    logger.info(f"Wrote {path.name}: {best['params']}")
+    return best["params"]
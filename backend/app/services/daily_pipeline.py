@@ -0,0 +1,197 @@
+# backend/app/services/daily_pipeline.py
+"""
+Daily Pipeline – BullsBears v6
+The morning pipeline as a DAG (pipeline_dag), shared by the Render cron job
+(scripts/run_daily_pipeline.py), the Celery beat task
+(tasks.run_daily_pipeline) and POST /admin/trigger-full-pipeline.
+
+    fmp_delta ─┬─► prescreen ─┬─► insider ──────────────┐
+    fred ──────┘              ├─► charts ─┬─► vision ───┼─► arbitrator ─► publish
+                              │           └─► chart_uploads
+                              └─► social ───────────────┘
+    short_interest (background leaf – nothing waits for it)
+
+- Data refreshes (refresh_data=True – cron script, admin trigger): FMP
+  delta + FRED run concurrently ahead of prescreen; Finnhub short interest
+  (~50 min at 55 calls/min, written incrementally) runs alongside the whole
+  pipeline and prescreen uses the last stored values. The Celery beat path
+  passes refresh_data=False – beat refreshes the data at 3:00–4:30 AM ET
+- Social only needs the shortlist, so it runs alongside charts + vision
+- Chart uploads (frontend URLs) finish in the background of vision
+- Arbitrator runs the tasks.run_arbitrator code (confluence targets, picks +
+  outcome rows, was_picked). Publish (Firebase pulse/latest → push
+  notifications) reads the stored picks back the moment they are written,
+  instead of at a fixed 8:30 – a late run never publishes yesterday's or
+  partial picks, and an empty result keeps the previous feed
+- Required stages: prescreen, charts, arbitrator, publish – the rest are
+  non-critical (the next stage runs without them, as before)
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from app.services.pipeline_dag import Stage, run_dag
+
+logger = logging.getLogger(__name__)
+
+# Per-stage timeouts (s) – generous: a hung provider/API must not stall the morning
+STAGE_TIMEOUTS = {
+    "fmp_delta": 1200,
+    "short_interest": 3600,     # Matches the fetch_short_interest task's soft limit
+    "fred_calendar": 300,
+    "prescreen": 600,
+    "insider_trading": 600,
+    "charts": 900,
+    "chart_uploads": 900,
+    "vision": 900,
+    "social": 600,
+    "arbitrator": 600,
+    "publish": 120,
+}
+
+
+def daily_pipeline_stages(refresh_data: bool = True) -> List[Stage]:
+    """
+    Fresh stage list per run – agents/generators bind to the current event
+    loop's pool. refresh_data=False leaves out FMP delta / short interest / FRED.
+    """
+    from app.services.agent_manager import AgentManager
+    from app.tasks.generate_charts import ChartGenerator
+
+    agents = AgentManager()
+    charts = ChartGenerator()
+
+    async def fmp_delta(_: Dict[str, Any]):
+        from app.services import get_fmp_ingestion
+        ingestion = await get_fmp_ingestion()
+        await ingestion.daily_delta_update()
+        return "success"
+
+    async def short_interest(_: Dict[str, Any]):
+        from app.tasks.fetch_short_interest import _fetch_short_interest_async
+        return await _fetch_short_interest_async()
+
+    async def fred_calendar(_: Dict[str, Any]):
+        from app.tasks.fetch_fred_calendar import _fetch_fred_calendar_async
+        return await _fetch_fred_calendar_async()
+
+    async def prescreen(_: Dict[str, Any]):
+        await agents.initialize()
+        result = await agents.run_prescreen_agent()
+        logger.info(f"Prescreen: {result.get('shortlist_count', 0)} stocks")
+        return result
+
+    async def insider_trading(_: Dict[str, Any]):
+        from app.tasks.fetch_insider_trading import _fetch_insider_for_shortlist_async
+        return await _fetch_insider_for_shortlist_async()
+
+    async def generate_charts(_: Dict[str, Any]):
+        await charts.initialize()
+        # Charts are spooled locally for vision; Storage uploads finish in chart_uploads
+        result = await charts.generate_all_charts(wait_for_uploads=False)
+        logger.info(f"Charts: {result.get('success_count', 0)} generated")
+        return result
+
+    async def chart_uploads(_: Dict[str, Any]):
+        return await charts.wait_for_uploads()
+
+    async def vision(_: Dict[str, Any]):
+        return await agents.run_vision_agent()
+
+    async def social(_: Dict[str, Any]):
+        return await agents.run_social_agent()
+
+    async def arbitrator(_: Dict[str, Any]):
+        # Same code as tasks.run_arbitrator: targets, picks + outcome rows, was_picked
+        from app.tasks.run_arbitrator import _run_arbitrator_async
+        result = await _run_arbitrator_async()
+        if not result.get("success"):
+            raise RuntimeError(f"Arbitrator failed: {result.get('error') or result.get('reason')}")
+        logger.info(f"Arbitrator: {result.get('picks_count', 0)} new, {result.get('updated_count', 0)} updated")
+        return result
+
+    async def publish(inputs: Dict[str, Any]):
+        from app.services.push_picks_to_firebase import load_picks_for_publish, publish_picks_to_firebase
+
+        pick_ids = (inputs["arbitrator"] or {}).get("pick_ids") or []
+        if not pick_ids:
+            raise RuntimeError("Arbitrator stored no picks – previous pulse feed kept")
+        picks_data = await load_picks_for_publish(pick_ids)
+        # firebase_admin is blocking
+        await asyncio.to_thread(publish_picks_to_firebase, picks_data)
+        return {
+            "published": picks_data["total_picks"],
+            "bullish": len(picks_data["bullish"]),
+            "bearish": len(picks_data["bearish"]),
+        }
+
+    def stage(name, run, deps=(), required=False, background=False):
+        return Stage(name, run, tuple(deps), STAGE_TIMEOUTS.get(name), required, background)
+
+    refresh = [
+        stage("fmp_delta", fmp_delta),
+        stage("fred_calendar", fred_calendar),
+        stage("short_interest", short_interest, background=True),
+    ] if refresh_data else []
+    return refresh + [
+        stage("prescreen", prescreen, ("fmp_delta", "fred_calendar") if refresh_data else (), required=True),
+        stage("insider_trading", insider_trading, ("prescreen",)),
+        stage("charts", generate_charts, ("prescreen",), required=True),
+        stage("chart_uploads", chart_uploads, ("charts",)),
+        stage("vision", vision, ("charts",)),
+        stage("social", social, ("prescreen",)),
+        stage("arbitrator", arbitrator, ("vision", "social", "insider_trading"), required=True),
+        stage("publish", publish, ("arbitrator",), required=True),
+    ]
+
+
+async def run_daily_pipeline(refresh_data: bool = True) -> Dict[str, Any]:
+    """
+    System check + DAG run → {"status", "results", "timing"} (+ "step": first
+    failed required stage). Does not close pools/clients – see close_pipeline_resources.
+    """
+    from app.services.system_state import is_system_on
+
+    if not await is_system_on():
+        logger.warning("⏸️ System is OFF - skipping daily pipeline")
+        return {"status": "skipped", "reason": "system_off"}
+
+    logger.info("🚀 Starting BullsBears Daily Pipeline")
+    run = await run_dag(daily_pipeline_stages(refresh_data), label="daily")
+
+    results = {
+        name: r.result if r.ok else f"{r.status}: {r.error}"
+        for name, r in run.stages.items()
+    }
+    outcome = {"status": run.status, "results": results, "timing": run.report()}
+    if run.failed:
+        outcome["step"] = run.failed[0]
+        logger.error(f"❌ Daily pipeline failed at {run.failed[0]}")
+    else:
+        logger.info("🎉 Daily pipeline complete!")
+    return outcome
+
+
+async def close_pipeline_resources():
+    """End of a standalone run (cron process / Celery task loop): close pools + clients"""
+    from app.core.database import close_asyncpg_pool
+    from app.core.firebase import close_firebase
+    from app.services.cloud_agents.llm_gateway import close_llm_clients, get_llm_stats
+
+    logger.info("🧹 Cleaning up async resources...")
+    try:
+        await close_asyncpg_pool()
+    except Exception as e:
+        logger.warning(f"asyncpg pool cleanup warning: {e}")
+    try:
+        await close_firebase()
+    except Exception as e:
+        logger.warning(f"Firebase cleanup warning: {e}")
+    for key, stats in get_llm_stats().items():
+        logger.info(f"🤖 LLM {key}: {stats}")
+    try:
+        await close_llm_clients()
+    except Exception as e:
+        logger.warning(f"LLM client cleanup warning: {e}")
+    logger.info("✅ Cleanup complete")
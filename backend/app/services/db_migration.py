@@ -200,8 +200,24 @@ async def run_all_migrations() -> dict:
                 END $$;
             """)
 
+            # === v6: Incremental indicator state (Dec 2025) ===
+            from app.services.indicator_state import ensure_indicator_state_table
+            await ensure_indicator_state_table(conn)
+
+            # === v7: Chart content fingerprints (Dec 2025) ===
+            from app.services.chart_spool import ensure_chart_columns
+            await ensure_chart_columns(conn)
+
+            # === v8: Social result store (Dec 2025) ===
+            from app.services.social_store import ensure_social_results_table
+            await ensure_social_results_table(conn)
+
+            # === v9: LLM call telemetry (Dec 2025) ===
+            from app.services.llm_telemetry import ensure_llm_telemetry_tables
+            await ensure_llm_telemetry_tables(conn)
+
     logger.info("All database migrations completed successfully")
-    return {"success": True, "migrations_applied": 5}
+    return {"success": True, "migrations_applied": 9}
 
 
 async def reset_all_pipeline_tables() -> dict:
@@ -215,6 +231,7 @@ async def reset_all_pipeline_tables() -> dict:
             await conn.execute("DROP TABLE IF EXISTS pick_outcomes_detailed CASCADE")
             await conn.execute("DROP TABLE IF EXISTS picks CASCADE")
             await conn.execute("DROP TABLE IF EXISTS shortlist_candidates CASCADE")
+            await conn.execute("DROP TABLE IF EXISTS social_results CASCADE")
             await conn.execute("DROP TABLE IF EXISTS pipeline_activity CASCADE")
             
         await run_all_migrations()  # recreate fresh
@@ -14,14 +14,67 @@ CONFLUENCE METHODS (0-5 points):
 3. Gann 1×1 alignment (+1) - TRUE volatility-scaled
 4. RSI Divergence (+1)
 5. Catalyst: earnings/news/short squeeze (+1)
+Optional: volume-profile POC / value-area alignment (+1, params.volume_profile_confluence)
 """
 
+import json
 import logging
-from typing import Optional, Tuple, List
-from dataclasses import dataclass
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple, List
+from dataclasses import dataclass, asdict, field, fields
+
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.market_structure import VolumeProfile, volume_profile
 
 logger = logging.getLogger(__name__)
 
+PARAMS_PATH = Path(__file__).parent / "prompts" / "confluence_params.json"
+
+
+@dataclass(frozen=True)
+class ConfluenceParams:
+    """Tunable thresholds – defaults are the original hardcoded values"""
+    swing_min_pct: float = 8.0          # detect_swings min_pct
+    swing_min_bars: int = 12            # detect_swings min_bars
+    pivot_threshold_pct: float = 3.0    # is_near_pivot ±%
+    gann_threshold_pct: float = 2.0     # check_gann_alignment ±%
+    short_squeeze_pct: float = 25.0     # short interest cutoff (squeeze point + moonshot)
+    volume_profile_confluence: bool = False  # +1 when target_primary sits on POC / value-area edge
+    poc_threshold_pct: float = 3.0      # POC / value-area edge ±%
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConfluenceParams":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+DEFAULT_PARAMS = ConfluenceParams()
+_params_cache: Tuple[float, ConfluenceParams] = (0.0, DEFAULT_PARAMS)
+
+
+def load_confluence_params() -> ConfluenceParams:
+    """
+    Thresholds picked by the sweep runner (prompts/confluence_params.json).
+    Re-read only when the file changes; missing/invalid file → defaults.
+    """
+    global _params_cache
+    try:
+        mtime = os.path.getmtime(PARAMS_PATH)
+    except OSError:
+        return DEFAULT_PARAMS
+    if mtime != _params_cache[0]:
+        try:
+            params = ConfluenceParams.from_dict(json.loads(PARAMS_PATH.read_text(encoding="utf-8")))
+        except Exception as e:
+            logger.warning(f"Invalid {PARAMS_PATH.name}, using defaults: {e}")
+            params = DEFAULT_PARAMS
+        _params_cache = (mtime, params)
+    return _params_cache[1]
+
 
 @dataclass
 class SwingPoint:
@@ -73,6 +126,7 @@ class CatalystFlags:
     short_interest_pct: float = 0.0      # Short interest as % of float
     news_confluence_bonus: int = 0       # 0-3 based on news tier
     news_reason: str = ""                # Explanation for logging
+    news_matches: List[dict] = field(default_factory=list)  # Matched keyword spans
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -102,27 +156,45 @@ NEGATIVE_TIER2 = {
 }
 
 
-def score_news_catalyst(headlines: List[str], direction: str) -> Tuple[int, str]:
-    """
-    Score news catalyst based on keyword tiers and direction alignment.
+# Compiled once at import – one Aho-Corasick pass over all headlines scores
+# every tier at once, with word boundaries ("sec" ≠ "second", "beat" ≠ "upbeat")
+NEWS_MATCHER = KeywordMatcher({
+    "tier1_positive": POSITIVE_TIER1,
+    "tier1_negative": NEGATIVE_TIER1,
+    "tier2_positive": POSITIVE_TIER2,
+    "tier2_negative": NEGATIVE_TIER2,
+})
 
-    Returns:
-        (confluence_bonus, reason)
-        - Tier 1 match aligned with direction: +3
-        - Strong Tier 2 (2+ keywords): +2
-        - Single Tier 2: +1
-        - Conflict (opposite direction news): 0
-        - Neutral (no keywords): 0
-    """
-    if not headlines:
-        return 0, ""
 
-    text = " | ".join(h.lower() for h in headlines)
-
-    tier1_pos = sum(1 for kw in POSITIVE_TIER1 if kw in text)
-    tier1_neg = sum(1 for kw in NEGATIVE_TIER1 if kw in text)
-    tier2_pos = sum(1 for kw in POSITIVE_TIER2 if kw in text)
-    tier2_neg = sum(1 for kw in NEGATIVE_TIER2 if kw in text)
+@dataclass
+class NewsCatalystScore:
+    """Tiered news score + the keyword spans that produced it"""
+    bonus: int
+    reason: str
+    matches: List[dict] = field(default_factory=list)  # {headline, start, end, keyword, tier}
+
+    def as_tuple(self) -> Tuple[int, str]:
+        return self.bonus, self.reason
+
+
+def match_news_keywords(headlines: List[str]) -> List[dict]:
+    """All tier keyword hits, with headline index + span for explainability"""
+    return [
+        {"headline": i, "start": m.start, "end": m.end, "keyword": m.keyword, "tier": m.label}
+        for i, headline in enumerate(headlines)
+        for m in NEWS_MATCHER.iter_matches(headline)
+    ]
+
+
+def _score_news_matches(matches: List[dict], direction: str) -> Tuple[int, str]:
+    # Distinct keywords per tier (same counting as the old `kw in text` loop)
+    tiers: Dict[str, set] = {}
+    for m in matches:
+        tiers.setdefault(m["tier"], set()).add(m["keyword"])
+    tier1_pos = len(tiers.get("tier1_positive", ()))
+    tier1_neg = len(tiers.get("tier1_negative", ()))
+    tier2_pos = len(tiers.get("tier2_positive", ()))
+    tier2_neg = len(tiers.get("tier2_negative", ()))
 
     # Tier-1 always wins (high conviction events)
     if tier1_pos and direction == "bullish":
@@ -146,6 +218,44 @@ def score_news_catalyst(headlines: List[str], direction: str) -> Tuple[int, str]
         return 0, "neutral"
 
 
+def score_news_catalyst_detailed(headlines: List[str], direction: str) -> NewsCatalystScore:
+    """score_news_catalyst() plus the matched spans"""
+    if not headlines:
+        return NewsCatalystScore(0, "")
+    matches = match_news_keywords(headlines)
+    bonus, reason = _score_news_matches(matches, direction)
+    return NewsCatalystScore(bonus, reason, matches)
+
+
+def score_news_catalyst(headlines: List[str], direction: str) -> Tuple[int, str]:
+    """
+    Score news catalyst based on keyword tiers and direction alignment.
+
+    Returns:
+        (confluence_bonus, reason)
+        - Tier 1 match aligned with direction: +3
+        - Strong Tier 2 (2+ keywords): +2
+        - Single Tier 2: +1
+        - Conflict (opposite direction news): 0
+        - Neutral (no keywords): 0
+    """
+    return score_news_catalyst_detailed(headlines, direction).as_tuple()
+
+
+def score_news_catalyst_batch(
+    headlines_by_symbol: Dict[str, List[str]],
+    directions: Dict[str, str]
+) -> Dict[str, NewsCatalystScore]:
+    """
+    Score every shortlist symbol in one go.
+    directions: symbol → 'bullish'/'bearish' (missing symbols default to bullish)
+    """
+    return {
+        symbol: score_news_catalyst_detailed(headlines or [], directions.get(symbol, "bullish"))
+        for symbol, headlines in headlines_by_symbol.items()
+    }
+
+
 @dataclass
 class ConfluenceTargets:
     """Full confluence-based price targets - PRODUCTION RETURN OBJECT"""
@@ -180,6 +290,10 @@ class ConfluenceTargets:
     # ATR for volatility context
     atr_pct: float = 0.0
 
+    # Volume-at-price (only when volumes were supplied)
+    volume_profile: Optional[VolumeProfile] = None
+    poc_alignment: bool = False
+
     # Legacy aliases for backward compatibility
     @property
     def primary_target(self) -> float:
@@ -257,16 +371,19 @@ def get_last_completed_swing(
     highs: List[float],
     lows: List[float],
     min_pct: float = 8.0,
-    min_bars: int = 12
+    min_bars: int = 12,
+    swings: Optional[List[SwingPoint]] = None
 ) -> Tuple[Optional[float], Optional[float]]:
     """
     Get the most recent completed swing (low, high).
     A completed swing must have been retraced at least once.
+    Pass `swings` if detect_swings() was already run with the same settings.
 
     Returns:
         (swing_low, swing_high) or (None, None) if no valid swing
     """
-    swings = detect_swings(highs, lows, min_pct, min_bars)
+    if swings is None:
+        swings = detect_swings(highs, lows, min_pct, min_bars)
 
     if len(swings) < 2:
         # Fallback: use simple min/max of recent data
@@ -449,7 +566,8 @@ def calculate_rsi(closes: List[float], period: int = 14) -> List[float]:
 def detect_rsi_divergence(
     swings: List[SwingPoint],
     closes: List[float],
-    direction: str
+    direction: str,
+    rsi_values: Optional[List[float]] = None
 ) -> RSIDivergence:
     """
     Detect RSI divergence on last 3 swing points.
@@ -462,7 +580,8 @@ def detect_rsi_divergence(
     if len(swings) < 2:
         return RSIDivergence(detected=False)
 
-    rsi_values = calculate_rsi(closes)
+    if rsi_values is None:
+        rsi_values = calculate_rsi(closes)
 
     # Get last 3 swings of the appropriate type
     if direction == 'bullish':
@@ -566,20 +685,21 @@ def should_show_medium_target(confluence_score: int) -> bool:
 def should_show_moonshot_target(
     confluence_score: int,
     has_earnings_catalyst: bool = False,
-    short_interest_pct: float = 0.0
+    short_interest_pct: float = 0.0,
+    short_squeeze_pct: float = 25.0
 ) -> bool:
     """
     Target 3 (Moonshot) shown if:
     - confluence ≥ 3, OR
     - earnings this week, OR
-    - short interest > 25%
+    - short interest > 25% (short_squeeze_pct)
 
     These are the catalysts that cause +30-100% moves.
     """
     return (
         confluence_score >= 3 or
         has_earnings_catalyst or
-        short_interest_pct > 25.0
+        short_interest_pct > short_squeeze_pct
     )
 
 
@@ -667,7 +787,9 @@ async def calculate_confluence_targets(
     has_earnings_catalyst: bool = False,
     earnings_surprise_pct: float = 0.0,
     headlines: Optional[List[str]] = None,  # Raw headlines for tiered scoring
-    short_interest_pct: float = 0.0
+    short_interest_pct: float = 0.0,
+    news_score: Optional[NewsCatalystScore] = None,  # Precomputed via score_news_catalyst_batch
+    params: Optional[ConfluenceParams] = None
 ) -> ConfluenceTargets:
     """
     BullsBears v6 - 3-Tier Confluence Target Calculation
@@ -703,222 +825,301 @@ async def calculate_confluence_targets(
     async with db_pool.acquire() as conn:
         # Get 90 days of OHLC data
         rows = await conn.fetch("""
-            SELECT date, high_price, low_price, close_price
+            SELECT date, high_price, low_price, close_price, volume
             FROM prime_ohlc_90d
             WHERE symbol = $1
             ORDER BY date ASC
         """, symbol)
 
-        if not rows or len(rows) < 20:
-            logger.warning(f"Insufficient OHLC data for {symbol}, using defaults")
-            return _create_default_targets(current_price, direction)
-
-        highs = [float(r['high_price']) for r in rows]
-        lows = [float(r['low_price']) for r in rows]
-        closes = [float(r['close_price']) for r in rows]
-
-        # =================================================================
-        # STEP 1: Detect swings and calculate 3-tier Fibonacci extensions
-        # =================================================================
-        swings = detect_swings(highs, lows, min_pct=8.0, min_bars=12)
-        swing_low, swing_high = get_last_completed_swing(highs, lows, min_pct=8.0, min_bars=12)
-
-        if swing_low is None or swing_high is None:
-            return _create_default_targets(current_price, direction)
-
-        swing_range = swing_high - swing_low
-        fib_618_ret = fib_retracement(swing_low, swing_high, 0.618)
-
-        # Get swing bars for true Gann calculation
-        swing_bars = max(1, len(closes) // 4)  # Default estimate
-        if len(swings) >= 2:
-            # Get actual bars between last two opposite swings
-            for i in range(len(swings) - 1, 0, -1):
-                if swings[i].is_high != swings[i-1].is_high:
-                    swing_bars = abs(swings[i].index - swings[i-1].index)
-                    break
-
-        # Calculate 3-tier targets
-        if direction == 'bullish':
-            target_primary = swing_high + swing_range * 1.0      # Fib 1.000 - ALWAYS shown
-            target_medium_raw = swing_high + swing_range * 1.272 # Fib 1.272
-            target_moonshot_raw = swing_high + swing_range * 1.618  # Fib 1.618
-            stop_loss = swing_low * 0.97
-            fib_valid = current_price > fib_618_ret
-            swing_for_gann = swing_low
-            swing_idx = next((s.index for s in swings if not s.is_high), 0)
-        else:  # bearish
-            # Bearish: True Fibonacci EXTENSIONS downward from swing geometry
-            # swing_range = swing_high - swing_low (same as bullish)
-            # Targets project BELOW swing_low using Fib ratios
-            target_primary = swing_low - swing_range * 1.0        # Fib 1.000 extension DOWN
-            target_medium_raw = swing_low - swing_range * 1.272   # Fib 1.272 extension DOWN
-            target_moonshot_raw = swing_low - swing_range * 1.618 # Fib 1.618 extension DOWN
-
-            # Ensure targets don't go negative
-            target_primary = max(0.01, target_primary)
-            target_medium_raw = max(0.01, target_medium_raw)
-            target_moonshot_raw = max(0.01, target_moonshot_raw)
-
-            stop_loss = swing_high * 1.03
-            fib_valid = current_price < fib_618_ret
-            swing_for_gann = swing_high
-            swing_idx = next((s.index for s in swings if s.is_high), 0)
-
-        # =================================================================
-        # STEP 2: Calculate weekly pivots
-        # =================================================================
-        weekly_pivots = None
-        pivot_aligned = False
-
-        if weekly_high and weekly_low and weekly_close:
-            weekly_pivots = calculate_weekly_pivots(weekly_high, weekly_low, weekly_close)
-            pivot_aligned = is_near_pivot(target_primary, weekly_pivots, threshold_pct=3.0)
-        else:
-            # Use last 5 days as pseudo-weekly
-            if len(highs) >= 5:
-                weekly_pivots = calculate_weekly_pivots(
-                    max(highs[-5:]), min(lows[-5:]), closes[-1]
-                )
-                pivot_aligned = is_near_pivot(target_primary, weekly_pivots, threshold_pct=3.0)
-
-        # =================================================================
-        # STEP 3: Calculate Gann projection (TRUE volatility-scaled)
-        # =================================================================
-        current_idx = len(closes) - 1
-        gann, current_1x1 = calculate_gann_projection(
-            swing_price=swing_for_gann,
-            swing_index=swing_idx,
-            current_index=current_idx,
-            swing_range=swing_range,
-            actual_swing_bars=swing_bars,  # NEW: actual bars for true 1×1
-            direction=direction,
-            projection_days=30
-        )
-        gann.aligned = check_gann_alignment(current_price, current_1x1, threshold_pct=2.0)
-
-        # =================================================================
-        # STEP 4: Detect RSI divergence
-        # =================================================================
-        rsi_divergence = detect_rsi_divergence(swings, closes, direction)
-
-        # =================================================================
-        # STEP 5: Calculate ATR
-        # =================================================================
-        atr = calculate_atr(highs, lows, closes, period=14)
-        atr_pct = (atr / current_price * 100) if current_price > 0 else 0
-
-        # =================================================================
-        # STEP 6: Score news catalyst using tiered keyword system
-        # =================================================================
-        news_bonus, news_reason = score_news_catalyst(headlines or [], direction)
-        has_news_catalyst = news_bonus > 0
-
-        # Build catalyst flags with scored news data
-        catalyst = CatalystFlags(
-            has_earnings=has_earnings_catalyst,
-            earnings_surprise_pct=earnings_surprise_pct,
-            has_news_catalyst=has_news_catalyst,
-            news_sentiment=0.0,  # Deprecated - using tiered scoring now
-            short_interest_pct=short_interest_pct,
-            news_confluence_bonus=news_bonus,
-            news_reason=news_reason
-        )
+    if not rows or len(rows) < 20:
+        logger.warning(f"Insufficient OHLC data for {symbol}, using defaults")
+        return _create_default_targets(current_price, direction)
 
-        # =================================================================
-        # STEP 7: Calculate confluence score (0-5 base + news bonus up to +3)
-        # =================================================================
-        confluence_score = 0
-        confluence_methods = []
-
-        # +1 for valid Fib setup
-        if fib_valid:
-            confluence_score += 1
-            confluence_methods.append('fib')
-
-        # +1 for pivot alignment (within 3%)
-        if pivot_aligned:
-            confluence_score += 1
-            confluence_methods.append('pivot')
-
-        # +1 for Gann alignment (within 2%)
-        if gann.aligned:
-            confluence_score += 1
-            confluence_methods.append('gann')
-
-        # +1 for RSI divergence
-        if rsi_divergence.detected:
-            confluence_score += 1
-            confluence_methods.append('rsi')
-
-        # NEWS CATALYST: Tiered scoring (0-3 points based on keyword strength)
-        # - Tier 1 (FDA approval, bankruptcy, etc): +3
-        # - Strong Tier 2 (2+ keywords): +2
-        # - Single Tier 2: +1
-        # - Conflict or neutral: +0
-        if news_bonus > 0:
-            confluence_score += news_bonus
-            confluence_methods.append(f'news_{news_reason}')
-            logger.info(f"📰 {symbol}: news_bonus={news_bonus} ({news_reason})")
-
-        # Short squeeze is ALWAYS bullish (shorts covering = price up)
-        if direction == 'bullish' and short_interest_pct > 25.0:
-            confluence_score += 1
-            confluence_methods.append('short_squeeze')
-
-        # Earnings surprise boost
-        if has_earnings_catalyst and abs(earnings_surprise_pct) > 10.0:
-            confluence_score += 1
-            confluence_methods.append('earnings_surprise')
-
-        # =================================================================
-        # STEP 8: Determine which targets to show
-        # =================================================================
-        show_medium = should_show_medium_target(confluence_score)
-        show_moonshot = should_show_moonshot_target(
-            confluence_score,
-            has_earnings_catalyst,
-            short_interest_pct
-        )
+    return compute_confluence_targets(
+        symbol=symbol,
+        current_price=current_price,
+        direction=direction,
+        highs=[float(r['high_price']) for r in rows],
+        lows=[float(r['low_price']) for r in rows],
+        closes=[float(r['close_price']) for r in rows],
+        volumes=[float(r['volume'] or 0) for r in rows],
+        weekly_high=weekly_high,
+        weekly_low=weekly_low,
+        weekly_close=weekly_close,
+        has_earnings_catalyst=has_earnings_catalyst,
+        earnings_surprise_pct=earnings_surprise_pct,
+        headlines=headlines,
+        short_interest_pct=short_interest_pct,
+        news_score=news_score,
+        params=params
+    )
 
-        target_medium = target_medium_raw if show_medium else None
-        target_moonshot = target_moonshot_raw if show_moonshot else None
-
-        # =================================================================
-        # STEP 9: Sanity check - log if Fib math produced invalid targets
-        # Real swing geometry should always produce valid targets, but log if not
-        # =================================================================
-        if direction == 'bearish':
-            if target_primary >= current_price:
-                logger.warning(f"⚠️ {symbol}: Bearish target_primary ({target_primary:.2f}) >= current_price ({current_price:.2f}). Swing geometry may be inverted.")
-            if target_medium and target_medium >= target_primary:
-                logger.warning(f"⚠️ {symbol}: Bearish target_medium ({target_medium:.2f}) >= target_primary ({target_primary:.2f})")
-            if target_moonshot and target_moonshot >= (target_medium or target_primary):
-                logger.warning(f"⚠️ {symbol}: Bearish target_moonshot invalid ordering")
-        elif direction == 'bullish':
-            if target_primary <= current_price:
-                logger.warning(f"⚠️ {symbol}: Bullish target_primary ({target_primary:.2f}) <= current_price ({current_price:.2f}). Swing geometry may be inverted.")
 
-        return ConfluenceTargets(
-            direction=direction,
-            current_price=current_price,
-            swing_low=swing_low,
-            swing_high=swing_high,
-            target_primary=target_primary,
-            target_medium=target_medium,
-            target_moonshot=target_moonshot,
-            stop_loss=stop_loss,
-            confluence_score=confluence_score,
-            confluence_methods=confluence_methods,
-            weekly_pivots=weekly_pivots,
-            gann=gann,
-            rsi_divergence=rsi_divergence,
-            gann_alignment=gann.aligned,
-            catalyst=catalyst,
-            valid=fib_valid,
-            invalidation_reason=None if fib_valid else "Price outside 0.618 retracement",
-            atr_pct=atr_pct
-        )
+def compute_confluence_targets(
+    symbol: str,
+    current_price: float,
+    direction: str,
+    highs: List[float],
+    lows: List[float],
+    closes: List[float],
+    weekly_high: Optional[float] = None,
+    weekly_low: Optional[float] = None,
+    weekly_close: Optional[float] = None,
+    has_earnings_catalyst: bool = False,
+    earnings_surprise_pct: float = 0.0,
+    headlines: Optional[List[str]] = None,
+    short_interest_pct: float = 0.0,
+    params: Optional[ConfluenceParams] = None,
+    swings: Optional[List[SwingPoint]] = None,
+    rsi_values: Optional[List[float]] = None,
+    news_score: Optional[NewsCatalystScore] = None,
+    volumes: Optional[List[float]] = None
+) -> ConfluenceTargets:
+    """
+    Pure (no I/O) confluence calculation over OHLC lists (oldest first).
+
+    Same STEP 1-9 pipeline as calculate_confluence_targets – split out so the
+    backtest engine can replay it at every historical bar without a DB.
+
+    params: thresholds (default: load_confluence_params())
+    swings / rsi_values: optional precomputed detect_swings() (for the same
+        swing_min_pct/min_bars) and calculate_rsi() results – the parameter
+        sweep shares them across configurations
+    news_score: optional precomputed score (batch scoring), else headlines are scored here
+    volumes: optional daily volumes (same length) → volume profile / POC on the result
+    """
+    if len(closes) < 20:
+        return _create_default_targets(current_price, direction)
+
+    p = params or load_confluence_params()
+
+    # =================================================================
+    # STEP 1: Detect swings and calculate 3-tier Fibonacci extensions
+    # =================================================================
+    if swings is None:
+        swings = detect_swings(highs, lows, min_pct=p.swing_min_pct, min_bars=p.swing_min_bars)
+    swing_low, swing_high = get_last_completed_swing(
+        highs, lows, min_pct=p.swing_min_pct, min_bars=p.swing_min_bars, swings=swings
+    )
+
+    if swing_low is None or swing_high is None:
+        return _create_default_targets(current_price, direction)
+
+    swing_range = swing_high - swing_low
+    fib_618_ret = fib_retracement(swing_low, swing_high, 0.618)
+
+    # Get swing bars for true Gann calculation
+    swing_bars = max(1, len(closes) // 4)  # Default estimate
+    if len(swings) >= 2:
+        # Get actual bars between last two opposite swings
+        for i in range(len(swings) - 1, 0, -1):
+            if swings[i].is_high != swings[i-1].is_high:
+                swing_bars = abs(swings[i].index - swings[i-1].index)
+                break
+
+    # Calculate 3-tier targets
+    if direction == 'bullish':
+        target_primary = swing_high + swing_range * 1.0      # Fib 1.000 - ALWAYS shown
+        target_medium_raw = swing_high + swing_range * 1.272 # Fib 1.272
+        target_moonshot_raw = swing_high + swing_range * 1.618  # Fib 1.618
+        stop_loss = swing_low * 0.97
+        fib_valid = current_price > fib_618_ret
+        swing_for_gann = swing_low
+        swing_idx = next((s.index for s in swings if not s.is_high), 0)
+    else:  # bearish
+        # Bearish: True Fibonacci EXTENSIONS downward from swing geometry
+        # swing_range = swing_high - swing_low (same as bullish)
+        # Targets project BELOW swing_low using Fib ratios
+        target_primary = swing_low - swing_range * 1.0        # Fib 1.000 extension DOWN
+        target_medium_raw = swing_low - swing_range * 1.272   # Fib 1.272 extension DOWN
+        target_moonshot_raw = swing_low - swing_range * 1.618 # Fib 1.618 extension DOWN
+
+        # Ensure targets don't go negative
+        target_primary = max(0.01, target_primary)
+        target_medium_raw = max(0.01, target_medium_raw)
+        target_moonshot_raw = max(0.01, target_moonshot_raw)
+
+        stop_loss = swing_high * 1.03
+        fib_valid = current_price < fib_618_ret
+        swing_for_gann = swing_high
+        swing_idx = next((s.index for s in swings if s.is_high), 0)
+
+    # =================================================================
+    # STEP 2: Calculate weekly pivots
+    # =================================================================
+    weekly_pivots = None
+    pivot_aligned = False
+
+    if weekly_high and weekly_low and weekly_close:
+        weekly_pivots = calculate_weekly_pivots(weekly_high, weekly_low, weekly_close)
+        pivot_aligned = is_near_pivot(target_primary, weekly_pivots, threshold_pct=p.pivot_threshold_pct)
+    else:
+        # Use last 5 days as pseudo-weekly
+        if len(highs) >= 5:
+            weekly_pivots = calculate_weekly_pivots(
+                max(highs[-5:]), min(lows[-5:]), closes[-1]
+            )
+            pivot_aligned = is_near_pivot(target_primary, weekly_pivots, threshold_pct=p.pivot_threshold_pct)
+
+    # Volume profile: POC / value area over the same window (if volumes given)
+    profile = None
+    poc_aligned = False
+    if volumes is not None and len(volumes) == len(closes):
+        profile = volume_profile(closes, volumes, min(lows), max(highs))
+        if profile is not None and target_primary > 0:
+            poc_aligned = any(
+                abs(target_primary - level) / target_primary * 100 <= p.poc_threshold_pct
+                for level in (profile.poc, profile.value_area_low, profile.value_area_high)
+            )
+
+    # =================================================================
+    # STEP 3: Calculate Gann projection (TRUE volatility-scaled)
+    # =================================================================
+    current_idx = len(closes) - 1
+    gann, current_1x1 = calculate_gann_projection(
+        swing_price=swing_for_gann,
+        swing_index=swing_idx,
+        current_index=current_idx,
+        swing_range=swing_range,
+        actual_swing_bars=swing_bars,  # NEW: actual bars for true 1×1
+        direction=direction,
+        projection_days=30
+    )
+    gann.aligned = check_gann_alignment(current_price, current_1x1, threshold_pct=p.gann_threshold_pct)
+
+    # =================================================================
+    # STEP 4: Detect RSI divergence
+    # =================================================================
+    rsi_divergence = detect_rsi_divergence(swings, closes, direction, rsi_values=rsi_values)
+
+    # =================================================================
+    # STEP 5: Calculate ATR
+    # =================================================================
+    atr = calculate_atr(highs, lows, closes, period=14)
+    atr_pct = (atr / current_price * 100) if current_price > 0 else 0
+
+    # =================================================================
+    # STEP 6: Score news catalyst using tiered keyword system
+    # =================================================================
+    if news_score is None:
+        news_score = score_news_catalyst_detailed(headlines or [], direction)
+    news_bonus, news_reason = news_score.as_tuple()
+    has_news_catalyst = news_bonus > 0
+
+    # Build catalyst flags with scored news data
+    catalyst = CatalystFlags(
+        has_earnings=has_earnings_catalyst,
+        earnings_surprise_pct=earnings_surprise_pct,
+        has_news_catalyst=has_news_catalyst,
+        news_sentiment=0.0,  # Deprecated - using tiered scoring now
+        short_interest_pct=short_interest_pct,
+        news_confluence_bonus=news_bonus,
+        news_reason=news_reason,
+        news_matches=news_score.matches
+    )
+
+    # =================================================================
+    # STEP 7: Calculate confluence score (0-5 base + news bonus up to +3)
+    # =================================================================
+    confluence_score = 0
+    confluence_methods = []
+
+    # +1 for valid Fib setup
+    if fib_valid:
+        confluence_score += 1
+        confluence_methods.append('fib')
+
+    # +1 for pivot alignment (within pivot_threshold_pct, default 3%)
+    if pivot_aligned:
+        confluence_score += 1
+        confluence_methods.append('pivot')
+
+    # +1 for Gann alignment (within gann_threshold_pct, default 2%)
+    if gann.aligned:
+        confluence_score += 1
+        confluence_methods.append('gann')
+
+    # +1 for RSI divergence
+    if rsi_divergence.detected:
+        confluence_score += 1
+        confluence_methods.append('rsi')
+
+    # +1 for target on POC / value-area edge (opt-in, default off)
+    if p.volume_profile_confluence and poc_aligned:
+        confluence_score += 1
+        confluence_methods.append('volume_poc')
+
+    # NEWS CATALYST: Tiered scoring (0-3 points based on keyword strength)
+    # - Tier 1 (FDA approval, bankruptcy, etc): +3
+    # - Strong Tier 2 (2+ keywords): +2
+    # - Single Tier 2: +1
+    # - Conflict or neutral: +0
+    if news_bonus > 0:
+        confluence_score += news_bonus
+        confluence_methods.append(f'news_{news_reason}')
+        logger.info(f"📰 {symbol}: news_bonus={news_bonus} ({news_reason})")
+
+    # Short squeeze is ALWAYS bullish (shorts covering = price up)
+    if direction == 'bullish' and short_interest_pct > p.short_squeeze_pct:
+        confluence_score += 1
+        confluence_methods.append('short_squeeze')
+
+    # Earnings surprise boost
+    if has_earnings_catalyst and abs(earnings_surprise_pct) > 10.0:
+        confluence_score += 1
+        confluence_methods.append('earnings_surprise')
+
+    # =================================================================
+    # STEP 8: Determine which targets to show
+    # =================================================================
+    show_medium = should_show_medium_target(confluence_score)
+    show_moonshot = should_show_moonshot_target(
+        confluence_score,
+        has_earnings_catalyst,
+        short_interest_pct,
+        short_squeeze_pct=p.short_squeeze_pct
+    )
+
+    target_medium = target_medium_raw if show_medium else None
+    target_moonshot = target_moonshot_raw if show_moonshot else None
+
+    # =================================================================
+    # STEP 9: Sanity check - log if Fib math produced invalid targets
+    # Real swing geometry should always produce valid targets, but log if not
+    # =================================================================
+    if direction == 'bearish':
+        if target_primary >= current_price:
+            logger.warning(f"⚠️ {symbol}: Bearish target_primary ({target_primary:.2f}) >= current_price ({current_price:.2f}). Swing geometry may be inverted.")
+        if target_medium and target_medium >= target_primary:
+            logger.warning(f"⚠️ {symbol}: Bearish target_medium ({target_medium:.2f}) >= target_primary ({target_primary:.2f})")
+        if target_moonshot and target_moonshot >= (target_medium or target_primary):
+            logger.warning(f"⚠️ {symbol}: Bearish target_moonshot invalid ordering")
+    elif direction == 'bullish':
+        if target_primary <= current_price:
+            logger.warning(f"⚠️ {symbol}: Bullish target_primary ({target_primary:.2f}) <= current_price ({current_price:.2f}). Swing geometry may be inverted.")
+
+    return ConfluenceTargets(
+        direction=direction,
+        current_price=current_price,
+        swing_low=swing_low,
+        swing_high=swing_high,
+        target_primary=target_primary,
+        target_medium=target_medium,
+        target_moonshot=target_moonshot,
+        stop_loss=stop_loss,
+        confluence_score=confluence_score,
+        confluence_methods=confluence_methods,
+        weekly_pivots=weekly_pivots,
+        gann=gann,
+        rsi_divergence=rsi_divergence,
+        gann_alignment=gann.aligned,
+        catalyst=catalyst,
+        valid=fib_valid,
+        invalidation_reason=None if fib_valid else "Price outside 0.618 retracement",
+        atr_pct=atr_pct,
+        volume_profile=profile,
+        poc_alignment=poc_aligned
+    )
 
 
 def _create_default_targets(current_price: float, direction: str) -> ConfluenceTargets:
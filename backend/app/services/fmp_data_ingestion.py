@@ -145,6 +145,7 @@ class FMPIngestion:
         await self._fetch_1d_batch(active)
         DAILY_DATA_MB = self.daily_mb
         logger.info(f"DAILY DELTA DONE – {len(active)} symbols – {self.daily_mb:.3f} GB")
+        await self._advance_indicator_state(active)
 
     async def catchup_7days(self):
         """Catch up last 7 days for all stocks already in database"""
@@ -180,6 +181,15 @@ class FMPIngestion:
             })
 
         logger.info(f"7-DAY CATCHUP COMPLETE – {len(symbols)} symbols – {self.daily_mb:.2f} GB")
+        await self._advance_indicator_state(symbols)
+
+    async def _advance_indicator_state(self, symbols: List[str]):
+        """Fold the new bars into running RSI/ATR/EMA state (non-fatal)"""
+        from .indicator_state import advance_indicator_states
+        try:
+            await advance_indicator_states(symbols)
+        except Exception as e:
+            logger.warning(f"Indicator state advance failed (readers fall back to full recompute): {e}")
 
     async def _fetch_90d_batch(self, symbols: List[str]):
         """Fetch 90 days of data in smaller chunks to avoid connection pool exhaustion"""
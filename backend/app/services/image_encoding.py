@@ -0,0 +1,130 @@
+# backend/app/services/image_encoding.py
+"""
+Chart Image Encoding – BullsBears v6
+One rendered PNG in → size-tuned variants out (runs inside the render workers).
+
+- vision: palette PNG (quantized, no dither) stepped down until it fits
+  VISION_IMAGE_MAX_BYTES, WebP as a last resort → smaller base64 payload
+- share:  full-size palette PNG (charts are flat colours – ~3x smaller
+  than matplotlib's truecolour PNG, visually identical)
+- thumb:  THUMB_WIDTH-wide WebP for list views
+
+Matplotlib output is mostly flat fills and antialiased lines, so a
+256-colour median-cut palette keeps text and candles crisp.
+"""
+
+import io
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from PIL import Image
+
+from app.core.config import settings
+
+SHARE_COLORS = 256
+VISION_COLOR_LADDER = (256, 128, 64, 32)   # Tried in order until under budget
+VISION_WEBP_QUALITY = (80, 60)             # Fallback if no palette PNG fits
+THUMB_WIDTH = 320
+THUMB_WEBP_QUALITY = 80
+
+MIME_EXTENSIONS = {
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/jpeg": "jpg",
+}
+
+VARIANTS = ("vision", "share", "thumb")
+
+
+@dataclass
+class EncodedImage:
+    data: bytes
+    mime: str
+    width: int
+    height: int
+
+    @property
+    def ext(self) -> str:
+        return MIME_EXTENSIONS.get(self.mime, "bin")
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+def sniff_mime(data: bytes) -> str:
+    """Content type from magic bytes (spooled / downloaded chart images)"""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    return "application/octet-stream"
+
+
+def image_size(data: bytes) -> Optional[tuple]:
+    """(width, height) from the image header, without decoding pixels"""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def _encoded(img: Image.Image, fmt: str, mime: str, **save_kwargs) -> EncodedImage:
+    buf = io.BytesIO()
+    img.save(buf, fmt, **save_kwargs)
+    return EncodedImage(buf.getvalue(), mime, img.width, img.height)
+
+
+def encode_png8(img: Image.Image, colors: int = SHARE_COLORS) -> EncodedImage:
+    """Quantized palette PNG (median cut, no dithering)"""
+    palette = img.quantize(colors=colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    return _encoded(palette, "PNG", "image/png", optimize=True)
+
+
+def encode_webp(img: Image.Image, quality: int = 80) -> EncodedImage:
+    return _encoded(img, "WEBP", "image/webp", quality=quality, method=4)
+
+
+def encode_budgeted(img: Image.Image, max_bytes: int) -> EncodedImage:
+    """First palette PNG / WebP rung that fits max_bytes; smallest attempt otherwise"""
+    best = None
+    for colors in VISION_COLOR_LADDER:
+        candidate = encode_png8(img, colors)
+        if len(candidate) <= max_bytes:
+            return candidate
+        best = candidate if best is None or len(candidate) < len(best) else best
+    for quality in VISION_WEBP_QUALITY:
+        candidate = encode_webp(img, quality)
+        if len(candidate) <= max_bytes:
+            return candidate
+        best = candidate if len(candidate) < len(best) else best
+    return best
+
+
+def encode_thumbnail(img: Image.Image, width: int = THUMB_WIDTH) -> EncodedImage:
+    thumb = img.copy()
+    if thumb.width > width:
+        thumb = thumb.resize((width, round(thumb.height * width / thumb.width)), Image.LANCZOS)
+    return encode_webp(thumb, THUMB_WEBP_QUALITY)
+
+
+def encode_variants(
+    png_bytes: bytes,
+    variants: Iterable[str] = VARIANTS,
+    vision_max_bytes: Optional[int] = None,
+) -> Dict[str, EncodedImage]:
+    """Decode the rendered PNG once, encode every requested variant from it"""
+    img = Image.open(io.BytesIO(png_bytes)).convert("RGB")
+    out: Dict[str, EncodedImage] = {}
+    for name in variants:
+        if name == "vision":
+            out[name] = encode_budgeted(img, vision_max_bytes or settings.VISION_IMAGE_MAX_BYTES)
+        elif name == "share":
+            out[name] = encode_png8(img, SHARE_COLORS)
+        elif name == "thumb":
+            out[name] = encode_thumbnail(img)
+        else:
+            raise ValueError(f"Unknown image variant: {name}")
+    return out
@@ -0,0 +1,362 @@
+# backend/app/services/indicator_state.py
+"""
+Indicator State Store – BullsBears v5.2
+Running Wilder averages per symbol, advanced one bar per daily delta.
+
+Instead of recomputing RSI / ATR / EMAs / 30d volatility from the full
+90-day series on every read, each symbol keeps its running state in the
+`indicator_state` table:
+
+- RSI(14) + ATR(14): running mean during warm-up (identical to the SMA seed
+  used by fib_calculator.calculate_rsi), Wilder smoothing afterwards
+- EMA(12/26/50): SMA seed, then standard 2/(n+1) smoothing
+- volatility_30d: sample stdev of intraday returns over the last 21 bars
+  (same formula as the prescreen SQL)
+
+Reads are O(1) per symbol and the lookback is no longer capped by the
+90-day window. A symbol is reseeded from stored history (that symbol only)
+when its past bars change underneath the state:
+- FMP re-posts yesterday's bar and quote-short fallback bars get replaced
+  by full OHLC → any changed O/H/L/C on last_date
+- catch-up backfills insert bars dated before last_date → more stored bars
+  up to last_date than the state has folded (window_bars)
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+
+from app.core.database import get_asyncpg_pool
+
+logger = logging.getLogger(__name__)
+
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+EMA_PERIODS = (12, 26, 50)
+VOLATILITY_WINDOW = 21          # ~30 calendar days of trading bars
+PRICE_TOLERANCE = 1e-6          # Revision detection on the last bar's OHLC
+
+
+def _wilder(avg: Optional[float], value: float, count: int, period: int) -> float:
+    """Running mean for the first `period` samples, Wilder smoothing after."""
+    if avg is None:
+        return value
+    return avg + (value - avg) / min(count, period)
+
+
+@dataclass
+class IndicatorState:
+    """Per-symbol running indicator state"""
+    symbol: str
+    last_date: Optional[date] = None
+    last_close: Optional[float] = None
+    last_open: Optional[float] = None
+    last_high: Optional[float] = None
+    last_low: Optional[float] = None
+    bars_seen: int = 0
+    window_bars: int = 0        # Stored bars dated <= last_date when last advanced
+    avg_gain: Optional[float] = None
+    avg_loss: Optional[float] = None
+    atr: Optional[float] = None
+    emas: Dict[int, float] = field(default_factory=dict)
+    return_window: List[float] = field(default_factory=list)
+
+    def advance(self, bar_date: date, open_price: float, high: float, low: float, close: float):
+        """Fold one new daily bar into the state (O(1))."""
+        if self.last_close is not None:
+            # bars_seen before increment == number of price changes incl. this one
+            changes = self.bars_seen
+            change = close - self.last_close
+            self.avg_gain = _wilder(self.avg_gain, max(0.0, change), changes, RSI_PERIOD)
+            self.avg_loss = _wilder(self.avg_loss, max(0.0, -change), changes, RSI_PERIOD)
+
+            true_range = max(high - low, abs(high - self.last_close), abs(low - self.last_close))
+            self.atr = _wilder(self.atr, true_range, changes, ATR_PERIOD)
+
+        self.bars_seen += 1
+        for period in EMA_PERIODS:
+            prev = self.emas.get(period)
+            if prev is None:
+                self.emas[period] = close
+            elif self.bars_seen <= period:
+                self.emas[period] = prev + (close - prev) / self.bars_seen
+            else:
+                self.emas[period] = prev + (close - prev) * 2 / (period + 1)
+
+        if open_price:
+            self.return_window.append((close - open_price) / open_price * 100)
+            del self.return_window[:-VOLATILITY_WINDOW]
+
+        self.last_date = bar_date
+        self.last_close = close
+        self.last_open, self.last_high, self.last_low = open_price, high, low
+        self.window_bars += 1
+
+    def is_revised(self, open_price: float, high: float, low: float, close: float) -> bool:
+        """The stored bar on last_date no longer matches what was folded in"""
+        folded = (self.last_open, self.last_high, self.last_low, self.last_close)
+        if any(v is None for v in folded):
+            return True         # State from before OHLC was tracked – reseed once
+        return any(abs(new - old) > PRICE_TOLERANCE for new, old in zip((open_price, high, low, close), folded))
+
+    @property
+    def rsi(self) -> Optional[float]:
+        """Wilder RSI(14), None until the seed window is complete"""
+        if self.bars_seen - 1 < RSI_PERIOD or self.avg_loss is None:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+    @property
+    def atr_value(self) -> Optional[float]:
+        """Wilder ATR(14), None until the seed window is complete"""
+        if self.bars_seen - 1 < ATR_PERIOD:
+            return None
+        return self.atr
+
+    def ema(self, period: int) -> Optional[float]:
+        if self.bars_seen < period:
+            return None
+        return self.emas.get(period)
+
+    @property
+    def volatility(self) -> Optional[float]:
+        """Sample stdev of intraday returns (%) over the volatility window"""
+        n = len(self.return_window)
+        if n < 2:
+            return None
+        mean = sum(self.return_window) / n
+        return math.sqrt(sum((r - mean) ** 2 for r in self.return_window) / (n - 1))
+
+    def snapshot(self) -> Dict:
+        return {
+            "symbol": self.symbol,
+            "date": self.last_date.isoformat() if self.last_date else None,
+            "close": self.last_close,
+            "rsi_14": round(self.rsi, 2) if self.rsi is not None else None,
+            "atr_14": round(self.atr_value, 4) if self.atr_value is not None else None,
+            **{f"ema_{p}": round(self.ema(p), 4) if self.ema(p) is not None else None for p in EMA_PERIODS},
+            "volatility_30d": round(self.volatility, 2) if self.volatility is not None else None,
+            "bars_seen": self.bars_seen,
+        }
+
+
+def _bar_prices(row) -> tuple:
+    """(open, high, low, close) floats from a prime_ohlc_90d row"""
+    return (
+        float(row["open_price"] or 0),
+        float(row["high_price"]),
+        float(row["low_price"]),
+        float(row["close_price"]),
+    )
+
+
+# =============================================================================
+# PERSISTENCE
+# =============================================================================
+
+async def ensure_indicator_state_table(conn):
+    """Idempotent – also created by db_migration v6"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS indicator_state (
+            symbol VARCHAR(10) PRIMARY KEY,
+            last_date DATE NOT NULL,
+            last_close DOUBLE PRECISION NOT NULL,
+            last_open DOUBLE PRECISION,
+            last_high DOUBLE PRECISION,
+            last_low DOUBLE PRECISION,
+            bars_seen INTEGER NOT NULL DEFAULT 0,
+            window_bars INTEGER NOT NULL DEFAULT 0,
+            avg_gain DOUBLE PRECISION,
+            avg_loss DOUBLE PRECISION,
+            atr DOUBLE PRECISION,
+            ema_12 DOUBLE PRECISION,
+            ema_26 DOUBLE PRECISION,
+            ema_50 DOUBLE PRECISION,
+            return_window DOUBLE PRECISION[] NOT NULL DEFAULT '{}',
+            rsi_14 DOUBLE PRECISION,
+            atr_14 DOUBLE PRECISION,
+            volatility_30d DOUBLE PRECISION,
+            updated_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    await conn.execute("""
+        ALTER TABLE indicator_state
+            ADD COLUMN IF NOT EXISTS last_open DOUBLE PRECISION,
+            ADD COLUMN IF NOT EXISTS last_high DOUBLE PRECISION,
+            ADD COLUMN IF NOT EXISTS last_low DOUBLE PRECISION,
+            ADD COLUMN IF NOT EXISTS window_bars INTEGER NOT NULL DEFAULT 0
+    """)
+
+
+def _state_from_row(row) -> IndicatorState:
+    return IndicatorState(
+        symbol=row["symbol"],
+        last_date=row["last_date"],
+        last_close=row["last_close"],
+        last_open=row["last_open"],
+        last_high=row["last_high"],
+        last_low=row["last_low"],
+        bars_seen=row["bars_seen"],
+        window_bars=row["window_bars"],
+        avg_gain=row["avg_gain"],
+        avg_loss=row["avg_loss"],
+        atr=row["atr"],
+        emas={p: row[f"ema_{p}"] for p in EMA_PERIODS if row[f"ema_{p}"] is not None},
+        return_window=list(row["return_window"] or []),
+    )
+
+
+def _state_to_args(state: IndicatorState) -> tuple:
+    return (
+        state.symbol,
+        state.last_date,
+        state.last_close,
+        state.last_open,
+        state.last_high,
+        state.last_low,
+        state.bars_seen,
+        state.window_bars,
+        state.avg_gain,
+        state.avg_loss,
+        state.atr,
+        *(state.emas.get(p) for p in EMA_PERIODS),
+        state.return_window,
+        state.rsi,
+        state.atr_value,
+        state.volatility,
+    )
+
+
+UPSERT_SQL = """
+    INSERT INTO indicator_state (
+        symbol, last_date, last_close, last_open, last_high, last_low, bars_seen, window_bars,
+        avg_gain, avg_loss, atr, ema_12, ema_26, ema_50, return_window, rsi_14, atr_14,
+        volatility_30d, updated_at
+    )
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, NOW())
+    ON CONFLICT (symbol) DO UPDATE SET
+        last_date = EXCLUDED.last_date,
+        last_close = EXCLUDED.last_close,
+        last_open = EXCLUDED.last_open,
+        last_high = EXCLUDED.last_high,
+        last_low = EXCLUDED.last_low,
+        bars_seen = EXCLUDED.bars_seen,
+        window_bars = EXCLUDED.window_bars,
+        avg_gain = EXCLUDED.avg_gain,
+        avg_loss = EXCLUDED.avg_loss,
+        atr = EXCLUDED.atr,
+        ema_12 = EXCLUDED.ema_12,
+        ema_26 = EXCLUDED.ema_26,
+        ema_50 = EXCLUDED.ema_50,
+        return_window = EXCLUDED.return_window,
+        rsi_14 = EXCLUDED.rsi_14,
+        atr_14 = EXCLUDED.atr_14,
+        volatility_30d = EXCLUDED.volatility_30d,
+        updated_at = NOW()
+"""
+
+
+async def get_indicator_states(symbols: List[str]) -> Dict[str, IndicatorState]:
+    """O(1) read of current state for each symbol"""
+    db = await get_asyncpg_pool()
+    async with db.acquire() as conn:
+        await ensure_indicator_state_table(conn)
+        rows = await conn.fetch(
+            "SELECT * FROM indicator_state WHERE symbol = ANY($1::text[])", symbols
+        )
+    return {r["symbol"]: _state_from_row(r) for r in rows}
+
+
+async def advance_indicator_states(symbols: Optional[List[str]] = None) -> Dict:
+    """
+    Advance stored state through any bars newer than last_date.
+    Called after every FMP delta/catchup. Symbols without state, with a
+    revised last bar or with backfilled older bars are reseeded from the
+    full stored history.
+    """
+    db = await get_asyncpg_pool()
+    async with db.acquire() as conn:
+        await ensure_indicator_state_table(conn)
+
+        if symbols is None:
+            rows = await conn.fetch("SELECT DISTINCT symbol FROM prime_ohlc_90d")
+            symbols = [r["symbol"] for r in rows]
+        if not symbols:
+            return {"advanced": 0, "reseeded": 0, "bars": 0}
+
+        state_rows = await conn.fetch(
+            "SELECT * FROM indicator_state WHERE symbol = ANY($1::text[])", symbols
+        )
+        states = {r["symbol"]: _state_from_row(r) for r in state_rows}
+
+        # Only bars on/after each symbol's last_date (the one on last_date is the revision check)
+        bar_rows = await conn.fetch("""
+            SELECT o.symbol, o.date, o.open_price, o.high_price, o.low_price, o.close_price
+            FROM prime_ohlc_90d o
+            LEFT JOIN indicator_state s ON s.symbol = o.symbol
+            WHERE o.symbol = ANY($1::text[])
+              AND (s.last_date IS NULL OR o.date >= s.last_date)
+            ORDER BY o.symbol, o.date
+        """, symbols)
+        # Stored bars up to last_date – more than the state folded means a backfill landed
+        count_rows = await conn.fetch("""
+            SELECT o.symbol, COUNT(*) AS n
+            FROM prime_ohlc_90d o
+            JOIN indicator_state s ON s.symbol = o.symbol
+            WHERE o.symbol = ANY($1::text[]) AND o.date <= s.last_date
+            GROUP BY o.symbol
+        """, symbols)
+        stored_bars = {r["symbol"]: r["n"] for r in count_rows}
+
+        new_bars: Dict[str, List] = {}
+        reseed = set(s for s in symbols if s not in states)
+        for sym, n in stored_bars.items():
+            if n > states[sym].window_bars:
+                reseed.add(sym)
+        for r in bar_rows:
+            sym = r["symbol"]
+            state = states.get(sym)
+            if state is not None and r["date"] == state.last_date:
+                if state.is_revised(*_bar_prices(r)):
+                    reseed.add(sym)
+                continue
+            new_bars.setdefault(sym, []).append(r)
+
+        if reseed:
+            # Full history for reseeded symbols (no state, revised last bar or backfill)
+            bar_rows = await conn.fetch("""
+                SELECT symbol, date, open_price, high_price, low_price, close_price
+                FROM prime_ohlc_90d
+                WHERE symbol = ANY($1::text[])
+                ORDER BY symbol, date
+            """, list(reseed))
+            for sym in reseed:
+                states[sym] = IndicatorState(symbol=sym)
+                new_bars[sym] = []
+            for r in bar_rows:
+                new_bars[r["symbol"]].append(r)
+
+        updated = []
+        total_bars = 0
+        for sym, bars in new_bars.items():
+            if not bars:
+                continue
+            state = states[sym]
+            if sym not in reseed:
+                state.window_bars = stored_bars.get(sym, state.window_bars)
+            for r in bars:
+                state.advance(r["date"], *_bar_prices(r))
+            total_bars += len(bars)
+            updated.append(state)
+
+        if updated:
+            await conn.executemany(UPSERT_SQL, [_state_to_args(s) for s in updated])
+
+    reseeded = sum(1 for s in updated if s.symbol in reseed)
+    result = {"advanced": len(updated) - reseeded, "reseeded": reseeded, "bars": total_bars}
+    logger.info(f"Indicator state: {result['advanced']} advanced, {result['reseeded']} reseeded, {total_bars} bars folded")
+    return result
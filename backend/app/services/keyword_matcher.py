@@ -0,0 +1,100 @@
+# backend/app/services/keyword_matcher.py
+"""
+Multi-pattern keyword matcher (Aho-Corasick) – BullsBears v6
+Build once, scan any text for every keyword of every group in one pass.
+
+- Case-insensitive (patterns and text are lowercased)
+- Optional word boundaries: "sec" no longer fires on "second"/"sector",
+  "beat" no longer fires inside "upbeat". The end boundary lets plain
+  inflections through ("downgrades", "upgraded", "launches", "delaying"),
+  which the old substring check matched
+- Returns matched spans + group label for explainability
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    start: int      # Offset into the lowercased text
+    end: int        # Exclusive
+    keyword: str
+    label: str      # Group the keyword belongs to
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over labelled keyword groups"""
+
+    # Word endings allowed straight after a keyword with word_boundary on
+    INFLECTIONS = frozenset({"s", "es", "d", "ed", "ing"})
+
+    def __init__(self, groups: Dict[str, Iterable[str]], word_boundary: bool = True):
+        self.word_boundary = word_boundary
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, str]]] = [[]]
+
+        for label, keywords in groups.items():
+            for kw in keywords:
+                self._add(kw.lower(), label)
+        self._build_failure_links()
+
+    def _add(self, keyword: str, label: str):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if (keyword, label) not in self._out[state]:
+            self._out[state].append((keyword, label))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Inherit outputs of the longest proper suffix
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[KeywordMatch]:
+        """Single left-to-right scan; overlapping matches are all reported"""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for keyword, label in out[state]:
+                start = i - len(keyword) + 1
+                if self.word_boundary and (
+                    (start > 0 and text[start - 1].isalnum()) or
+                    not self._ends_word(text, i + 1, n)
+                ):
+                    continue
+                yield KeywordMatch(start, i + 1, keyword, label)
+
+    def _ends_word(self, text: str, end: int, n: int) -> bool:
+        """Keyword ends the word, or only an inflection follows it"""
+        tail = end
+        while tail < n and text[tail].isalnum():
+            tail += 1
+        return tail == end or text[end:tail] in self.INFLECTIONS
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        return list(self.iter_matches(text))
@@ -0,0 +1,263 @@
+# backend/app/services/llm_breaker.py
+"""
+LLM Circuit Breakers – BullsBears v6
+One breaker per provider/model endpoint, so an outage costs a few timeouts
+instead of 75 – the rest of the run short-circuits straight to each agent's
+degraded result (vision → DEFAULT_FLAGS, social → last stored read or
+neutral, prescreen → rule-based list, arbitrator → failover provider).
+
+- closed → open after LLM_BREAKER_FAILURES consecutive failed attempts
+  (transport errors, timeouts, 429 / 5xx) – attempts slower than
+  LLM_BREAKER_SLOW_S count as failures too
+- open: calls raise CircuitOpenError immediately for the open window
+  (LLM_BREAKER_OPEN_S, doubled after each failed probe up to
+  LLM_BREAKER_OPEN_MAX_S)
+- half-open: after the window one caller (Redis SET NX) sends a probe –
+  success closes the breaker, failure re-opens it
+- State lives in Redis hashes (llmbreaker:<provider>/<model>) shared by API
+  and worker processes; without Redis each process keeps its own state
+
+Visible in GET /admin/health, reset with DELETE /admin/llm/breakers.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.services.llm_cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llmbreaker:"
+PROBE_SUFFIX = ":probe"
+PROBE_TTL_S = 120               # A probe that never reports back frees the slot
+REDIS_TIMEOUT = 1
+REDIS_BACKOFF_S = 30            # After a Redis error, use local state this long
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_local: Dict[str, Dict[str, Any]] = {}     # Fallback when Redis is unavailable
+_redis_retry_at = 0.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Call short-circuited – the endpoint's breaker is open"""
+
+    def __init__(self, name: str, retry_in_s: float):
+        super().__init__(f"Circuit open for {name} (probe in {retry_in_s:.0f}s)")
+        self.name = name
+        self.retry_in_s = retry_in_s
+
+
+def breaker_name(provider: str, model: str) -> str:
+    return f"{provider}/{model}"
+
+
+# =============================================================================
+# STATE STORE
+# =============================================================================
+
+def _redis():
+    """Shared client, or None while Redis is missing / recently failed (no per-call timeouts)"""
+    return get_redis() if time.time() >= _redis_retry_at else None
+
+
+def _redis_failed(e: Exception):
+    global _redis_retry_at
+    _redis_retry_at = time.time() + REDIS_BACKOFF_S
+    logger.debug(f"Breaker Redis unavailable, using local state for {REDIS_BACKOFF_S}s: {e}")
+
+
+def _decode(raw: Dict[Any, Any]) -> Dict[str, Any]:
+    state = {}
+    for k, v in raw.items():
+        k = k.decode() if isinstance(k, bytes) else k
+        v = v.decode() if isinstance(v, bytes) else v
+        state[k] = v
+    return state
+
+
+async def _load(name: str) -> Dict[str, Any]:
+    client = _redis()
+    if client is not None:
+        try:
+            raw = await asyncio.wait_for(client.hgetall(KEY_PREFIX + name), timeout=REDIS_TIMEOUT)
+            return _decode(raw)
+        except Exception as e:
+            _redis_failed(e)
+    return dict(_local.get(name, {}))
+
+
+async def _save(name: str, fields: Dict[str, Any]):
+    _local.setdefault(name, {}).update(fields)
+    client = _redis()
+    if client is None:
+        return
+    try:
+        await asyncio.wait_for(
+            client.hset(KEY_PREFIX + name, mapping={k: str(v) for k, v in fields.items()}),
+            timeout=REDIS_TIMEOUT,
+        )
+    except Exception as e:
+        _redis_failed(e)
+
+
+async def _incr_failures(name: str) -> int:
+    local = _local.setdefault(name, {})
+    local["failures"] = int(local.get("failures", 0)) + 1
+    client = _redis()
+    if client is None:
+        return local["failures"]
+    try:
+        return int(await asyncio.wait_for(client.hincrby(KEY_PREFIX + name, "failures", 1), timeout=REDIS_TIMEOUT))
+    except Exception as e:
+        _redis_failed(e)
+        return local["failures"]
+
+
+async def _claim_probe(name: str) -> bool:
+    """Exactly one caller (across processes) gets to probe a half-open breaker"""
+    client = _redis()
+    if client is None:
+        local = _local.setdefault(name, {})
+        if time.time() < float(local.get("probe_until", 0)):
+            return False
+        local["probe_until"] = time.time() + PROBE_TTL_S
+        return True
+    try:
+        return bool(await asyncio.wait_for(
+            client.set(KEY_PREFIX + name + PROBE_SUFFIX, "1", nx=True, ex=PROBE_TTL_S),
+            timeout=REDIS_TIMEOUT,
+        ))
+    except Exception as e:
+        _redis_failed(e)
+        return True
+
+
+async def _release_probe(name: str):
+    _local.get(name, {}).pop("probe_until", None)
+    client = _redis()
+    if client is None:
+        return
+    try:
+        await asyncio.wait_for(client.delete(KEY_PREFIX + name + PROBE_SUFFIX), timeout=REDIS_TIMEOUT)
+    except Exception as e:
+        _redis_failed(e)
+
+
+# =============================================================================
+# BREAKER
+# =============================================================================
+
+async def allow_call(name: str):
+    """Raise CircuitOpenError unless the endpoint may be called (closed, or this is the probe)"""
+    if not settings.LLM_BREAKER_ENABLED:
+        return
+    state = await _load(name)
+    if state.get("state", CLOSED) == CLOSED:
+        return
+    retry_in = float(state.get("opened_at", 0)) + float(state.get("open_s", 0)) - time.time()
+    if retry_in > 0 or not await _claim_probe(name):
+        raise CircuitOpenError(name, max(retry_in, 0.0))
+    if state.get("state") != HALF_OPEN:
+        await _save(name, {"state": HALF_OPEN})
+        logger.info(f"LLM breaker {name}: half-open, sending probe")
+
+
+async def record_success(name: str, latency_ms: float):
+    if not settings.LLM_BREAKER_ENABLED:
+        return
+    if settings.LLM_BREAKER_SLOW_S and latency_ms > settings.LLM_BREAKER_SLOW_S * 1000:
+        await record_failure(name, f"slow: {latency_ms / 1000:.1f}s")
+        return
+    state = await _load(name)
+    if state.get("state", CLOSED) != CLOSED:
+        logger.info(f"LLM breaker {name}: closed (probe succeeded)")
+        await _save(name, {"state": CLOSED, "failures": 0, "open_s": 0, "updated_at": time.time()})
+        await _release_probe(name)
+    elif int(state.get("failures", 0)):
+        await _save(name, {"failures": 0})
+
+
+async def record_failure(name: str, error: str):
+    if not settings.LLM_BREAKER_ENABLED:
+        return
+    state = await _load(name)
+    current = state.get("state", CLOSED)
+    failures = await _incr_failures(name)
+    now = time.time()
+
+    if current == HALF_OPEN:
+        # Failed probe – open again for twice as long
+        open_s = min(float(state.get("open_s") or settings.LLM_BREAKER_OPEN_S) * 2, settings.LLM_BREAKER_OPEN_MAX_S)
+    elif current == CLOSED and failures >= settings.LLM_BREAKER_FAILURES:
+        open_s = settings.LLM_BREAKER_OPEN_S
+    else:
+        await _save(name, {"last_error": error[:200]})
+        return
+
+    logger.warning(f"LLM breaker {name}: OPEN for {open_s:.0f}s after {failures} failures ({error[:120]})")
+    await _save(name, {
+        "state": OPEN,
+        "opened_at": now,
+        "open_s": open_s,
+        "trips": int(state.get("trips", 0)) + 1,
+        "last_error": error[:200],
+        "updated_at": now,
+    })
+    await _release_probe(name)
+
+
+async def is_circuit_open(provider: str, model: str) -> bool:
+    """Breaker is not closed (open or probing) – agents use this to pick their degraded result"""
+    if not settings.LLM_BREAKER_ENABLED:
+        return False
+    return (await _load(breaker_name(provider, model))).get("state", CLOSED) != CLOSED
+
+
+# =============================================================================
+# ADMIN
+# =============================================================================
+
+async def get_breakers() -> Dict[str, Dict[str, Any]]:
+    """Every known breaker → state, consecutive failures, trips, seconds until the next probe"""
+    names = set(_local)
+    client = _redis()
+    if client is not None:
+        try:
+            async for key in client.scan_iter(match=KEY_PREFIX + "*"):
+                key = key.decode() if isinstance(key, bytes) else key
+                if not key.endswith(PROBE_SUFFIX):
+                    names.add(key[len(KEY_PREFIX):])
+        except Exception as e:
+            _redis_failed(e)
+
+    breakers = {}
+    now = time.time()
+    for name in sorted(names):
+        state = await _load(name)
+        current = state.get("state", CLOSED)
+        probe_in = float(state.get("opened_at", 0)) + float(state.get("open_s", 0)) - now
+        breakers[name] = {
+            "state": current,
+            "failures": int(state.get("failures", 0)),
+            "trips": int(state.get("trips", 0)),
+            "probe_in_s": round(max(probe_in, 0.0), 1) if current == OPEN else None,
+            "last_error": state.get("last_error"),
+        }
+    return breakers
+
+
+async def reset_breakers() -> int:
+    """Force every breaker closed; returns how many were reset"""
+    names = list(await get_breakers())
+    _local.clear()
+    client = _redis()
+    if client is not None and names:
+        keys = [KEY_PREFIX + n for n in names] + [KEY_PREFIX + n + PROBE_SUFFIX for n in names]
+        await asyncio.wait_for(client.delete(*keys), timeout=REDIS_TIMEOUT)
+    return len(names)
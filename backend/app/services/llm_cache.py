@@ -0,0 +1,226 @@
+# backend/app/services/llm_cache.py
+"""
+LLM Response Cache – BullsBears v6
+Redis cache for agent completions so pipeline re-runs (internal triggers,
+admin trigger-full-pipeline, cron retries) don't pay for identical calls.
+
+- Key = sha256(model + call params + prompt template hash + input fingerprint)
+    vision      → chart content hash (chart_fingerprint / image bytes)
+    social      → symbol + date
+    prescreen   → canonicalized stock table
+    arbitrator  → full candidate prompt
+- TTL LLM_CACHE_TTL_HOURS; at most LLM_CACHE_MAX_ENTRIES keys (oldest
+  evicted via a sorted-set index)
+- Bypass: LLM_CACHE_ENABLED=false, per call (use_cache=False) or for a
+  whole run (`with bypass_llm_cache(): ...`)
+- Hit/miss/store/eviction counters per agent in a Redis hash, shared by
+  API + worker processes (GET /admin/llm/cache)
+
+Redis trouble never fails an LLM call – it just counts as a miss.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llmcache:v1:"
+INDEX_KEY = "llmcache:index"
+STATS_KEY = "llmcache:stats"
+REDIS_TIMEOUT = 2
+MAX_VALUE_BYTES = 512 * 1024
+
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+def fingerprint(value: Any) -> str:
+    """Stable hash of any JSON-able value (dict keys sorted, compact separators)"""
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha256(value).hexdigest()
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def template_hash(template: str) -> str:
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    """What an agent knows about a call: which agent, which prompt template, which input"""
+    agent: str
+    template: str           # template_hash(...) of the prompt template
+    input: str              # fingerprint(...) of the call's variable input
+
+    def redis_key(self, model: str, params: Dict[str, Any]) -> str:
+        digest = fingerprint({"model": model, "params": params, "template": self.template, "input": self.input})
+        return f"{KEY_PREFIX}{self.agent}:{digest}"
+
+
+@contextlib.contextmanager
+def bypass_llm_cache():
+    """Force fresh LLM calls for everything awaited inside this block"""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_enabled() -> bool:
+    return settings.LLM_CACHE_ENABLED and not _bypass.get()
+
+
+# =============================================================================
+# REDIS
+# =============================================================================
+
+_client: Optional[Redis] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_redis() -> Optional[Redis]:
+    """Per-event-loop client (Celery tasks each run their own asyncio.run loop); None without REDIS_URL"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        redis_url = settings.REDIS_URL
+        if not redis_url:
+            return None
+        # Render Redis requires SSL with relaxed cert verification
+        if "rediss://" in redis_url and "?" not in redis_url:
+            redis_url += "?ssl_cert_reqs=none"
+        _client = Redis.from_url(redis_url, socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT)
+        _client_loop = loop
+    return _client
+
+
+async def _count(agent: str, field: str, amount: int = 1):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await asyncio.wait_for(client.hincrby(STATS_KEY, f"{agent}:{field}", amount), timeout=REDIS_TIMEOUT)
+    except Exception:
+        pass
+
+
+async def get_cached(key: str, agent: str) -> Optional[Dict[str, Any]]:
+    """Cached completion dict, or None (miss, bypass, or Redis unavailable)"""
+    if not cache_enabled():
+        await _count(agent, "bypassed")
+        return None
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = await asyncio.wait_for(client.get(key), timeout=REDIS_TIMEOUT)
+    except Exception as e:
+        logger.debug(f"LLM cache read failed: {e}")
+        return None
+    if raw is None:
+        await _count(agent, "misses")
+        return None
+    try:
+        entry = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    await _count(agent, "hits")
+    await _count(agent, "tokens_saved", int(entry.get("prompt_tokens", 0)) + int(entry.get("completion_tokens", 0)))
+    return entry
+
+
+async def store_cached(key: str, agent: str, entry: Dict[str, Any]):
+    """SET with TTL, index by insert time, evict the oldest beyond LLM_CACHE_MAX_ENTRIES"""
+    if not cache_enabled():
+        return
+    client = get_redis()
+    if client is None:
+        return
+    payload = json.dumps(entry, separators=(",", ":"))
+    if len(payload) > MAX_VALUE_BYTES:
+        return
+    try:
+        ttl = int(settings.LLM_CACHE_TTL_HOURS * 3600)
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.set(key, payload, ex=ttl)
+            pipe.zadd(INDEX_KEY, {key: time.time()})
+            pipe.zcard(INDEX_KEY)
+            _, _, size = await asyncio.wait_for(pipe.execute(), timeout=REDIS_TIMEOUT)
+        await _count(agent, "stores")
+
+        overflow = size - settings.LLM_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            oldest = await client.zpopmin(INDEX_KEY, overflow)
+            if oldest:
+                await client.delete(*[k for k, _ in oldest])
+                await _count("all", "evictions", len(oldest))
+    except Exception as e:
+        logger.debug(f"LLM cache write failed: {e}")
+
+
+async def discard_cached(key: Optional[str]):
+    """Drop an entry whose content turned out to be unusable (bad JSON etc.)"""
+    if not key:
+        return
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.delete(key)
+        await client.zrem(INDEX_KEY, key)
+    except Exception:
+        pass
+
+
+async def get_cache_stats() -> Dict[str, Any]:
+    """Counters per agent + current size (for /admin/llm/cache)"""
+    client = get_redis()
+    stats: Dict[str, Any] = {
+        "enabled": settings.LLM_CACHE_ENABLED,
+        "ttl_hours": settings.LLM_CACHE_TTL_HOURS,
+        "max_entries": settings.LLM_CACHE_MAX_ENTRIES,
+        "entries": None,
+        "agents": {},
+    }
+    if client is None:
+        return stats
+    try:
+        raw = await asyncio.wait_for(client.hgetall(STATS_KEY), timeout=REDIS_TIMEOUT)
+        stats["entries"] = await client.zcard(INDEX_KEY)
+    except Exception as e:
+        stats["error"] = str(e)
+        return stats
+
+    for field, value in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        agent, _, counter = field.partition(":")
+        stats["agents"].setdefault(agent, {})[counter] = int(value)
+    for counters in stats["agents"].values():
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        if lookups:
+            counters["hit_rate"] = round(counters.get("hits", 0) / lookups, 3)
+    return stats
+
+
+async def clear_llm_cache() -> int:
+    """Delete every cached completion + counters; returns entries removed"""
+    client = get_redis()
+    if client is None:
+        return 0
+    removed = 0
+    async for key in client.scan_iter(match=f"{KEY_PREFIX}*", count=500):
+        removed += await client.delete(key)
+    await client.delete(INDEX_KEY, STATS_KEY)
+    return removed
@@ -0,0 +1,259 @@
+# backend/app/services/llm_telemetry.py
+"""
+LLM Call Telemetry – BullsBears v6
+One row per LLM call in `llm_calls` (written by llm_gateway), rolled up per
+day into `llm_calls_daily` – answers "which stage is slow or expensive".
+
+- Per call: agent, provider, model, prompt/completion tokens, time to first
+  byte, total latency, HTTP status, retries, cached, JSON parse success,
+  estimated cost, error
+- parse_ok: set from the gateway's accept= extraction; flipped to false
+  when the agent discards the response (LLMResponse.discard_cache)
+- Cost is an estimate from MODEL_PRICES (USD per 1M tokens, list prices) –
+  cache hits cost nothing
+- tokens_estimated: the provider sent no usage (stream closed early by the
+  gateway) and the token counts are the gateway's chars/4 + per-image
+  estimate; the rollup counts these calls per day
+- Nightly rollup (tasks.rollup_llm_telemetry): calls, errors, parse
+  failures, tokens, cost, latency/TTFB p50/p95 per (day, agent, provider, model)
+- GET /admin/llm/telemetry – today's live numbers + daily rollups
+
+Telemetry never fails an LLM call: write errors are logged and dropped.
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+from zoneinfo import ZoneInfo
+
+from app.core.database import get_asyncpg_pool
+
+logger = logging.getLogger(__name__)
+
+WRITE_TIMEOUT = 2
+POOL_TIMEOUT = 10               # Pool is normally already up – agents query the DB first
+RAW_RETENTION_DAYS = 30
+LOCAL_TZ = "US/Eastern"         # Same day boundaries as the Celery schedule
+
+# (input, output) USD per 1M tokens – estimates, update with provider pricing
+MODEL_PRICES = {
+    "accounts/fireworks/models/qwen2.5-72b-instruct": (0.90, 0.90),
+    "accounts/fireworks/models/gpt-oss-120b": (0.15, 0.60),
+    "accounts/fireworks/models/qwen3-vl-30b-a3b-thinking": (0.15, 0.60),
+    "grok-4-fast-reasoning": (0.20, 0.50),
+    "grok-4.1-fast": (0.20, 0.50),
+}
+DEFAULT_PRICE = (1.00, 1.00)
+
+_tables_ready = False
+
+
+async def ensure_llm_telemetry_tables(conn):
+    """Idempotent – also applied by db_migration v9"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id BIGSERIAL PRIMARY KEY,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            agent VARCHAR(32) NOT NULL,
+            provider VARCHAR(32) NOT NULL,
+            model VARCHAR(128) NOT NULL,
+            prompt_tokens INTEGER DEFAULT 0,
+            completion_tokens INTEGER DEFAULT 0,
+            tokens_estimated BOOLEAN DEFAULT FALSE,
+            ttfb_ms DOUBLE PRECISION,
+            latency_ms DOUBLE PRECISION,
+            http_status INTEGER,
+            retries INTEGER DEFAULT 0,
+            cached BOOLEAN DEFAULT FALSE,
+            streamed BOOLEAN DEFAULT FALSE,
+            parse_ok BOOLEAN,
+            cost_usd NUMERIC(12, 6) DEFAULT 0,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_llm_calls_created ON llm_calls(created_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_llm_calls_agent ON llm_calls(agent, created_at DESC);
+        ALTER TABLE llm_calls ADD COLUMN IF NOT EXISTS tokens_estimated BOOLEAN DEFAULT FALSE;
+
+        CREATE TABLE IF NOT EXISTS llm_calls_daily (
+            day DATE NOT NULL,
+            agent VARCHAR(32) NOT NULL,
+            provider VARCHAR(32) NOT NULL,
+            model VARCHAR(128) NOT NULL,
+            calls INTEGER NOT NULL,
+            errors INTEGER NOT NULL,
+            parse_failures INTEGER NOT NULL,
+            cached INTEGER NOT NULL,
+            retries INTEGER NOT NULL,
+            prompt_tokens BIGINT NOT NULL,
+            completion_tokens BIGINT NOT NULL,
+            estimated INTEGER NOT NULL DEFAULT 0,
+            cost_usd NUMERIC(12, 6) NOT NULL,
+            latency_p50_ms DOUBLE PRECISION,
+            latency_p95_ms DOUBLE PRECISION,
+            ttfb_p50_ms DOUBLE PRECISION,
+            ttfb_p95_ms DOUBLE PRECISION,
+            updated_at TIMESTAMPTZ DEFAULT NOW(),
+            PRIMARY KEY (day, agent, provider, model)
+        );
+        ALTER TABLE llm_calls_daily ADD COLUMN IF NOT EXISTS estimated INTEGER NOT NULL DEFAULT 0;
+    """)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, DEFAULT_PRICE)
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+async def record_llm_call(
+    agent: str,
+    provider: str,
+    model: str,
+    *,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    tokens_estimated: bool = False,
+    ttfb_ms: Optional[float] = None,
+    latency_ms: Optional[float] = None,
+    http_status: Optional[int] = None,
+    retries: int = 0,
+    cached: bool = False,
+    streamed: bool = False,
+    parse_ok: Optional[bool] = None,
+    error: Optional[str] = None,
+) -> Optional[int]:
+    """Insert one call row; returns its id (None if the write failed)"""
+    global _tables_ready
+    cost = 0.0 if cached else estimate_cost(model, prompt_tokens, completion_tokens)
+    try:
+        db = await asyncio.wait_for(get_asyncpg_pool(), timeout=POOL_TIMEOUT)
+        async with db.acquire() as conn:
+            if not _tables_ready:
+                await ensure_llm_telemetry_tables(conn)
+                _tables_ready = True
+            return await asyncio.wait_for(conn.fetchval("""
+                INSERT INTO llm_calls (
+                    agent, provider, model, prompt_tokens, completion_tokens, tokens_estimated,
+                    ttfb_ms, latency_ms, http_status, retries, cached, streamed, parse_ok, cost_usd, error
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+                RETURNING id
+            """, agent, provider, model, prompt_tokens, completion_tokens, tokens_estimated,
+                ttfb_ms, latency_ms, http_status, retries, cached, streamed, parse_ok, cost,
+                error[:500] if error else None),
+                timeout=WRITE_TIMEOUT)
+    except Exception as e:
+        logger.debug(f"LLM telemetry write failed: {e}")
+        return None
+
+
+async def mark_parse_failed(call_id: Optional[int]):
+    """The agent couldn't use this call's content"""
+    if call_id is None:
+        return
+    try:
+        db = await get_asyncpg_pool()
+        async with db.acquire() as conn:
+            await asyncio.wait_for(
+                conn.execute("UPDATE llm_calls SET parse_ok = FALSE WHERE id = $1", call_id),
+                timeout=WRITE_TIMEOUT,
+            )
+    except Exception as e:
+        logger.debug(f"LLM telemetry update failed: {e}")
+
+
+# Aggregates shared by the rollup and the live admin view
+_AGGREGATE = f"""
+    SELECT (created_at AT TIME ZONE '{LOCAL_TZ}')::date AS day, agent, provider, model,
+           COUNT(*) AS calls,
+           COUNT(*) FILTER (WHERE error IS NOT NULL) AS errors,
+           COUNT(*) FILTER (WHERE parse_ok = FALSE) AS parse_failures,
+           COUNT(*) FILTER (WHERE cached) AS cached,
+           COALESCE(SUM(retries), 0) AS retries,
+           COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+           COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+           COUNT(*) FILTER (WHERE tokens_estimated) AS estimated,
+           COALESCE(SUM(cost_usd), 0) AS cost_usd,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY latency_ms) FILTER (WHERE NOT cached) AS latency_p50_ms,
+           percentile_cont(0.95) WITHIN GROUP (ORDER BY latency_ms) FILTER (WHERE NOT cached) AS latency_p95_ms,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY ttfb_ms) FILTER (WHERE NOT cached) AS ttfb_p50_ms,
+           percentile_cont(0.95) WITHIN GROUP (ORDER BY ttfb_ms) FILTER (WHERE NOT cached) AS ttfb_p95_ms
+    FROM llm_calls
+    WHERE created_at >= ($1::date::timestamp AT TIME ZONE '{LOCAL_TZ}')
+      AND created_at < (($2::date + 1)::timestamp AT TIME ZONE '{LOCAL_TZ}')
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+async def rollup_llm_calls(start: date, end: date) -> int:
+    """(Re)build daily rows for start..end inclusive; prunes raw rows past retention"""
+    db = await get_asyncpg_pool()
+    async with db.acquire() as conn:
+        await ensure_llm_telemetry_tables(conn)
+        async with conn.transaction():
+            result = await conn.execute(f"""
+                INSERT INTO llm_calls_daily (
+                    day, agent, provider, model, calls, errors, parse_failures, cached, retries,
+                    prompt_tokens, completion_tokens, estimated, cost_usd,
+                    latency_p50_ms, latency_p95_ms, ttfb_p50_ms, ttfb_p95_ms
+                )
+                SELECT * FROM ({_AGGREGATE}) agg
+                ON CONFLICT (day, agent, provider, model) DO UPDATE SET
+                    calls = EXCLUDED.calls,
+                    errors = EXCLUDED.errors,
+                    parse_failures = EXCLUDED.parse_failures,
+                    cached = EXCLUDED.cached,
+                    retries = EXCLUDED.retries,
+                    prompt_tokens = EXCLUDED.prompt_tokens,
+                    completion_tokens = EXCLUDED.completion_tokens,
+                    estimated = EXCLUDED.estimated,
+                    cost_usd = EXCLUDED.cost_usd,
+                    latency_p50_ms = EXCLUDED.latency_p50_ms,
+                    latency_p95_ms = EXCLUDED.latency_p95_ms,
+                    ttfb_p50_ms = EXCLUDED.ttfb_p50_ms,
+                    ttfb_p95_ms = EXCLUDED.ttfb_p95_ms,
+                    updated_at = NOW()
+            """, start, end)
+            await conn.execute(
+                "DELETE FROM llm_calls WHERE created_at < NOW() - make_interval(days => $1)",
+                RAW_RETENTION_DAYS,
+            )
+    return int(result.split()[-1])
+
+
+def _row(r) -> Dict[str, Any]:
+    row = dict(r)
+    row["day"] = row["day"].isoformat()
+    row["cost_usd"] = round(float(row["cost_usd"]), 4)
+    for key in ("latency_p50_ms", "latency_p95_ms", "ttfb_p50_ms", "ttfb_p95_ms"):
+        if row.get(key) is not None:
+            row[key] = round(row[key], 1)
+    row.pop("updated_at", None)
+    return row
+
+
+async def get_llm_telemetry(days: int = 7) -> Dict[str, Any]:
+    """Today's live aggregate + the last `days` daily rollups, plus per-agent cost totals"""
+    today = datetime.now(ZoneInfo(LOCAL_TZ)).date()
+    db = await get_asyncpg_pool()
+    async with db.acquire() as conn:
+        await ensure_llm_telemetry_tables(conn)
+        live = await conn.fetch(_AGGREGATE + " ORDER BY agent, provider, model", today, today)
+        daily = await conn.fetch("""
+            SELECT * FROM llm_calls_daily
+            WHERE day >= $1 AND day < $2
+            ORDER BY day DESC, agent, provider, model
+        """, today - timedelta(days=days), today)
+
+    totals: Dict[str, Dict[str, float]] = {}
+    for r in list(live) + list(daily):
+        t = totals.setdefault(r["agent"], {"calls": 0, "cost_usd": 0.0, "parse_failures": 0})
+        t["calls"] += r["calls"]
+        t["cost_usd"] = round(t["cost_usd"] + float(r["cost_usd"]), 4)
+        t["parse_failures"] += r["parse_failures"]
+
+    return {
+        "today": [_row(r) for r in live],
+        "daily": [_row(r) for r in daily],
+        "totals_by_agent": totals,
+        "days": days,
+    }
@@ -0,0 +1,174 @@
+# backend/app/services/market_structure.py
+"""
+Market Structure – BullsBears v6
+Volume-at-price and support/resistance from NumPy arrays (no Python bar loops).
+
+- Volume profile: np.histogram of closes weighted by volume
+- POC (point of control) + value area (70% of volume, expanded outward from POC)
+- Pivot highs/lows via sliding-window extrema, clustered into levels
+
+Shared by both chart generators and fib_calculator (POC/value-area confluence).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+PROFILE_BINS = 19           # 20 edges across the visible low→high range
+VALUE_AREA_PCT = 0.70
+SR_LOOKBACK = 30            # Bars used for S/R pivots
+PIVOT_ORDER = 2             # Bars on each side a pivot must beat
+CLUSTER_TOLERANCE_PCT = 1.0 # Pivots within 1% merge into one level
+MAX_LEVELS = 2
+
+
+@dataclass
+class VolumeProfile:
+    """Volume-at-price histogram + POC / value area"""
+    edges: np.ndarray           # len(volumes) + 1 bin edges
+    volumes: np.ndarray         # Volume per bin
+    poc: float                  # Mid price of the highest-volume bin
+    value_area_low: float
+    value_area_high: float
+
+    @property
+    def mids(self) -> np.ndarray:
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def bin_height(self) -> float:
+        return float(self.edges[1] - self.edges[0])
+
+    def normalized(self) -> np.ndarray:
+        peak = self.volumes.max() if len(self.volumes) else 0
+        return self.volumes / peak if peak > 0 else self.volumes
+
+    def contains(self, price: float) -> bool:
+        return self.value_area_low <= price <= self.value_area_high
+
+    def to_dict(self) -> Dict:
+        return {
+            "poc": round(self.poc, 4),
+            "value_area_low": round(self.value_area_low, 4),
+            "value_area_high": round(self.value_area_high, 4),
+        }
+
+
+def _value_area(volumes: np.ndarray, poc_idx: int, pct: float) -> Tuple[int, int]:
+    """
+    Classic value area: start at the POC bin, repeatedly add whichever
+    neighbouring bin holds more volume until `pct` of the total is covered.
+    At most len(volumes) steps over an array of ~20 bins.
+    """
+    total = volumes.sum()
+    lo = hi = poc_idx
+    covered = volumes[poc_idx]
+    n = len(volumes)
+    while covered < total * pct and (lo > 0 or hi < n - 1):
+        below = volumes[lo - 1] if lo > 0 else -1.0
+        above = volumes[hi + 1] if hi < n - 1 else -1.0
+        if above >= below:
+            hi += 1
+            covered += above
+        else:
+            lo -= 1
+            covered += below
+    return lo, hi
+
+
+def volume_profile(
+    closes: np.ndarray,
+    volumes: np.ndarray,
+    price_low: Optional[float] = None,
+    price_high: Optional[float] = None,
+    bins: int = PROFILE_BINS,
+    value_area_pct: float = VALUE_AREA_PCT,
+) -> Optional[VolumeProfile]:
+    """Volume at (close) price across [price_low, price_high]; None without data"""
+    closes = np.asarray(closes, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    if len(closes) == 0:
+        return None
+    lo = float(closes.min()) if price_low is None else float(price_low)
+    hi = float(closes.max()) if price_high is None else float(price_high)
+    if hi <= lo:
+        hi = lo + max(abs(lo) * 1e-6, 1e-6)
+
+    hist, edges = np.histogram(closes, bins=np.linspace(lo, hi, bins + 1), weights=volumes)
+    if hist.sum() <= 0:
+        mid = (lo + hi) / 2
+        return VolumeProfile(edges, hist, mid, lo, hi)
+
+    poc_idx = int(np.argmax(hist))
+    va_lo, va_hi = _value_area(hist, poc_idx, value_area_pct)
+    return VolumeProfile(
+        edges=edges,
+        volumes=hist,
+        poc=float((edges[poc_idx] + edges[poc_idx + 1]) / 2),
+        value_area_low=float(edges[va_lo]),
+        value_area_high=float(edges[va_hi + 1]),
+    )
+
+
+def find_pivots(values: np.ndarray, order: int = PIVOT_ORDER, highs: bool = True) -> np.ndarray:
+    """
+    Indices of strict local maxima (highs=True) / minima over ±order bars.
+    Vectorized: one sliding window, compare the centre against its neighbours.
+    """
+    values = np.asarray(values, dtype=float)
+    width = 2 * order + 1
+    if len(values) < width:
+        return np.empty(0, dtype=int)
+    windows = sliding_window_view(values, width)
+    centre = windows[:, order]
+    others = np.delete(windows, order, axis=1)
+    mask = (centre[:, None] > others).all(axis=1) if highs else (centre[:, None] < others).all(axis=1)
+    return np.flatnonzero(mask) + order
+
+
+def cluster_levels(prices: np.ndarray, tolerance_pct: float = CLUSTER_TOLERANCE_PCT) -> List[Tuple[float, int]]:
+    """
+    Merge nearby prices into levels. Sorted prices split wherever the gap to
+    the previous price exceeds tolerance_pct → [(mean_price, touches), ...]
+    ascending by price.
+    """
+    prices = np.sort(np.asarray(prices, dtype=float))
+    if len(prices) == 0:
+        return []
+    gaps = np.diff(prices) / prices[:-1] * 100
+    starts = np.r_[0, np.flatnonzero(gaps > tolerance_pct) + 1]
+    sums = np.add.reduceat(prices, starts)
+    counts = np.diff(np.r_[starts, len(prices)])
+    return [(float(s / c), int(c)) for s, c in zip(sums, counts)]
+
+
+def support_resistance(
+    highs: np.ndarray,
+    lows: np.ndarray,
+    lookback: int = SR_LOOKBACK,
+    order: int = PIVOT_ORDER,
+    tolerance_pct: float = CLUSTER_TOLERANCE_PCT,
+    max_levels: int = MAX_LEVELS,
+) -> Dict[str, List[float]]:
+    """
+    S/R from clustered pivots over the last `lookback` bars.
+    Keeps the outermost levels (highest resistance, lowest support) like the
+    old per-generator helpers; percentile levels fill in when pivots are scarce.
+    """
+    recent_highs = np.asarray(highs, dtype=float)[-lookback:]
+    recent_lows = np.asarray(lows, dtype=float)[-lookback:]
+
+    resistance = [p for p, _ in cluster_levels(recent_highs[find_pivots(recent_highs, order, highs=True)], tolerance_pct)]
+    support = [p for p, _ in cluster_levels(recent_lows[find_pivots(recent_lows, order, highs=False)], tolerance_pct)]
+
+    if len(resistance) < max_levels:
+        resistance = list(np.percentile(recent_highs, [80, 95]))
+    if len(support) < max_levels:
+        support = list(np.percentile(recent_lows, [5, 20]))
+
+    return {
+        "resistance": sorted(set(resistance), reverse=True)[:max_levels],
+        "support": sorted(set(support))[:max_levels],
+    }
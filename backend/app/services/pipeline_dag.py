@@ -0,0 +1,221 @@
+# backend/app/services/pipeline_dag.py
+"""
+Pipeline DAG Executor – BullsBears v6
+Runs async stages with declared dependencies: every stage starts as soon as
+its inputs are done, independent stages run concurrently, so wall time is
+the critical path instead of the sum of all stages.
+
+- Stage(name, run, deps, timeout_s, required, background): run(inputs) gets
+  the results of its deps as {dep_name: result}
+- Per-stage timeout (asyncio.wait_for – the stage is cancelled)
+- required=True: a failure/timeout skips everything downstream and fails the
+  run; required=False: downstream stages still run without its result
+- background=True: a leaf nothing depends on (e.g. a slow data refresh that
+  runs alongside the pipeline) – reported on its own, outside the critical
+  path and wall time
+- Report: per-stage status / start / duration, the critical path (chain of
+  last-finishing dependencies ending at the last foreground stage), wall
+  time to that stage, total time including background leaves and serial
+  time – what the run would have cost one stage after another
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "success"
+ERROR = "error"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    timeout_s: Optional[float] = None
+    required: bool = True       # Failure stops downstream stages + fails the run
+    background: bool = False    # Leaf – off the critical path and wall time
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str
+    result: Any = None
+    error: Optional[str] = None
+    started_s: float = 0.0      # Offsets from the start of the run
+    finished_s: float = 0.0
+    waited_on: Optional[str] = None     # Last dependency to finish (critical-path link)
+
+    @property
+    def duration_s(self) -> float:
+        return self.finished_s - self.started_s
+
+    @property
+    def ok(self) -> bool:
+        return self.status == SUCCESS
+
+
+@dataclass
+class DagRun:
+    stages: Dict[str, StageResult]
+    required: Dict[str, bool]
+    total_s: float              # Until the last stage, background leaves included
+    background: List[str] = field(default_factory=list)
+    critical_path: List[str] = field(default_factory=list)
+
+    @property
+    def wall_s(self) -> float:
+        """Until the last foreground stage finished"""
+        foreground = [r.finished_s for n, r in self.stages.items() if n not in self.background]
+        return max(foreground, default=self.total_s)
+
+    @property
+    def failed(self) -> List[str]:
+        """Required stages that failed, timed out or were skipped"""
+        return [n for n, r in self.stages.items() if self.required[n] and not r.ok]
+
+    @property
+    def status(self) -> str:
+        return "failed" if self.failed else "success"
+
+    def report(self) -> Dict[str, Any]:
+        serial_s = sum(r.duration_s for r in self.stages.values())
+        return {
+            "wall_s": round(self.wall_s, 1),
+            "total_s": round(self.total_s, 1),
+            "serial_s": round(serial_s, 1),
+            "critical_path": self.critical_path,
+            "critical_path_s": round(sum(self.stages[n].duration_s for n in self.critical_path), 1),
+            "background": {
+                n: {"status": self.stages[n].status, "duration_s": round(self.stages[n].duration_s, 1)}
+                for n in self.background
+            },
+            "stages": {
+                n: {
+                    "status": r.status,
+                    "start_s": round(r.started_s, 1),
+                    "duration_s": round(r.duration_s, 1),
+                    **({"error": r.error} if r.error else {}),
+                }
+                for n, r in self.stages.items()
+            },
+        }
+
+
+def validate(stages: Sequence[Stage]) -> List[Stage]:
+    """
+    Stages in dependency order; raises ValueError on duplicates, unknown
+    deps, cycles or a stage depending on a background stage
+    """
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate pipeline stage: {stage.name}")
+        by_name[stage.name] = stage
+    for stage in stages:
+        unknown = [d for d in stage.deps if d not in by_name]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stage(s): {', '.join(unknown)}")
+        background = [d for d in stage.deps if by_name[d].background]
+        if background:
+            raise ValueError(f"Stage {stage.name} depends on background stage(s): {', '.join(background)}")
+
+    ordered: List[Stage] = []
+    state: Dict[str, int] = {}      # 1 = visiting, 2 = done
+
+    def visit(name: str, path: Tuple[str, ...]):
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise ValueError(f"Pipeline cycle: {' → '.join(path + (name,))}")
+        state[name] = 1
+        for dep in by_name[name].deps:
+            visit(dep, path + (name,))
+        state[name] = 2
+        ordered.append(by_name[name])
+
+    for stage in stages:
+        visit(stage.name, ())
+    return ordered
+
+
+def _critical_path(results: Dict[str, StageResult], background: Sequence[str] = ()) -> List[str]:
+    """Back from the last foreground stage to finish, via each stage's last dependency"""
+    foreground = [r for r in results.values() if r.name not in background] or list(results.values())
+    if not foreground:
+        return []
+    name: Optional[str] = max(foreground, key=lambda r: r.finished_s).name
+    path = []
+    while name is not None:
+        path.append(name)
+        name = results[name].waited_on
+    return list(reversed(path))
+
+
+async def run_dag(stages: Sequence[Stage], label: str = "pipeline") -> DagRun:
+    ordered = validate(stages)
+    required = {s.name: s.required for s in ordered}
+    results: Dict[str, StageResult] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+    started = time.perf_counter()
+
+    def now() -> float:
+        return time.perf_counter() - started
+
+    async def execute(stage: Stage) -> StageResult:
+        deps: List[StageResult] = list(await asyncio.gather(*(tasks[d] for d in stage.deps)))
+        waited_on = max(deps, key=lambda r: r.finished_s).name if deps else None
+        blocked = [r.name for r in deps if not r.ok and (required[r.name] or r.status == SKIPPED)]
+        if blocked:
+            result = StageResult(stage.name, SKIPPED, error=f"upstream failed: {', '.join(blocked)}",
+                                 started_s=now(), finished_s=now(), waited_on=waited_on)
+            logger.warning(f"⏭️ {label}/{stage.name}: skipped ({result.error})")
+            results[stage.name] = result
+            return result
+
+        start = now()
+        logger.info(f"▶️ {label}/{stage.name}: started at +{start:.1f}s")
+        try:
+            value = await asyncio.wait_for(stage.run({r.name: r.result for r in deps}), timeout=stage.timeout_s)
+            result = StageResult(stage.name, SUCCESS, result=value)
+            logger.info(f"✅ {label}/{stage.name}: done in {now() - start:.1f}s")
+        except asyncio.TimeoutError:
+            result = StageResult(stage.name, TIMEOUT, error=f"timed out after {stage.timeout_s:g}s")
+            logger.error(f"⏱️ {label}/{stage.name}: {result.error}")
+        except Exception as e:
+            result = StageResult(stage.name, ERROR, error=f"{type(e).__name__}: {e}")
+            log = logger.error if stage.required else logger.warning
+            log(f"❌ {label}/{stage.name} failed{'' if stage.required else ' (non-critical)'}: {e}")
+        result.started_s, result.finished_s, result.waited_on = start, now(), waited_on
+        results[stage.name] = result
+        return result
+
+    # Dependency order → every dep's task exists before its dependents are created
+    for stage in ordered:
+        tasks[stage.name] = asyncio.create_task(execute(stage), name=f"{label}:{stage.name}")
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+
+    background = [s.name for s in stages if s.background]
+    run = DagRun(stages={s.name: results[s.name] for s in stages}, required=required,
+                 total_s=now(), background=background)
+    run.critical_path = _critical_path(results, background)
+    report = run.report()
+    path = " → ".join(f"{n} {results[n].duration_s:.1f}s" for n in run.critical_path)
+    logger.info(f"📐 {label}: wall {report['wall_s']}s, critical path {report['critical_path_s']}s "
+                f"({path}), serial {report['serial_s']}s")
+    if background:
+        leaves = ", ".join(f"{n} {results[n].status} {results[n].duration_s:.1f}s" for n in background)
+        logger.info(f"📐 {label}: background {leaves}, total {report['total_s']}s")
+    return run
@@ -1,12 +1,55 @@
 # backend/app/services/push_picks_to_firebase.py
 import logging
 from datetime import datetime
+from typing import List
 from app.core.firebase import database_ref
 
 logger = logging.getLogger(__name__)
 
+
+async def load_picks_for_publish(pick_ids: List[int]) -> dict:
+    """Stored picks (targets from the arbitrator run) → publish_picks_to_firebase payload"""
+    from app.core.database import get_asyncpg_pool
+
+    db = await get_asyncpg_pool()
+    async with db.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT id, symbol, direction, confidence, reasoning,
+                   COALESCE(target_primary, primary_target) as target_primary,
+                   target_medium,
+                   COALESCE(target_moonshot, moonshot_target) as target_moonshot,
+                   confluence_score, created_at, expires_at
+            FROM picks
+            WHERE id = ANY($1)
+            ORDER BY confidence DESC
+        """, list(pick_ids))
+
+    def as_float(value):
+        return float(value) if value is not None else None
+
+    picks = [
+        {
+            "id": r["id"],
+            "symbol": r["symbol"],
+            "direction": r["direction"],
+            "confidence": as_float(r["confidence"]),
+            "reasoning": r["reasoning"],
+            "target_primary": as_float(r["target_primary"]),
+            "target_medium": as_float(r["target_medium"]),
+            "target_moonshot": as_float(r["target_moonshot"]),
+            "confluence_score": r["confluence_score"],
+            "created_at": r["created_at"].isoformat() if r["created_at"] else None,
+            "expires_at": r["expires_at"].isoformat() if r["expires_at"] else None,
+        }
+        for r in rows
+    ]
+    bullish = [p for p in picks if str(p["direction"] or "bullish").startswith("bull")]
+    bearish = [p for p in picks if p not in bullish]
+    return {"bullish": bullish, "bearish": bearish, "total_picks": len(picks)}
+
+
 def publish_picks_to_firebase(picks_data: dict):
-    """Sync publish — used by run_arbitrator task"""
+    """Sync publish — used by the pipeline DAG's publish stage"""
     try:
         database_ref.child("pulse/latest").set({
             "timestamp": datetime.now().isoformat(),
@@ -0,0 +1,114 @@
+# backend/app/services/social_store.py
+"""
+Social Result Store – BullsBears v6
+Grok social reads kept per (symbol, analyzed_at) so a symbol that stays on
+consecutive shortlists isn't re-analyzed every morning.
+
+- Freshness: a read is reused for SOCIAL_FRESH_HOURS, but only for
+  SOCIAL_HOT_FRESH_HOURS when mention_velocity ≥ SOCIAL_HOT_VELOCITY
+  (fast-moving chatter goes stale sooner)
+- Only stale or new symbols go to Grok → calls/day track shortlist churn
+- Neutral fallbacks (Grok failed) are never stored, so they are retried
+- Rows older than SOCIAL_RETENTION_DAYS are pruned on write
+- Degraded mode (Grok circuit breaker open): load_last_social returns the
+  latest read up to SOCIAL_DEGRADED_MAX_HOURS old, however stale
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SOCIAL_RETENTION_DAYS = 30
+
+
+async def ensure_social_results_table(conn):
+    """Idempotent – also applied by db_migration v8"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS social_results (
+            id BIGSERIAL PRIMARY KEY,
+            symbol VARCHAR(10) NOT NULL,
+            analyzed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            social_score INTEGER NOT NULL,
+            mention_velocity DOUBLE PRECISION,
+            polymarket_prob DOUBLE PRECISION,
+            social_data JSONB NOT NULL,
+            UNIQUE (symbol, analyzed_at)
+        );
+        CREATE INDEX IF NOT EXISTS idx_social_results_symbol_time ON social_results(symbol, analyzed_at DESC);
+    """)
+
+
+def max_age(mention_velocity: float) -> timedelta:
+    """How long a read stays usable – shorter for high-velocity names"""
+    if (mention_velocity or 0) >= settings.SOCIAL_HOT_VELOCITY:
+        return timedelta(hours=settings.SOCIAL_HOT_FRESH_HOURS)
+    return timedelta(hours=settings.SOCIAL_FRESH_HOURS)
+
+
+async def _latest_reads(conn, symbols: List[str], max_hours: float) -> Dict[str, Dict[str, Any]]:
+    """Latest read per symbol within max_hours → social result dict (+ analyzed_at)"""
+    rows = await conn.fetch("""
+        SELECT DISTINCT ON (symbol) symbol, analyzed_at, social_score, social_data
+        FROM social_results
+        WHERE symbol = ANY($1::text[])
+          AND analyzed_at > NOW() - make_interval(secs => $2)
+        ORDER BY symbol, analyzed_at DESC
+    """, symbols, max_hours * 3600.0)
+
+    reads = {}
+    for row in rows:
+        data = row["social_data"]
+        if isinstance(data, str):
+            data = json.loads(data)
+        reads[row["symbol"]] = {
+            **data,
+            "symbol": row["symbol"],
+            "social_score": row["social_score"],
+            "analyzed_at": row["analyzed_at"].isoformat(),
+        }
+    return reads
+
+
+async def load_fresh_social(conn, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Latest read per symbol that is still fresh → social result dict (+ analyzed_at)"""
+    if not symbols or settings.SOCIAL_FRESH_HOURS <= 0:
+        return {}
+    reads = await _latest_reads(conn, symbols, settings.SOCIAL_FRESH_HOURS)
+    now = datetime.now(timezone.utc)
+    return {
+        symbol: read for symbol, read in reads.items()
+        if now - datetime.fromisoformat(read["analyzed_at"]) <= max_age(read.get("mention_velocity", 1.0))
+    }
+
+
+async def load_last_social(conn, symbols: List[str], max_hours: float) -> Dict[str, Dict[str, Any]]:
+    """Latest read per symbol within max_hours, ignoring freshness rules (degraded mode)"""
+    if not symbols:
+        return {}
+    return await _latest_reads(conn, symbols, max_hours)
+
+
+async def save_social_results(conn, results: List[Dict[str, Any]]) -> str:
+    """Insert new reads (one row per symbol, same analyzed_at); returns that timestamp"""
+    analyzed_at = datetime.now(timezone.utc)
+    await conn.executemany("""
+        INSERT INTO social_results (symbol, analyzed_at, social_score, mention_velocity, polymarket_prob, social_data)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (symbol, analyzed_at) DO NOTHING
+    """, [
+        (
+            r["symbol"], analyzed_at, r["social_score"], r.get("mention_velocity"), r.get("polymarket_prob"),
+            json.dumps({k: v for k, v in r.items() if k not in ("symbol", "social_score", "analyzed_at", "reused")}),
+        )
+        for r in results
+    ])
+    await conn.execute(
+        "DELETE FROM social_results WHERE analyzed_at < NOW() - make_interval(days => $1)",
+        SOCIAL_RETENTION_DAYS,
+    )
+    return analyzed_at.isoformat()
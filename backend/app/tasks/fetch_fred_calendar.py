@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 FRED Economic Calendar Fetcher
-Runs daily at 4:30 AM ET (after Finnhub short interest)
+Runs daily at 4:30 AM ET (after Finnhub short interest); the standalone daily pipeline runs it before prescreen
 120 API calls/min limit - plenty for our needs
 """
 
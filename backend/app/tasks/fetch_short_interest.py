@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 """
 Finnhub Short Interest Fetcher
-Runs daily at 4:00 AM ET (after FMP delta update)
-60 API calls/min limit → ~50 min for 3,000 ACTIVE stocks
+Runs daily at 4:00 AM ET (after FMP delta update); the standalone daily
+pipeline runs it as a non-blocking stage (prescreen doesn't wait for it)
+60 API calls/min limit → ~50 min for 3,000 ACTIVE stocks, so results are
+written every FLUSH_EVERY symbols – a cancelled run keeps what it fetched
 """
 
 import asyncio
 import httpx
 import logging
-from datetime import datetime
+from datetime import date, datetime
 from app.core.celery_app import celery_app
 from app.core.config import settings
 from app.core.database import get_asyncpg_pool
@@ -18,6 +20,30 @@ logger = logging.getLogger(__name__)
 
 FINNHUB_BASE = "https://finnhub.io/api/v1"
 RATE_LIMIT = 55  # Stay under 60/min
+FLUSH_EVERY = 250  # Symbols per incremental DB write
+
+UPSERT_SQL = """
+    INSERT INTO short_interest (symbol, short_interest, avg_vol_30d, days_to_cover, settlement_date, updated_at)
+    VALUES ($1, $2, $3, $4, $5, CURRENT_TIMESTAMP)
+    ON CONFLICT (symbol) DO UPDATE SET
+        short_interest = EXCLUDED.short_interest,
+        avg_vol_30d = EXCLUDED.avg_vol_30d,
+        days_to_cover = EXCLUDED.days_to_cover,
+        settlement_date = EXCLUDED.settlement_date,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+async def _store_short_interest(db, results: dict):
+    """Upsert {symbol: data} into short_interest"""
+    if not results:
+        return
+    async with db.acquire() as conn:
+        await conn.executemany(UPSERT_SQL, [
+            (symbol, data["short_interest"], data["avg_vol_30d"], data["days_to_cover"],
+             date.fromisoformat(data["date"][:10]) if data["date"] else None)
+            for symbol, data in results.items()
+        ])
 
 
 async def _fetch_short_interest_async():
@@ -50,7 +76,20 @@ async def _fetch_short_interest_async():
 
     logger.info(f"📊 Fetching short interest for {len(symbols)} ACTIVE stocks")
 
+    async with db.acquire() as conn:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS short_interest (
+                symbol VARCHAR(10) PRIMARY KEY,
+                short_interest BIGINT,
+                avg_vol_30d BIGINT,
+                days_to_cover FLOAT,
+                settlement_date DATE,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
     results = {}
+    pending = {}
     errors = 0
     calls_this_minute = []
 
@@ -78,7 +117,7 @@ async def _fetch_short_interest_async():
                     # Finnhub returns {"data": [{"settlementDate": "2024-01-15", "shortInterest": 1234567, ...}]}
                     if data.get("data") and len(data["data"]) > 0:
                         latest = data["data"][0]  # Most recent
-                        results[symbol] = {
+                        results[symbol] = pending[symbol] = {
                             "short_interest": latest.get("shortInterest", 0),
                             "avg_vol_30d": latest.get("avgDailyShareVolumeTraded", 0),
                             "days_to_cover": latest.get("daysToCover", 0),
@@ -95,36 +134,16 @@ async def _fetch_short_interest_async():
                 logger.debug(f"Error fetching {symbol}: {e}")
                 errors += 1
 
+            # Incremental write – a timeout / cancel keeps everything fetched so far
+            if (i + 1) % FLUSH_EVERY == 0:
+                await _store_short_interest(db, pending)
+                pending = {}
+
             # Progress log every 500 symbols
             if (i + 1) % 500 == 0:
                 logger.info(f"Progress: {i + 1}/{len(symbols)} ({len(results)} with data)")
 
-    # Store results in database
-    if results:
-        async with db.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS short_interest (
-                    symbol VARCHAR(10) PRIMARY KEY,
-                    short_interest BIGINT,
-                    avg_vol_30d BIGINT,
-                    days_to_cover FLOAT,
-                    settlement_date DATE,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            for symbol, data in results.items():
-                await conn.execute("""
-                    INSERT INTO short_interest (symbol, short_interest, avg_vol_30d, days_to_cover, settlement_date, updated_at)
-                    VALUES ($1, $2, $3, $4, $5, CURRENT_TIMESTAMP)
-                    ON CONFLICT (symbol) DO UPDATE SET
-                        short_interest = EXCLUDED.short_interest,
-                        avg_vol_30d = EXCLUDED.avg_vol_30d,
-                        days_to_cover = EXCLUDED.days_to_cover,
-                        settlement_date = EXCLUDED.settlement_date,
-                        updated_at = CURRENT_TIMESTAMP
-                """, symbol, data["short_interest"], data["avg_vol_30d"],
-                    data["days_to_cover"], data["date"] if data["date"] else None)
+    await _store_short_interest(db, pending)
 
     logger.info(f"✅ Short interest complete: {len(results)} updated, {errors} errors")
     return {
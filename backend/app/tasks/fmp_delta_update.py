@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 FMP Daily Delta Update
-Runs at 3:00 AM ET
+Runs at 3:00 AM ET (Celery beat); the standalone daily pipeline runs it before prescreen
 """
 
 import asyncio
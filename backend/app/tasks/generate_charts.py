@@ -2,24 +2,34 @@
 """
 Generate enhanced charts for shortlist stocks → Firebase Storage → URL in PostgreSQL
 Includes RSI(14) indicator for vision AI analysis
-Runs at 8:15 AM ET → CPU only → $0 cost
+Runs in the daily pipeline DAG after prescreen → CPU only → $0 cost
+
+One render → three encodings (image_encoding): size-budgeted vision image
+(spooled for the vision agent, uploaded as chart_vision_url for vision
+runs on another host), full-size share PNG (chart_url) and a WebP
+thumbnail (chart_thumb_url).
 """
 
 import asyncio
 import logging
-import io
 from datetime import date
-from typing import Dict
-import numpy as np
+from typing import Dict, List, Optional, Tuple
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend for Render worker
-import matplotlib.pyplot as plt
 from matplotlib.gridspec import GridSpec
 import pandas as pd
 
+from app.core.config import settings
 from app.core.database import get_asyncpg_pool
 from app.core.celery_app import celery_app
-from app.core.firebase import upload_chart_to_storage
+from app.core.firebase import chart_blob_exists, upload_chart_async
+from app.services.chart_rendering import (
+    FigureTemplate, candle_colors, chart_fingerprint, draw_candlesticks, get_figure_template,
+)
+from app.services.chart_render_pool import ChartRenderPool, frame_to_arrays
+from app.services.chart_spool import ensure_chart_columns, prune_spool, spool_chart
+from app.services.image_encoding import EncodedImage
+from app.services.market_structure import support_resistance, volume_profile
 
 logger = logging.getLogger(__name__)
 
@@ -36,19 +46,146 @@ RSI_OVERBOUGHT = "#FF8080"  # Red for 70+ zone
 RSI_OVERSOLD = "#77E4C8"  # Green for 30- zone
 TEXT_COLOR = "#E8EAED"  # Light text
 
+# Bump whenever the vision chart's drawing code changes (invalidates chart fingerprints)
+RENDERER_VERSION = "vision-2025.12-png8"
+CHART_VARIANTS = ("vision", "share", "thumb")
+
+
+class VisionChartTemplate(FigureTemplate):
+    """
+    5x4 vision chart scaffolding: price / RSI / volume / volume-profile axes,
+    backgrounds, RSI zones, tick styling, labels and watermark. Built once
+    per worker; render() only adds the per-symbol data artists.
+    """
+
+    def __init__(self):
+        super().__init__(figsize=(5, 4), dpi=100, facecolor=BACKGROUND)
+        fig = self.fig
+        # GridSpec: price chart, RSI, volume, and volume profile
+        gs = GridSpec(4, 4, figure=fig,
+                      height_ratios=[3, 0.8, 0.8, 0.1],
+                      width_ratios=[3, 0.5, 0.02, 0.3])
+
+        self.ax_price = ax_price = fig.add_subplot(gs[0, 0])  # Main price chart
+        self.ax_rsi = ax_rsi = fig.add_subplot(gs[1, 0], sharex=ax_price)  # RSI indicator
+        self.ax_vol = ax_vol = fig.add_subplot(gs[2, 0], sharex=ax_price)  # Volume bars
+        self.ax_profile = ax_profile = fig.add_subplot(gs[0, 3])  # Volume profile (right side)
+
+        # Set backgrounds
+        for ax in [ax_price, ax_rsi, ax_vol, ax_profile]:
+            ax.set_facecolor(BACKGROUND)
+
+        # Draw RSI overbought/oversold zones
+        ax_rsi.axhspan(70, 100, color=RSI_OVERBOUGHT, alpha=0.15)  # Overbought zone
+        ax_rsi.axhspan(0, 30, color=RSI_OVERSOLD, alpha=0.15)  # Oversold zone
+        ax_rsi.axhline(70, color=RSI_OVERBOUGHT, linestyle='--', lw=0.8, alpha=0.5)
+        ax_rsi.axhline(30, color=RSI_OVERSOLD, linestyle='--', lw=0.8, alpha=0.5)
+        ax_rsi.axhline(50, color=GRID, linestyle='-', lw=0.5, alpha=0.5)  # Midline
+
+        # RSI styling
+        ax_rsi.set_ylim(0, 100)
+        ax_rsi.set_ylabel('RSI', color=TEXT_COLOR, fontsize=6)
+        ax_rsi.yaxis.set_label_position("right")
+        ax_rsi.yaxis.tick_right()
+        ax_rsi.tick_params(axis='y', colors=TEXT_COLOR, labelsize=5)
+        ax_rsi.set_yticks([30, 50, 70])
+        ax_rsi.grid(True, color=GRID, alpha=0.2, lw=0.5)
+
+        # Styling
+        ax_price.grid(True, color=GRID, alpha=0.3, lw=0.5)
+        ax_vol.grid(True, color=GRID, alpha=0.2, lw=0.5)
+
+        # Remove ticks for cleaner look
+        ax_price.set_xticks([])
+        ax_rsi.set_xticks([])
+        ax_vol.set_xticks([])
+        ax_profile.set_xticks([])
+        ax_profile.set_yticks([])
+
+        # Price labels on right side of price chart
+        ax_price.yaxis.set_label_position("right")
+        ax_price.yaxis.tick_right()
+        ax_price.tick_params(axis='y', colors=TEXT_COLOR, labelsize=6)
+        ax_vol.set_yticks([])
+
+        # Symbol label (text swapped per render; empty string draws nothing)
+        self.symbol_text = ax_price.text(0.02, 0.98, "", transform=ax_price.transAxes,
+                                         fontsize=8, fontweight='bold', color=TEXT_COLOR,
+                                         verticalalignment='top')
+
+        # Add faint watermark in center of price chart
+        ax_price.text(0.5, 0.5, 'BullsBears.xyz', transform=ax_price.transAxes,
+                     fontsize=14, fontweight='bold', color='#FFFFFF',
+                     alpha=0.08, ha='center', va='center',
+                     fontfamily='sans-serif', style='italic')
+
+        fig.subplots_adjust(left=0.02, right=0.88, top=0.98, bottom=0.02, hspace=0.08, wspace=0.1)
+
+    def render(self, df: pd.DataFrame, symbol: str, rsi: pd.Series) -> bytes:
+        ax_price, ax_rsi, ax_vol, ax_profile = self.ax_price, self.ax_rsi, self.ax_vol, self.ax_profile
+
+        # Calculate S/R levels (clustered pivots)
+        sr_levels = support_resistance(df["high_price"].to_numpy(), df["low_price"].to_numpy())
+
+        opens = df["open_price"].to_numpy()
+        closes = df["close_price"].to_numpy()
+
+        # Draw candlesticks (one LineCollection + one PolyCollection)
+        self.track(list(draw_candlesticks(
+            ax_price, opens, df["high_price"].to_numpy(), df["low_price"].to_numpy(), closes,
+            BULL, BEAR, wick_lw=1, body_lw=0.5, wick_capstyle='round'
+        )))
+
+        # Draw S/R lines
+        for level in sr_levels["resistance"]:
+            self.track(ax_price.axhline(y=level, color=RESISTANCE, linestyle='--',
+                                        lw=1, alpha=0.7, label='R'))
+        for level in sr_levels["support"]:
+            self.track(ax_price.axhline(y=level, color=SUPPORT, linestyle='--',
+                                        lw=1, alpha=0.7, label='S'))
+
+        # Volume bars with color
+        colors = candle_colors(opens, closes, BULL, BEAR)
+        self.track(ax_vol.bar(range(len(df)), df["volume"], color=colors, width=0.8, alpha=0.7))
+
+        # RSI indicator (14-period)
+        self.track(ax_rsi.plot(range(len(df)), rsi.values, color=RSI_COLOR, lw=1.5, alpha=0.9))
+
+        # Volume profile (horizontal bars on right) – volume-weighted histogram of closes
+        profile = volume_profile(closes, df["volume"].to_numpy(),
+                                 df["low_price"].min(), df["high_price"].max())
+        self.track(ax_profile.barh(profile.mids, profile.normalized(), height=profile.bin_height * 0.9,
+                                   color=NEUTRAL, alpha=0.5))
+        ax_profile.set_ylim(ax_price.get_ylim())
+        ax_price.set_xlim(-1, len(df))
+
+        self.symbol_text.set_text(symbol)
+        return self.to_png()
+
 
 class ChartGenerator:
     """Generate pretty annotated charts and upload to Firebase Storage"""
 
     def __init__(self):
         self.db = None
+        self._pending_uploads: Dict[str, asyncio.Task] = {}
 
     async def initialize(self):
         self.db = await get_asyncpg_pool()
 
-    async def generate_all_charts(self) -> Dict:
-        """Generate charts for latest SHORT_LIST → Firebase Storage → URL in DB"""
+    async def generate_all_charts(self, wait_for_uploads: bool = True) -> Dict:
+        """
+        Generate charts for latest SHORT_LIST → Firebase Storage → URL in DB
+
+        With CHART_HANDOFF on, each PNG is also spooled locally under its
+        fingerprint for the vision agent. wait_for_uploads=False then returns
+        as soon as every chart is spooled; uploads keep running in the
+        background until wait_for_uploads() is awaited.
+        """
         logger.info("📊 Starting chart generation for shortlist")
+        handoff = settings.CHART_HANDOFF
+        if handoff:
+            await asyncio.to_thread(prune_spool)
 
         # Get the most recent shortlist date (handles timezone differences)
         async with self.db.acquire() as conn:
@@ -81,98 +218,153 @@ class ChartGenerator:
         logger.info(f"Generating {len(symbols)} charts...")
 
         success_count = 0
+        reused_count = 0
+        spooled_count = 0
         failed = []
 
+        # One round trip for all bars, then fan renders out to the pool
+        frames = await self._fetch_90d_batch(symbols)
+        candidates = []
+        fingerprints = {}
         for symbol in symbols:
-            df = await self._fetch_90d(symbol)
+            df = frames.get(symbol)
             if df is not None and len(df) >= 30:
-                # Render pretty annotated chart to PNG bytes
-                png_bytes = self._render_chart(df, symbol)
-
-                # Upload to Firebase Storage
-                chart_url = upload_chart_to_storage(symbol, date_str, png_bytes)
-
-                if chart_url:
-                    # Store URL in shortlist_candidates
-                    await self._store_chart_url(symbol, shortlist_date, chart_url)
-                    success_count += 1
-                else:
-                    failed.append(symbol)
-                    logger.warning(f"Failed to upload chart for {symbol}")
+                arrays = frame_to_arrays(df)
+                fingerprints[symbol] = chart_fingerprint(RENDERER_VERSION, arrays, {"symbol": symbol})
+                candidates.append((symbol, arrays, None))
             else:
                 failed.append(symbol)
                 logger.warning(f"Insufficient data for {symbol}")
 
-        logger.info(f"✅ Generated {success_count}/{len(symbols)} charts")
+        # Same bars + same renderer → same PNG: reuse the URL already in Storage
+        existing = await self._find_existing_charts(list(fingerprints.values()))
+        jobs = []
+        for job in candidates:
+            symbol = job[0]
+            urls = existing.get(fingerprints[symbol])
+            if urls:
+                await self._store_chart_url(symbol, shortlist_date, urls[0], fingerprints[symbol], *urls[1:])
+                reused_count += 1
+            else:
+                jobs.append(job)
+        if reused_count:
+            logger.info(f"♻️ Reusing {reused_count} unchanged charts")
+
+        async def _publish(symbol: str, images: Dict[str, EncodedImage]) -> bool:
+            # Upload (bounded upload pool) + store URLs while other charts still render
+            share, thumb, vision = images["share"], images["thumb"], images["vision"]
+            chart_url, thumb_url, vision_url = await asyncio.gather(
+                upload_chart_async(symbol, date_str, share.data, content_type=share.mime),
+                upload_chart_async(symbol, date_str, thumb.data, content_type=thumb.mime, suffix="_thumb"),
+                upload_chart_async(symbol, date_str, vision.data, content_type=vision.mime, suffix="_vision"),
+            )
+            if not chart_url:
+                logger.warning(f"Failed to upload chart for {symbol}")
+                return False
+            await self._store_chart_url(symbol, shortlist_date, chart_url, fingerprints[symbol],
+                                        thumb_url, vision_url)
+            return True
+
+        publishers = {}
+        unspooled = set()
+        render_mode = "none"
+        if jobs:
+            async with ChartRenderPool() as pool:
+                async for symbol, images, error in pool.render_many("vision", jobs, variants=CHART_VARIANTS):
+                    if error is not None:
+                        failed.append(symbol)
+                        logger.warning(f"Render failed for {symbol}: {error}")
+                        continue
+                    publishers[symbol] = asyncio.create_task(_publish(symbol, images))
+                    # Local handoff: vision reads the spooled (budgeted) image, no Storage round trip
+                    vision_bytes = images["vision"].data
+                    if handoff and await asyncio.to_thread(spool_chart, fingerprints[symbol], vision_bytes):
+                        await self._store_chart_fingerprint(symbol, shortlist_date, fingerprints[symbol])
+                        spooled_count += 1
+                    else:
+                        unspooled.add(symbol)
+            render_mode = pool.mode
+
+        if not wait_for_uploads and handoff:
+            # Vision only needs the spool; charts that missed it still need their URL first
+            await asyncio.gather(*(publishers[s] for s in unspooled), return_exceptions=True)
+            self._pending_uploads.update(publishers)
+            logger.info(f"✅ Rendered {len(publishers)}/{len(symbols)} charts, spooled {spooled_count}, "
+                        f"reused {reused_count} ({render_mode} render) – uploads continue in background")
+            return {
+                "success": True,
+                "charts_generated": len(publishers) + reused_count,
+                "charts_reused": reused_count,
+                "charts_spooled": spooled_count,
+                "uploads_pending": sum(1 for t in publishers.values() if not t.done()),
+                "charts_failed": len(failed),
+                "failed_symbols": failed[:10]
+            }
+
+        success_count, upload_failed = await self._collect_uploads(publishers)
+        failed.extend(upload_failed)
+
+        logger.info(f"✅ Generated {success_count}/{len(symbols)} charts, "
+                    f"reused {reused_count}, spooled {spooled_count} ({render_mode} render)")
 
         return {
             "success": True,
             "charts_generated": success_count,
+            "charts_reused": reused_count,
+            "charts_spooled": spooled_count,
             "charts_failed": len(failed),
             "failed_symbols": failed[:10]  # First 10 failures
         }
 
-    async def _fetch_90d(self, symbol: str) -> pd.DataFrame:
-        """Pull 90-day OHLCV from Prime DB"""
+    async def _collect_uploads(self, publishers: Dict[str, asyncio.Task]):
+        """Await upload tasks → (uploaded count, failed symbols)"""
+        results = await asyncio.gather(*publishers.values(), return_exceptions=True)
+        uploaded, failed = 0, []
+        for symbol, ok in zip(publishers.keys(), results):
+            if ok is True:
+                uploaded += 1
+            else:
+                failed.append(symbol)
+                if isinstance(ok, Exception):
+                    logger.warning(f"Failed to publish chart for {symbol}: {ok}")
+        return uploaded, failed
+
+    async def wait_for_uploads(self) -> Dict:
+        """Finish background uploads started by generate_all_charts(wait_for_uploads=False)"""
+        publishers, self._pending_uploads = self._pending_uploads, {}
+        if not publishers:
+            return {"charts_uploaded": 0, "upload_failed": 0, "failed_symbols": []}
+        uploaded, failed = await self._collect_uploads(publishers)
+        logger.info(f"☁️ Background chart uploads done: {uploaded}/{len(publishers)}")
+        return {"charts_uploaded": uploaded, "upload_failed": len(failed), "failed_symbols": failed[:10]}
+
+    async def _fetch_90d_batch(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """Pull the latest 90 bars for every symbol in one query"""
         query = """
-        SELECT date, open_price, high_price, low_price, close_price, volume
-        FROM prime_ohlc_90d
-        WHERE symbol = $1
-        ORDER BY date DESC
-        LIMIT 90
+        SELECT symbol, date, open_price, high_price, low_price, close_price, volume
+        FROM (
+            SELECT symbol, date, open_price, high_price, low_price, close_price, volume,
+                   ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS rn
+            FROM prime_ohlc_90d
+            WHERE symbol = ANY($1::text[])
+        ) t
+        WHERE rn <= 90
+        ORDER BY symbol, date
         """
         async with self.db.acquire() as conn:
-            rows = await conn.fetch(query, symbol)
+            rows = await conn.fetch(query, symbols)
 
         if not rows:
-            return pd.DataFrame()
+            return {}
 
-        # Convert asyncpg Records to dicts
-        data = [dict(row) for row in rows]
-        df = pd.DataFrame(data)
+        df = pd.DataFrame([dict(row) for row in rows])
         df["date"] = pd.to_datetime(df["date"])
-        # Convert Decimal to float for matplotlib compatibility
-        for col in ["open_price", "high_price", "low_price", "close_price"]:
+        for col in ["open_price", "high_price", "low_price", "close_price", "volume"]:
             df[col] = df[col].astype(float)
-        df["volume"] = df["volume"].astype(float)
-        df = df.sort_values("date").set_index("date")
-        return df
-
-    def _calculate_support_resistance(self, df: pd.DataFrame) -> Dict:
-        """Calculate support and resistance levels using pivot points"""
-        highs = df["high_price"].values
-        lows = df["low_price"].values
-
-        # Use recent 30 days for S/R calculation
-        recent_highs = highs[-30:]
-        recent_lows = lows[-30:]
-
-        # Find local maxima/minima for S/R levels
-        resistance_levels = []
-        support_levels = []
-
-        # Simple pivot point method
-        for i in range(2, len(recent_highs) - 2):
-            # Local high (resistance)
-            if recent_highs[i] > recent_highs[i-1] and recent_highs[i] > recent_highs[i-2] and \
-               recent_highs[i] > recent_highs[i+1] and recent_highs[i] > recent_highs[i+2]:
-                resistance_levels.append(recent_highs[i])
-            # Local low (support)
-            if recent_lows[i] < recent_lows[i-1] and recent_lows[i] < recent_lows[i-2] and \
-               recent_lows[i] < recent_lows[i+1] and recent_lows[i] < recent_lows[i+2]:
-                support_levels.append(recent_lows[i])
-
-        # If not enough levels found, use percentile method
-        if len(resistance_levels) < 2:
-            resistance_levels = [np.percentile(recent_highs, 80), np.percentile(recent_highs, 95)]
-        if len(support_levels) < 2:
-            support_levels = [np.percentile(recent_lows, 5), np.percentile(recent_lows, 20)]
-
-        # Sort and dedupe (keep top 2 of each)
-        resistance_levels = sorted(set(resistance_levels), reverse=True)[:2]
-        support_levels = sorted(set(support_levels))[:2]
-
-        return {"resistance": resistance_levels, "support": support_levels}
+        return {
+            symbol: group.drop(columns="symbol").set_index("date")
+            for symbol, group in df.groupby("symbol", sort=False)
+        }
 
     def _calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
         """Calculate RSI(14) indicator for vision analysis"""
@@ -183,139 +375,77 @@ class ChartGenerator:
         rsi = 100 - (100 / (1 + rs))
         return rsi
 
-    def _render_chart(self, df: pd.DataFrame, symbol: str = "") -> bytes:
+    def _render_chart(self, df: pd.DataFrame, symbol: str = "", reuse_template: bool = True) -> bytes:
         """Render enhanced chart with S/R lines, volume profile, and RSI for vision AI"""
-        # Create figure with GridSpec: price chart, RSI, volume, and volume profile
-        fig = plt.figure(figsize=(5, 4), dpi=100, facecolor=BACKGROUND)
-        gs = GridSpec(4, 4, figure=fig,
-                      height_ratios=[3, 0.8, 0.8, 0.1],
-                      width_ratios=[3, 0.5, 0.02, 0.3])
-
-        ax_price = fig.add_subplot(gs[0, 0])  # Main price chart
-        ax_rsi = fig.add_subplot(gs[1, 0], sharex=ax_price)  # RSI indicator
-        ax_vol = fig.add_subplot(gs[2, 0], sharex=ax_price)  # Volume bars
-        ax_profile = fig.add_subplot(gs[0, 3])  # Volume profile (right side)
-
-        # Set backgrounds
-        for ax in [ax_price, ax_rsi, ax_vol, ax_profile]:
-            ax.set_facecolor(BACKGROUND)
-
-        # Calculate S/R levels
-        sr_levels = self._calculate_support_resistance(df)
-
-        # Draw candlesticks
-        for i, (_, row) in enumerate(df.iterrows()):
-            is_bull = row["close_price"] >= row["open_price"]
-            color = BULL if is_bull else BEAR
-
-            # Wick
-            ax_price.plot([i, i], [row["low_price"], row["high_price"]],
-                         color=color, lw=1, solid_capstyle='round')
-            # Body
-            body_bottom = min(row["open_price"], row["close_price"])
-            body_height = abs(row["close_price"] - row["open_price"])
-            rect = plt.Rectangle((i - 0.35, body_bottom), 0.7, max(body_height, 0.01),
-                                 facecolor=color, edgecolor=color, lw=0.5)
-            ax_price.add_patch(rect)
-
-        # Draw S/R lines
-        for level in sr_levels["resistance"]:
-            ax_price.axhline(y=level, color=RESISTANCE, linestyle='--',
-                            lw=1, alpha=0.7, label='R')
-        for level in sr_levels["support"]:
-            ax_price.axhline(y=level, color=SUPPORT, linestyle='--',
-                            lw=1, alpha=0.7, label='S')
-
-        # Volume bars with color
-        colors = [BULL if df.iloc[i]["close_price"] >= df.iloc[i]["open_price"] else BEAR
-                  for i in range(len(df))]
-        ax_vol.bar(range(len(df)), df["volume"], color=colors, width=0.8, alpha=0.7)
-
-        # RSI indicator (14-period)
-        rsi = self._calculate_rsi(df)
-        x_vals = range(len(df))
-
-        # Draw RSI overbought/oversold zones
-        ax_rsi.axhspan(70, 100, color=RSI_OVERBOUGHT, alpha=0.15)  # Overbought zone
-        ax_rsi.axhspan(0, 30, color=RSI_OVERSOLD, alpha=0.15)  # Oversold zone
-        ax_rsi.axhline(70, color=RSI_OVERBOUGHT, linestyle='--', lw=0.8, alpha=0.5)
-        ax_rsi.axhline(30, color=RSI_OVERSOLD, linestyle='--', lw=0.8, alpha=0.5)
-        ax_rsi.axhline(50, color=GRID, linestyle='-', lw=0.5, alpha=0.5)  # Midline
-
-        # Draw RSI line
-        ax_rsi.plot(x_vals, rsi.values, color=RSI_COLOR, lw=1.5, alpha=0.9)
-
-        # RSI styling
-        ax_rsi.set_ylim(0, 100)
-        ax_rsi.set_ylabel('RSI', color=TEXT_COLOR, fontsize=6)
-        ax_rsi.yaxis.set_label_position("right")
-        ax_rsi.yaxis.tick_right()
-        ax_rsi.tick_params(axis='y', colors=TEXT_COLOR, labelsize=5)
-        ax_rsi.set_yticks([30, 50, 70])
-        ax_rsi.grid(True, color=GRID, alpha=0.2, lw=0.5)
-
-        # Volume profile (horizontal bars on right)
-        price_range = np.linspace(df["low_price"].min(), df["high_price"].max(), 20)
-        vol_profile = np.zeros(len(price_range) - 1)
-        for i, (_, row) in enumerate(df.iterrows()):
-            for j in range(len(price_range) - 1):
-                if price_range[j] <= row["close_price"] <= price_range[j + 1]:
-                    vol_profile[j] += row["volume"]
-
-        # Normalize and plot volume profile
-        if vol_profile.max() > 0:
-            vol_profile = vol_profile / vol_profile.max()
-        price_mids = (price_range[:-1] + price_range[1:]) / 2
-        ax_profile.barh(price_mids, vol_profile, height=(price_range[1] - price_range[0]) * 0.9,
-                       color=NEUTRAL, alpha=0.5)
-        ax_profile.set_ylim(ax_price.get_ylim())
-
-        # Styling
-        ax_price.grid(True, color=GRID, alpha=0.3, lw=0.5)
-        ax_vol.grid(True, color=GRID, alpha=0.2, lw=0.5)
-        ax_price.set_xlim(-1, len(df))
-
-        # Remove ticks for cleaner look
-        ax_price.set_xticks([])
-        ax_rsi.set_xticks([])
-        ax_vol.set_xticks([])
-        ax_profile.set_xticks([])
-        ax_profile.set_yticks([])
-
-        # Price labels on right side of price chart
-        ax_price.yaxis.set_label_position("right")
-        ax_price.yaxis.tick_right()
-        ax_price.tick_params(axis='y', colors=TEXT_COLOR, labelsize=6)
-        ax_vol.set_yticks([])
+        if reuse_template:
+            template = get_figure_template("vision", VisionChartTemplate)
+            try:
+                return template.render(df, symbol, self._calculate_rsi(df))
+            finally:
+                template.clear()
+
+        # One-off figure (same scaffolding, discarded afterwards)
+        template = VisionChartTemplate()
+        png_bytes = template.render(df, symbol, self._calculate_rsi(df))
+        template.fig.clear()
+        return png_bytes
+
+    async def _find_existing_charts(
+        self, fingerprints: List[str]
+    ) -> Dict[str, Tuple[str, Optional[str], Optional[str]]]:
+        """
+        fingerprint → (chart_url, chart_thumb_url, chart_vision_url) for
+        charts already rendered, uploaded and still in Storage
+        """
+        if not fingerprints:
+            return {}
+        async with self.db.acquire() as conn:
+            await ensure_chart_columns(conn)
+            rows = await conn.fetch("""
+                SELECT DISTINCT ON (chart_fingerprint) chart_fingerprint, chart_url, chart_thumb_url,
+                       chart_vision_url
+                FROM shortlist_candidates
+                WHERE chart_fingerprint = ANY($1::text[]) AND chart_url IS NOT NULL
+                ORDER BY chart_fingerprint, updated_at DESC
+            """, fingerprints)
+        if not rows:
+            return {}
 
-        # Add symbol label
-        if symbol:
-            ax_price.text(0.02, 0.98, symbol, transform=ax_price.transAxes,
-                         fontsize=8, fontweight='bold', color=TEXT_COLOR,
-                         verticalalignment='top')
+        # Guard against blobs removed by bucket lifecycle rules
+        check_slots = asyncio.Semaphore(max(1, settings.CHART_UPLOAD_CONCURRENCY))
 
-        # Add faint watermark in center of price chart
-        ax_price.text(0.5, 0.5, 'BullsBears.xyz', transform=ax_price.transAxes,
-                     fontsize=14, fontweight='bold', color='#FFFFFF',
-                     alpha=0.08, ha='center', va='center',
-                     fontfamily='sans-serif', style='italic')
+        async def _check(url: str) -> bool:
+            async with check_slots:
+                return await asyncio.to_thread(chart_blob_exists, url)
 
-        plt.subplots_adjust(left=0.02, right=0.88, top=0.98, bottom=0.02, hspace=0.08, wspace=0.1)
+        alive = await asyncio.gather(*(_check(r["chart_url"]) for r in rows))
+        return {
+            r["chart_fingerprint"]: (r["chart_url"], r["chart_thumb_url"], r["chart_vision_url"])
+            for r, ok in zip(rows, alive) if ok
+        }
 
-        buf = io.BytesIO()
-        plt.savefig(buf, format="png", facecolor=BACKGROUND, edgecolor='none')
-        plt.close(fig)
-        buf.seek(0)
-        return buf.read()
+    async def _store_chart_fingerprint(self, symbol: str, today: date, fingerprint: str):
+        """Mark a chart as spooled (vision can start before chart_url exists)"""
+        async with self.db.acquire() as conn:
+            await conn.execute("""
+                UPDATE shortlist_candidates
+                SET chart_fingerprint = $1, updated_at = NOW()
+                WHERE date = $2 AND symbol = $3
+            """, fingerprint, today, symbol)
 
-    async def _store_chart_url(self, symbol: str, today: date, chart_url: str):
-        """Store chart URL in shortlist_candidates"""
+    async def _store_chart_url(self, symbol: str, today: date, chart_url: str,
+                               fingerprint: str = None, thumb_url: str = None, vision_url: str = None):
+        """Store chart URL (+ thumbnail / vision URLs, content fingerprint) in shortlist_candidates"""
         async with self.db.acquire() as conn:
             await conn.execute("""
                 UPDATE shortlist_candidates
-                SET chart_url = $1, updated_at = NOW()
+                SET chart_url = $1,
+                    chart_fingerprint = COALESCE($4, chart_fingerprint),
+                    chart_thumb_url = COALESCE($5, chart_thumb_url),
+                    chart_vision_url = COALESCE($6, chart_vision_url),
+                    updated_at = NOW()
                 WHERE date = $2 AND symbol = $3
-            """, chart_url, today, symbol)
+            """, chart_url, today, symbol, fingerprint, thumb_url, vision_url)
 
 
 # Global singleton
@@ -333,7 +463,7 @@ async def get_chart_generator() -> ChartGenerator:
 # Celery task
 @celery_app.task(name="tasks.generate_charts")
 def generate_charts(prev_result=None):
-    """Celery task — runs at 8:15 AM ET. Accepts prev_result for chain compatibility."""
+    """Celery task (manual trigger; daily runs go through the pipeline DAG). Accepts prev_result for chain compatibility."""
     async def _run():
         from datetime import datetime
         from app.services.system_state import is_system_on
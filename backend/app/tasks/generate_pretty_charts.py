@@ -9,7 +9,10 @@ Generate beautiful shareable charts for final picks with:
 - Bull/Bear icons from assets
 - Gradient watermark
 
-Runs right after arbitrator finalizes picks
+Runs right after arbitrator finalizes picks. Renders on the chart render
+pool and uploads a palette PNG (pretty_chart_url) plus a WebP thumbnail
+(pretty_thumb_url) from the same render. These are the social share
+images – the app itself renders from /picks/{id}/chart-spec (chart_spec).
 """
 
 import asyncio
@@ -30,7 +33,11 @@ from PIL import Image
 import pandas as pd
 
 from app.core.database import get_asyncpg_pool
-from app.core.firebase import upload_chart_to_storage
+from app.core.firebase import upload_chart_async
+from app.services.chart_rendering import candle_colors, draw_candlesticks
+from app.services.chart_render_pool import ChartRenderPool, frame_to_arrays
+from app.services.chart_spec import PICK_CHART_QUERY, pick_chart_levels
+from app.services.market_structure import support_resistance
 
 logger = logging.getLogger(__name__)
 
@@ -75,17 +82,7 @@ class PrettyChartGenerator:
 
         async with self.db.acquire() as conn:
             # Get today's picks with v5 3-tier targets (no legacy columns)
-            picks = await conn.fetch("""
-                SELECT p.id, p.symbol, p.direction, p.confidence,
-                       p.target_primary, p.target_medium, p.target_moonshot,
-                       p.confluence_score, p.confluence_methods,
-                       p.rsi_divergence, p.gann_alignment,
-                       p.weekly_pivots,
-                       p.pick_context,
-                       sc.price_at_selection as entry_price
-                FROM picks p
-                LEFT JOIN shortlist_candidates sc
-                    ON sc.symbol = p.symbol AND sc.date = p.created_at::date
+            picks = await conn.fetch(PICK_CHART_QUERY + """
                 WHERE p.created_at::date = CURRENT_DATE
                 ORDER BY p.confidence DESC
             """)
@@ -96,55 +93,14 @@ class PrettyChartGenerator:
 
         success_count = 0
         failed = []
+        jobs = []      # (symbol, arrays, render options)
+        pick_ids = {}  # symbol → pick id
         date_str = datetime.now().strftime("%Y-%m-%d")
 
         for pick in picks:
             symbol = pick["symbol"]
-            direction = pick["direction"]
-
-            # Get entry price
-            entry_price = float(pick["entry_price"]) if pick["entry_price"] else None
-
-            # Get pick_context for confluence_analysis
-            pick_context = pick["pick_context"]
-            if isinstance(pick_context, str):
-                import json
-                try:
-                    pick_context = json.loads(pick_context)
-                except (json.JSONDecodeError, TypeError):
-                    pick_context = {}
-            elif pick_context is None:
-                pick_context = {}
-
-            # v6 3-Tier Confluence data - directly from picks table
-            target_primary = float(pick["target_primary"]) if pick["target_primary"] else None
-            target_medium = float(pick["target_medium"]) if pick["target_medium"] else None
-            target_moonshot = float(pick["target_moonshot"]) if pick["target_moonshot"] else None
-            confluence_score = int(pick["confluence_score"] or 0)
-            confluence_methods = pick["confluence_methods"] or []
-            rsi_divergence = bool(pick["rsi_divergence"])
-            gann_alignment = bool(pick["gann_alignment"])
-
-            # Parse weekly pivots
-            weekly_pivots = pick["weekly_pivots"]
-            if isinstance(weekly_pivots, str):
-                try:
-                    weekly_pivots = json.loads(weekly_pivots)
-                except:
-                    weekly_pivots = None
-
-            # Get confluence_analysis from pick_context for stop_loss and swing data
-            conf_analysis = pick_context.get("confluence_analysis", {})
-            stop_loss = conf_analysis.get("stop_loss")
-            swing_low = conf_analysis.get("swing_low")
-            swing_high = conf_analysis.get("swing_high")
-
-            # Estimate stop_loss if not provided
-            if stop_loss is None:
-                if direction == "bullish":
-                    stop_loss = swing_low or (entry_price * 0.92 if entry_price else None)
-                else:
-                    stop_loss = swing_high or (entry_price * 1.08 if entry_price else None)
+            # v6 3-tier targets, stop loss, pivots – same levels the chart spec serves
+            options = pick_chart_levels(pick)
 
             # Fetch OHLC data
             df = await self._fetch_90d(symbol)
@@ -153,36 +109,33 @@ class PrettyChartGenerator:
                 logger.warning(f"Insufficient data for {symbol}")
                 continue
 
-            # Generate pretty chart with 3-tier confluence targets
-            png_bytes = self._render_pretty_chart(
-                df=df,
-                symbol=symbol,
-                direction=direction,
-                entry_price=entry_price,
-                target_primary=target_primary,
-                target_medium=target_medium,
-                target_moonshot=target_moonshot,
-                stop_loss=stop_loss,
-                confluence_score=confluence_score,
-                confluence_methods=confluence_methods,
-                weekly_pivots=weekly_pivots,
-                rsi_divergence=rsi_divergence,
-                gann_alignment=gann_alignment,
-                swing_low=swing_low,
-                swing_high=swing_high
-            )
-
-            # Upload to Firebase Storage (different folder for pretty charts)
-            chart_url = upload_chart_to_storage(
-                symbol, 
-                date_str, 
-                png_bytes, 
-                folder="pretty"
-            )
-
+            # Pretty chart with 3-tier confluence targets (rendered on the pool below)
+            pick_ids[symbol] = pick["id"]
+            jobs.append((symbol, frame_to_arrays(df), options))
+
+        # Upload to Firebase Storage (different folder for pretty charts) –
+        # runs on the upload pool while the next pick renders
+        uploads = []  # (pick_id, symbol, share upload, thumb upload)
+        if jobs:
+            async with ChartRenderPool() as pool:
+                async for symbol, images, error in pool.render_many("pretty", jobs, variants=("share", "thumb")):
+                    if error is not None:
+                        failed.append(symbol)
+                        logger.warning(f"Pretty chart render failed for {symbol}: {error}")
+                        continue
+                    share, thumb = images["share"], images["thumb"]
+                    uploads.append((pick_ids[symbol], symbol, asyncio.create_task(
+                        upload_chart_async(symbol, date_str, share.data, folder="pretty", content_type=share.mime)
+                    ), asyncio.create_task(
+                        upload_chart_async(symbol, date_str, thumb.data, folder="pretty",
+                                           content_type=thumb.mime, suffix="_thumb")
+                    )))
+
+        for pick_id, symbol, share_task, thumb_task in uploads:
+            chart_url, thumb_url = await share_task, await thumb_task
             if chart_url:
-                # Store pretty chart URL in picks table
-                await self._store_pretty_chart_url(pick["id"], chart_url)
+                # Store pretty chart URLs in picks table
+                await self._store_pretty_chart_url(pick_id, chart_url, thumb_url)
                 success_count += 1
                 logger.info(f"✅ Pretty chart generated for {symbol}")
             else:
@@ -216,39 +169,6 @@ class PrettyChartGenerator:
         df["volume"] = df["volume"].astype(float)
         return df.set_index("date")
 
-    def _calculate_support_resistance(self, df: pd.DataFrame) -> Dict:
-        """Calculate support and resistance levels using pivot points"""
-        import numpy as np
-        highs = df["high_price"].values
-        lows = df["low_price"].values
-
-        # Use recent 30 days for S/R calculation
-        recent_highs = highs[-30:]
-        recent_lows = lows[-30:]
-
-        resistance_levels = []
-        support_levels = []
-
-        # Simple pivot point method
-        for i in range(2, len(recent_highs) - 2):
-            if recent_highs[i] > recent_highs[i-1] and recent_highs[i] > recent_highs[i-2] and \
-               recent_highs[i] > recent_highs[i+1] and recent_highs[i] > recent_highs[i+2]:
-                resistance_levels.append(recent_highs[i])
-            if recent_lows[i] < recent_lows[i-1] and recent_lows[i] < recent_lows[i-2] and \
-               recent_lows[i] < recent_lows[i+1] and recent_lows[i] < recent_lows[i+2]:
-                support_levels.append(recent_lows[i])
-
-        # Fallback to percentile method
-        if len(resistance_levels) < 2:
-            resistance_levels = [np.percentile(recent_highs, 80), np.percentile(recent_highs, 95)]
-        if len(support_levels) < 2:
-            support_levels = [np.percentile(recent_lows, 5), np.percentile(recent_lows, 20)]
-
-        resistance_levels = sorted(set(resistance_levels), reverse=True)[:2]
-        support_levels = sorted(set(support_levels))[:2]
-
-        return {"resistance": resistance_levels, "support": support_levels}
-
     def _calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
         """Calculate RSI(14) indicator"""
         delta = df["close_price"].diff()
@@ -347,7 +267,7 @@ class PrettyChartGenerator:
             ax.set_facecolor(BACKGROUND)
 
         # Calculate S/R levels
-        sr_levels = self._calculate_support_resistance(df)
+        sr_levels = support_resistance(df["high_price"].to_numpy(), df["low_price"].to_numpy())
 
         # Draw S/R lines
         for level in sr_levels["resistance"]:
@@ -355,16 +275,13 @@ class PrettyChartGenerator:
         for level in sr_levels["support"]:
             ax_price.axhline(y=level, color='#77E4C8', linestyle='--', lw=1.2, alpha=0.5, zorder=1)
 
-        # Draw candlesticks
-        for i, (idx, row) in enumerate(df.iterrows()):
-            is_bull = row["close_price"] >= row["open_price"]
-            color = BULL_CANDLE if is_bull else BEAR_CANDLE
-            ax_price.plot([i, i], [row["low_price"], row["high_price"]], color=color, lw=1.5, zorder=2)
-            body_bottom = min(row["open_price"], row["close_price"])
-            body_height = abs(row["close_price"] - row["open_price"])
-            rect = Rectangle((i - 0.35, body_bottom), 0.7, max(body_height, 0.01),
-                             facecolor=color, edgecolor=color, zorder=3)
-            ax_price.add_patch(rect)
+        # Draw candlesticks (one LineCollection + one PolyCollection)
+        opens = df["open_price"].to_numpy()
+        closes = df["close_price"].to_numpy()
+        draw_candlesticks(
+            ax_price, opens, df["high_price"].to_numpy(), df["low_price"].to_numpy(), closes,
+            BULL_CANDLE, BEAR_CANDLE, wick_lw=1.5, body_lw=1.0, wick_zorder=2, body_zorder=3
+        )
 
         # Zone box positions
         box_start_x = len(df) + 2
@@ -523,8 +440,7 @@ class PrettyChartGenerator:
         ax_rsi.grid(True, color=GRID, alpha=0.3, lw=0.5)
 
         # Volume bars
-        vol_colors = [BULL_CANDLE if df.iloc[i]["close_price"] >= df.iloc[i]["open_price"]
-                      else BEAR_CANDLE for i in range(len(df))]
+        vol_colors = candle_colors(opens, closes, BULL_CANDLE, BEAR_CANDLE)
         ax_vol.bar(x_pos, df["volume"], color=vol_colors, width=0.8, alpha=0.6)
         ax_vol.set_ylabel('Vol', color=TEXT_COLOR, fontsize=9)
 
@@ -615,25 +531,29 @@ class PrettyChartGenerator:
         buf.seek(0)
         return buf.read()
 
-    async def _store_pretty_chart_url(self, pick_id: int, chart_url: str):
-        """Store pretty chart URL in picks table"""
+    async def _store_pretty_chart_url(self, pick_id: int, chart_url: str, thumb_url: Optional[str] = None):
+        """Store pretty chart URL (+ thumbnail URL) in picks table"""
         async with self.db.acquire() as conn:
-            # First check if pretty_chart_url column exists
-            exists = await conn.fetchval("""
-                SELECT EXISTS (
-                    SELECT 1 FROM information_schema.columns
-                    WHERE table_name = 'picks' AND column_name = 'pretty_chart_url'
-                )
+            # First check if pretty_chart_url / pretty_thumb_url columns exist
+            existing = await conn.fetch("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_name = 'picks' AND column_name IN ('pretty_chart_url', 'pretty_thumb_url')
             """)
+            existing = {r["column_name"] for r in existing}
 
-            if not exists:
+            if "pretty_chart_url" not in existing:
                 await conn.execute("""
                     ALTER TABLE picks ADD COLUMN pretty_chart_url TEXT
                 """)
+            if "pretty_thumb_url" not in existing:
+                await conn.execute("""
+                    ALTER TABLE picks ADD COLUMN pretty_thumb_url TEXT
+                """)
 
             await conn.execute("""
-                UPDATE picks SET pretty_chart_url = $1 WHERE id = $2
-            """, chart_url, pick_id)
+                UPDATE picks SET pretty_chart_url = $1, pretty_thumb_url = COALESCE($3, pretty_thumb_url)
+                WHERE id = $2
+            """, chart_url, pick_id, thumb_url)
 
 
 # Singleton
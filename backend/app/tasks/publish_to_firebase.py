@@ -7,7 +7,7 @@ logger = logging.getLogger(__name__)
 
 @celery_app.task(name="tasks.publish_to_firebase")
 def publish_to_firebase(picks_data: dict):
-    """Called by run_arbitrator after picks are made"""
+    """Manual re-publish – daily picks are published by the pipeline DAG's publish stage"""
     publish_picks_to_firebase(picks_data)
     logger.info("Picks published to Firebase")
     return {"status": "published"}
\ No newline at end of file
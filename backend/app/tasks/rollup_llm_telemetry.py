@@ -0,0 +1,25 @@
+# backend/app/tasks/rollup_llm_telemetry.py
+"""
+LLM Telemetry Rollup - llm_calls → llm_calls_daily (per day / agent / provider / model)
+Re-rolls yesterday too, so calls logged after last night's run are counted
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from app.core.celery_app import celery_app
+from app.services.llm_telemetry import LOCAL_TZ, rollup_llm_calls
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="tasks.rollup_llm_telemetry")
+def rollup_llm_telemetry(days: int = 2):
+    """Nightly: rebuild the last `days` daily rows (default today + yesterday)"""
+    async def _run():
+        today = datetime.now(ZoneInfo(LOCAL_TZ)).date()
+        rows = await rollup_llm_calls(today - timedelta(days=days - 1), today)
+        logger.info(f"LLM telemetry rollup: {rows} daily rows for the last {days} day(s)")
+        return {"status": "success", "rows": rows}
+
+    return asyncio.run(_run())
@@ -0,0 +1,30 @@
+# backend/app/tasks/run_daily_pipeline.py
+"""
+Daily Pipeline Task - the whole morning pipeline as one DAG run (app/services/daily_pipeline.py)
+Independent stages run concurrently; wall time ≈ the critical path (logged at the end)
+"""
+import asyncio
+import json
+import logging
+from app.core.celery_app import celery_app
+from app.services.daily_pipeline import close_pipeline_resources, run_daily_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="tasks.run_daily_pipeline")
+def run_daily_pipeline_task():
+    """
+    Beat: 8:00 AM ET. Data refreshes have their own off-hours beat entries,
+    so they're left out. Returns status, per-stage results and the timing /
+    critical-path report
+    """
+    async def _run():
+        try:
+            return await run_daily_pipeline(refresh_data=False)
+        finally:
+            await close_pipeline_resources()
+
+    result = asyncio.run(_run())
+    # Stage results can hold dates/Decimals – keep the Celery result JSON-safe
+    return json.loads(json.dumps(result, default=str))
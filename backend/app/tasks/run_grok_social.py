@@ -32,16 +32,17 @@ def run_grok_social(prev_result=None):
 
         try:
             results = await run_social_analysis([{"symbol": s["symbol"]} for s in symbols])
+            reused = sum(1 for r in results if r.get("reused"))
             elapsed = (datetime.now() - start_time).total_seconds()
-            logger.info(f"Social analysis complete: {len(results)} symbols")
+            logger.info(f"Social analysis complete: {len(results)} symbols ({reused} reused)")
 
             # Log completion
             tier_counts = await get_tier_counts()
             await log_activity("social", "completed",
-                              {"analyzed": len(results)},
+                              {"analyzed": len(results), "reused": reused},
                               tier_counts=tier_counts, duration_seconds=elapsed)
 
-            return {"status": "success", "analyzed": len(results)}
+            return {"status": "success", "analyzed": len(results), "reused": reused}
 
         except Exception as e:
             elapsed = (datetime.now() - start_time).total_seconds()
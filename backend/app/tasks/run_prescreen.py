@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Prescreen Task - ACTIVE → SHORT_LIST (~75 stocks)
-Runs at 8:10 AM ET using Fireworks.ai qwen2.5-72b-instruct
+Daily run: prescreen stage of the pipeline DAG (after the data refreshes) using Fireworks.ai qwen2.5-72b-instruct
 """
 
 import asyncio
@@ -16,7 +16,7 @@ logger = logging.getLogger(__name__)
 @celery_app.task(name="tasks.run_prescreen")
 def run_prescreen(prev_result=None):
     """
-    Celery task - runs at 8:10 AM ET via Render cron
+    Celery task - manual trigger (daily runs go through the pipeline DAG)
     Filters ACTIVE tier (~1,700 stocks) → SHORT_LIST (exactly 75 stocks)
     Uses qwen2.5-72b-instruct on Fireworks.ai
     Accepts prev_result for chain compatibility.
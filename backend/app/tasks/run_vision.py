@@ -1,6 +1,7 @@
 # backend/app/tasks/run_vision.py
 """
-Vision Analysis Task - Fetches chart URLs from DB, sends images to Fireworks Vision API (Qwen3-VL)
+Vision Analysis Task - Fetches chart fingerprints/URLs from DB, sends images to Fireworks Vision API (Qwen3-VL)
+Charts spooled locally by generate_charts are read from disk; chart_url is the fallback
 """
 import asyncio
 import logging
@@ -8,6 +9,7 @@ from datetime import datetime
 from app.core.celery_app import celery_app
 from app.services.cloud_agents import run_vision_analysis
 from app.core.database import get_asyncpg_pool
+from app.services.chart_spool import ensure_chart_columns
 
 logger = logging.getLogger(__name__)
 
@@ -36,12 +38,13 @@ async def _run_vision():
 
     shortlist_date = latest['latest_date']
 
-    # Get charts with URLs
+    # Get charts that are spooled locally and/or uploaded
     async with db.acquire() as conn:
+        await ensure_chart_columns(conn)
         charts = await conn.fetch("""
-            SELECT symbol, chart_url
+            SELECT symbol, chart_url, chart_vision_url, chart_fingerprint
             FROM shortlist_candidates
-            WHERE date = $1 AND chart_url IS NOT NULL
+            WHERE date = $1 AND (chart_url IS NOT NULL OR chart_fingerprint IS NOT NULL)
             ORDER BY rank
         """, shortlist_date)
 
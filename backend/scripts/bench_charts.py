@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+BullsBears Chart Render Benchmark
+Offline (no DB, no Firebase) timings for the two chart renderers on
+synthetic 90-bar OHLCV fixtures – trending, ranging and gappy:
+  - vision chart  (ChartGenerator._render_chart,       5x4 @ 100 dpi)
+      reused figure template ("vision") vs a fresh figure ("vision_fresh")
+  - pretty chart  (PrettyChartGenerator._render_pretty_chart, 14x10 @ 150 dpi)
+  - shortlist batch (--batch N): N vision charts through ChartRenderPool
+    at 0 (thread), 1, 2, ... --workers processes → wall time per pool size
+
+Per chart type × fixture: p50 / p95 / mean render ms, peak RSS, PNG size
+(+ encoded vision/share/thumb sizes) and Python-heap churn. Each case runs
+in a fresh spawned process so peak RSS belongs to that renderer alone.
+
+Results are written as JSON (git commit, host info, results) to
+bench_results/charts_<commit>.json so runs can be compared across commits.
+
+Usage:
+  python -m scripts.bench_charts
+  python -m scripts.bench_charts --runs 50 --output bench_output.json
+  python -m scripts.bench_charts --charts vision --fixtures gappy
+  python -m scripts.bench_charts --batch 75 --workers 4
+  python -m scripts.bench_charts --compare bench_results/charts_abc1234.json
+  python -m scripts.bench_charts --compare old.json new.json   # no re-run
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s | %(levelname)s | %(message)s")
+logger = logging.getLogger(__name__)
+
+FIXTURES = ("trending", "ranging", "gappy")
+CHARTS = ("vision", "vision_fresh", "pretty")
+RESULTS_DIR = "bench_results"
+COMPARE_METRICS = ("p50_ms", "p95_ms", "peak_rss_mb", "png_bytes")
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+def _ohlcv(closes: np.ndarray, rng: np.random.Generator, index: pd.DatetimeIndex,
+           gap_sigma: float = 0.005) -> pd.DataFrame:
+    """Wrap a close series in opens/highs/lows/volume like a prime_ohlc_90d fetch"""
+    n = len(closes)
+    opens = np.r_[closes[0], closes[:-1]] * (1 + rng.normal(0, gap_sigma, n))
+    highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.01, n)))
+    lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        "open_price": opens,
+        "high_price": highs,
+        "low_price": lows,
+        "close_price": closes,
+        "volume": rng.integers(100_000, 5_000_000, n).astype(float),
+    }, index=index)
+
+
+def make_fixture(n: int = 90, seed: int = 7, kind: str = "random") -> pd.DataFrame:
+    """
+    Synthetic OHLCV shaped like a prime_ohlc_90d fetch (date index, *_price columns).
+
+    random   – plain 2% random walk
+    trending – steady +0.4%/bar drift with small noise (one-sided S/R, tall profile)
+    ranging  – mean-reverting oscillation around 100 (dense pivots / clustered levels)
+    gappy    – random walk with overnight gaps, missing sessions (holidays/halts)
+               and zero-volume bars
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2025-01-02", periods=n, name="date")
+
+    if kind == "trending":
+        closes = 100 * np.cumprod(1 + 0.004 + rng.normal(0, 0.008, n))
+        return _ohlcv(closes, rng, index)
+
+    if kind == "ranging":
+        t = np.arange(n)
+        closes = 100 + 4 * np.sin(t / 5) + rng.normal(0, 0.8, n)
+        return _ohlcv(closes, rng, index)
+
+    if kind == "gappy":
+        # Drop ~10% of sessions so the date index has holes
+        keep = np.sort(rng.choice(n + n // 10, size=n, replace=False))
+        index = pd.bdate_range("2025-01-02", periods=n + n // 10, name="date")[keep]
+        closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, n))
+        df = _ohlcv(closes, rng, index, gap_sigma=0.04)
+        df.iloc[rng.choice(n, size=3, replace=False), df.columns.get_loc("volume")] = 0.0
+        return df
+
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, n))
+    return _ohlcv(closes, rng, index)
+
+
+def pretty_kwargs(df: pd.DataFrame) -> dict:
+    hi, lo, last = float(df["high_price"].max()), float(df["low_price"].min()), float(df["close_price"].iloc[-1])
+    return dict(
+        df=df, symbol="BENCH", direction="bullish", entry_price=last,
+        target_primary=hi * 1.05, target_medium=hi * 1.10, target_moonshot=hi * 1.20,
+        stop_loss=lo, confluence_score=3, confluence_methods=["fib", "pivot", "gann"],
+        weekly_pivots={"pivot": last, "r1": last * 1.03, "r2": last * 1.06, "s1": last * 0.97, "s2": last * 0.94},
+        rsi_divergence=True, gann_alignment=True, swing_low=lo, swing_high=hi,
+    )
+
+
+def _percentile(samples, pct: float) -> float:
+    return float(np.percentile(samples, pct))
+
+
+def _rss_mb() -> float:
+    """Current RSS in MB (Linux /proc); 0 elsewhere"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024   # bytes on macOS, KB on Linux
+
+
+def time_renderer(fn, runs: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples, size = [], 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        png = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+        size = len(png)
+    return {
+        "runs": runs,
+        "mean_ms": round(statistics.mean(samples), 2),
+        "p50_ms": round(_percentile(samples, 50), 2),
+        "p95_ms": round(_percentile(samples, 95), 2),
+        "min_ms": round(min(samples), 2),
+        "png_bytes": size,
+        **measure_alloc(fn),
+    }
+
+
+def _make_renderer(chart: str, df: pd.DataFrame):
+    from app.tasks.generate_charts import ChartGenerator
+    from app.tasks.generate_pretty_charts import PrettyChartGenerator
+
+    if chart == "vision":
+        vision = ChartGenerator()
+        return lambda: vision._render_chart(df, "BENCH")
+    if chart == "vision_fresh":
+        vision = ChartGenerator()
+        return lambda: vision._render_chart(df, "BENCH", reuse_template=False)
+    if chart == "pretty":
+        pretty = PrettyChartGenerator()
+        kwargs = pretty_kwargs(df)
+        return lambda: pretty._render_pretty_chart(**kwargs)
+    raise ValueError(f"Unknown chart type: {chart}")
+
+
+def run_case(chart: str, fixture: str, runs: int, warmup: int) -> dict:
+    """One chart type × fixture – runs inside its own spawned process"""
+    from app.services.image_encoding import encode_variants
+
+    logging.getLogger().setLevel(logging.WARNING)
+    warnings.filterwarnings("ignore", category=UserWarning)   # pretty chart's tight_layout notice
+    fn = _make_renderer(chart, make_fixture(kind=fixture))
+    rss_before = _rss_mb()
+    result = time_renderer(fn, runs, warmup)
+    variants = ("share", "thumb") if chart == "pretty" else ("vision", "share", "thumb")
+    result["encoded_bytes"] = {k: len(v) for k, v in encode_variants(fn(), variants).items()}
+    result["rss_before_mb"] = round(rss_before, 1)
+    result["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+    return result
+
+
+def run_isolated(chart: str, fixture: str, runs: int, warmup: int) -> dict:
+    """run_case in a fresh interpreter so ru_maxrss isn't shared between cases"""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_case, (chart, fixture, runs, warmup))
+
+
+def measure_alloc(fn, runs: int = 3) -> dict:
+    """Python-heap churn per render: peak traced KB and net new blocks still alive afterwards (tracemalloc)"""
+    peaks, blocks = [], []
+    for _ in range(runs):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        fn()
+        after = tracemalloc.take_snapshot()
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        blocks.append(sum(max(0, d.count_diff) for d in after.compare_to(before, "lineno")))
+    return {"alloc_peak_kb": round(statistics.median(peaks), 1), "alloc_blocks": int(statistics.median(blocks))}
+
+
+def time_batch(n_charts: int, max_workers: int) -> dict:
+    """Wall time to render a full shortlist through ChartRenderPool per pool size"""
+    from app.services.chart_render_pool import ChartRenderPool, frame_to_arrays
+
+    jobs = [(f"B{i:03d}", frame_to_arrays(make_fixture(seed=i)), None) for i in range(n_charts)]
+
+    async def _run(workers: int) -> dict:
+        async with ChartRenderPool(workers=workers) as pool:
+            t_start = time.perf_counter()
+            await pool.render("vision", "WARM", jobs[0][1])   # Excludes pool start-up
+            t0 = time.perf_counter()
+            done = 0
+            async for _, png, err in pool.render_many("vision", jobs):
+                done += 1 if err is None and png else 0
+            wall = time.perf_counter() - t0
+            return {
+                "mode": pool.mode,
+                "effective_workers": pool.workers if pool.mode == "process" else 1,
+                "charts": done,
+                "startup_s": round(t0 - t_start, 3),
+                "wall_s": round(wall, 3),
+                "charts_per_s": round(done / wall, 2) if wall else None,
+            }
+
+    return {f"workers={w}": asyncio.run(_run(w)) for w in range(0, max_workers + 1)}
+
+
+# =============================================================================
+# RESULTS
+# =============================================================================
+
+def git_commit() -> dict:
+    """Short HEAD sha + dirty flag of the working tree (None outside a git checkout)"""
+    def _git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    try:
+        sha = _git("rev-parse", "--short", "HEAD") or None
+        dirty = bool(_git("status", "--porcelain", "--untracked-files=no")) if sha else None
+    except (OSError, subprocess.SubprocessError):
+        sha, dirty = None, None
+    return {"commit": sha, "dirty": dirty}
+
+
+def bench_meta(args) -> dict:
+    import matplotlib
+    return {
+        **git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "runs": args.runs,
+        "warmup": args.warmup,
+    }
+
+
+def default_output(meta: dict) -> str:
+    tag = meta["commit"] or datetime.now().strftime("%Y%m%d_%H%M%S")
+    if meta["dirty"]:
+        tag += "-dirty"
+    return os.path.join(RESULTS_DIR, f"charts_{tag}.json")
+
+
+def print_cases(cases: dict):
+    print(f"\n{'chart':22} {'runs':>5} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'png KB':>7} "
+          f"{'vision KB':>9} {'RSS MB':>7} {'peak KB':>8} {'blocks':>7}")
+    for name, r in cases.items():
+        vision_kb = r["encoded_bytes"].get("vision", r["encoded_bytes"].get("share", 0)) / 1024
+        print(f"{name:22} {r['runs']:>5} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['mean_ms']:>8.1f} "
+              f"{r['png_bytes'] / 1024:>7.1f} {vision_kb:>9.1f} {r['peak_rss_mb']:>7.1f} "
+              f"{r['alloc_peak_kb']:>8.1f} {r['alloc_blocks']:>7}")
+
+
+def compare(old: dict, new: dict):
+    """Per-case deltas for COMPARE_METRICS between two result files"""
+    print(f"\n{old['meta'].get('commit')} → {new['meta'].get('commit')}"
+          f"{' (dirty)' if new['meta'].get('dirty') else ''}")
+    print(f"{'case':22} " + " ".join(f"{m:>26}" for m in COMPARE_METRICS))
+    for name, after in new["cases"].items():
+        before = old["cases"].get(name)
+        if before is None:
+            print(f"{name:22} (new)")
+            continue
+        cells = []
+        for metric in COMPARE_METRICS:
+            b, a = before.get(metric), after.get(metric)
+            if b is None or a is None:
+                cells.append(f"{'–':>26}")
+                continue
+            pct = (a - b) / b * 100 if b else 0.0
+            cells.append(f"{b:.1f} → {a:.1f} ({pct:+.0f}%)".rjust(26))
+        print(f"{name:22} " + " ".join(cells))
+    for name in sorted(old["cases"].keys() - new["cases"].keys()):
+        print(f"{name:22} (not in new run)")
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart render benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--charts", default=",".join(CHARTS), help=f"Comma list of {', '.join(CHARTS)}")
+    parser.add_argument("--fixtures", default=",".join(FIXTURES), help=f"Comma list of {', '.join(FIXTURES)}")
+    parser.add_argument("--batch", type=int, default=0, help="Also time N charts through the render pool")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Max pool size for --batch")
+    parser.add_argument("--output", help=f"Write JSON results here (default {RESULTS_DIR}/charts_<commit>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="Baseline results file; with a second file, compare the two without running")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        compare(load_results(args.compare[0]), load_results(args.compare[1]))
+        return
+
+    charts = [c for c in args.charts.split(",") if c]
+    fixtures = [f for f in args.fixtures.split(",") if f]
+    for c in charts:
+        if c not in CHARTS:
+            parser.error(f"unknown chart type: {c}")
+    for f in fixtures:
+        if f not in FIXTURES:
+            parser.error(f"unknown fixture: {f}")
+
+    results = {"meta": bench_meta(args), "cases": {}}
+    for chart in charts:
+        for fixture in fixtures:
+            results["cases"][f"{chart}/{fixture}"] = run_isolated(chart, fixture, args.runs, args.warmup)
+    print_cases(results["cases"])
+
+    if args.batch:
+        results["shortlist_batch"] = time_batch(args.batch, args.workers)
+        print(f"\n{'pool':12} {'mode':>8} {'charts':>7} {'startup s':>10} {'wall s':>8} {'charts/s':>9}")
+        for name, r in results["shortlist_batch"].items():
+            print(f"{name:12} {r['mode']:>8} {r['charts']:>7} {r['startup_s']:>10.2f} {r['wall_s']:>8.2f} {r['charts_per_s']:>9.2f}")
+
+    output = args.output or default_output(results["meta"])
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults → {output}")
+
+    if args.compare:
+        compare(load_results(args.compare[0]), results)
+
+
+if __name__ == "__main__":
+    main()
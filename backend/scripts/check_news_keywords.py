@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+BullsBears News Keyword Check
+Offline regression check for the tiered headline scorer (fib_calculator →
+keyword_matcher): inflected keywords must still score the way the old
+substring check did, and the word boundaries must keep blocking the false
+hits they were added for ("sec" in "second", "beat" in "upbeat").
+
+Exits non-zero on any mismatch.
+
+Usage:
+  python -m scripts.check_news_keywords
+"""
+
+import sys
+
+from app.services.fib_calculator import score_news_catalyst
+
+# (headline, direction, expected (bonus, reason))
+CASES = [
+    ("Morgan Stanley downgrades XYZ", "bearish", (1, "negative")),
+    ("XYZ upgraded to buy at Goldman", "bullish", (1, "positive")),
+    ("XYZ launches next-gen chip", "bullish", (1, "positive")),
+    ("XYZ wins defense contracts", "bullish", (1, "positive")),
+    ("XYZ delays product shipments", "bearish", (1, "negative")),
+    ("XYZ recalls 40,000 vehicles", "bearish", (1, "negative")),
+    ("XYZ beats on revenue", "bullish", (2, "strong_positive")),
+    ("SEC probes XYZ accounting", "bearish", (1, "negative")),
+    ("XYZ second quarter sector review", "bearish", (0, "neutral")),
+    ("Upbeat outlook for XYZ", "bullish", (0, "neutral")),
+]
+
+
+def main() -> int:
+    failures = 0
+    for headline, direction, expected in CASES:
+        got = score_news_catalyst([headline], direction)
+        ok = got == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {direction:8} {headline!r}: {got}"
+              + ("" if ok else f" (expected {expected})"))
+    print(f"\n{len(CASES) - failures}/{len(CASES)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
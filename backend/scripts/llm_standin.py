@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+BullsBears LLM Stand-in
+Local OpenAI-compatible /chat/completions server so the agents (and the full
+pipeline) can run offline – no Fireworks / xAI keys, no spend – to measure
+orchestration overhead and how the gateway copes with a misbehaving provider.
+
+Responses, in order:
+  - replay:     a recorded response for the same request fingerprint
+                (sha256 of model + messages + sampling params; image data
+                URLs are hashed first) from the cassette directory
+  - record:     --record proxies misses to the real provider (keys from
+                FIREWORKS_API_KEY / GROK_API_KEY) and saves them
+  - synthesize: a schema-valid answer built from the prompt itself –
+                prescreen bullish/bearish lists from STOCK DATA, vision flags
+                (single object or batch array, with a <think> preamble),
+                social reads (single or keyed batch), arbitrator final_picks
+                from the candidate lists, learner weights/bias echoed back.
+                Seeded by the fingerprint, so reruns are deterministic.
+                --replay-only answers 404 instead.
+
+Fault injection (seeded by --seed):
+  --latency SPEC            fixed:MS | uniform:MIN,MAX | lognormal:P50,SIGMA
+  --latency PROVIDER=SPEC   per provider (fireworks / xai), repeatable
+  --rate-429 P              429 with Retry-After (--retry-after S)
+  --rate-5xx P              503
+  --rate-malformed P        truncated / unbalanced JSON content
+Streaming requests (stream=true) get SSE deltas spread over the latency,
+first token after --ttft-frac of it, plus a usage chunk.
+
+GET /stats returns request / replay / synth / fault counters.
+
+Usage:
+  python -m scripts.llm_standin
+  python -m scripts.llm_standin --record --cassettes llm_cassettes
+  python -m scripts.llm_standin --replay-only --cassettes llm_cassettes
+  python -m scripts.llm_standin --latency lognormal:1500,0.6 --latency xai=lognormal:900,0.5 \\
+      --rate-429 0.05 --rate-malformed 0.02 --seed 7
+
+Point the agents at it (LLM cache off so every call reaches the stand-in):
+  LLM_FIREWORKS_BASE_URL=http://127.0.0.1:8900/fireworks \\
+  LLM_XAI_BASE_URL=http://127.0.0.1:8900/xai \\
+  FIREWORKS_API_KEY=standin GROK_API_KEY=standin LLM_CACHE_ENABLED=false \\
+  python scripts/run_daily_pipeline.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+logger = logging.getLogger(__name__)
+
+UPSTREAMS = {
+    "fireworks": ("https://api.fireworks.ai/inference/v1", "FIREWORKS_API_KEY"),
+    "xai": ("https://api.x.ai/v1", "GROK_API_KEY"),
+}
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "app" / "services" / "prompts"
+FINGERPRINT_EXCLUDE = {"stream", "stream_options", "user"}
+IMAGE_TOKENS = 256              # Rough prompt tokens per image for synthetic usage
+STREAM_CHUNK_CHARS = 24
+VISION_FLAGS = ("volume_shelf_breakout", "wyckoff_phase_2", "spring_setup", "higher_high_higher_low",
+                "vcp_tightness", "parabolic_curve", "stop_hunt_liquidity_grab")
+
+
+# =============================================================================
+# LATENCY / FAULTS
+# =============================================================================
+
+def parse_latency(spec: str):
+    """'fixed:MS' | 'uniform:MIN,MAX' | 'lognormal:P50,SIGMA' → sampler(rng) → seconds"""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    raise argparse.ArgumentTypeError(f"Bad latency spec: {spec}")
+
+
+def malform(content: str, rng: random.Random) -> str:
+    """Break the JSON the way models do: cut off mid-object, or a stray trailing comma"""
+    if rng.random() < 0.5 and len(content) > 10:
+        return content[: rng.randint(len(content) // 3, len(content) - 2)]
+    stripped = content.rstrip()
+    if stripped.endswith("}"):
+        return stripped[:-1] + ",}"
+    return stripped + ","
+
+
+# =============================================================================
+# FINGERPRINT / CASSETTES
+# =============================================================================
+
+def _hash_images(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value.get("type") == "image_url":
+            url = (value.get("image_url") or {}).get("url", "")
+            return {"type": "image_url", "sha256": hashlib.sha256(url.encode()).hexdigest()}
+        return {k: _hash_images(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_hash_images(v) for v in value]
+    return value
+
+
+def request_fingerprint(body: Dict[str, Any]) -> str:
+    canonical = {k: v for k, v in body.items() if k not in FINGERPRINT_EXCLUDE}
+    blob = json.dumps(_hash_images(canonical), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class Cassettes:
+    """One JSON file per fingerprint: {fingerprint, provider, model, agent, content, usage, recorded_at}"""
+
+    def __init__(self, directory: Optional[str]):
+        self.dir = Path(directory) if directory else None
+        if self.dir:
+            self.dir.mkdir(parents=True, exist_ok=True)
+
+    def load(self, fp: str) -> Optional[Dict[str, Any]]:
+        path = self.dir / f"{fp}.json" if self.dir else None
+        if path is None or not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def save(self, fp: str, entry: Dict[str, Any]):
+        if self.dir:
+            (self.dir / f"{fp}.json").write_text(json.dumps(entry, indent=2))
+
+
+# =============================================================================
+# SYNTHESIS
+# =============================================================================
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> Tuple[str, int]:
+    """All text parts joined + number of image parts"""
+    texts, images = [], 0
+    for m in messages:
+        content = m.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                texts.append(part.get("text", ""))
+            elif part.get("type") == "image_url":
+                images += 1
+    return "\n".join(texts), images
+
+
+def _json_after(text: str, marker: str) -> Any:
+    """First JSON value after `marker` in the prompt (None if absent/unparsable)"""
+    idx = text.find(marker)
+    if idx == -1:
+        return None
+    start = min((i for i in (text.find("[", idx), text.find("{", idx)) if i != -1), default=-1)
+    if start == -1:
+        return None
+    try:
+        return json.JSONDecoder().raw_decode(text[start:])[0]
+    except ValueError:
+        return None
+
+
+def _vision_flags(rng: random.Random) -> Dict[str, Any]:
+    flags = {k: rng.random() < 0.2 for k in VISION_FLAGS}
+    active = [k for k in VISION_FLAGS if flags[k]]
+    flags["dominant_pattern"] = rng.choice(active) if active else "none"
+    flags["trend_direction"] = rng.choice(["bullish", "bearish", "neutral"])
+    return flags
+
+
+def _social_read(rng: random.Random) -> Dict[str, Any]:
+    velocity = round(rng.lognormvariate(0, 0.5), 2)
+    return {
+        "social_score": rng.randint(-5, 5),
+        "bullish_ratio": round(rng.random(), 2),
+        "headlines": ["X: synthetic chatter", "Reddit: synthetic thread", "StockTwits: synthetic post"],
+        "events": [],
+        "polymarket_prob": None,
+        "mention_velocity": velocity,
+        "engagement_weight": round(rng.uniform(0.5, 2.0), 2),
+        "platform_consensus": round(rng.uniform(0.4, 1.0), 2),
+        "contrarian_flag": False,
+    }
+
+
+def synthesize(messages: List[Dict[str, Any]], rng: random.Random) -> Tuple[str, str]:
+    """(agent, content) – a schema-valid answer for whichever agent sent the prompt"""
+    text, images = _prompt_text(messages)
+
+    if images:
+        labels = re.findall(r"Chart \d+: ([A-Z0-9.\-]+)", text)
+        preamble = "<think>Synthetic stand-in reasoning: scanning structure, volume and wicks.</think>\n"
+        if "BATCH MODE" in text and labels:
+            return "vision", preamble + json.dumps([{"symbol": s, **_vision_flags(rng)} for s in labels])
+        return "vision", preamble + json.dumps(_vision_flags(rng))
+
+    if "final_picks" in text:
+        picks = []
+        for direction, marker in (("bullish", "=== BULLISH CANDIDATES"), ("bearish", "=== BEARISH CANDIDATES")):
+            candidates = [c for c in (_json_after(text, marker) or []) if isinstance(c, dict) and c.get("symbol")]
+            candidates.sort(key=lambda c: c.get("confluence_score") or 0, reverse=True)
+            for c in candidates[:3]:
+                picks.append({
+                    "symbol": c["symbol"],
+                    "direction": direction,
+                    "confidence": rng.randint(60, 90),
+                    "reasoning": "• Synthetic stand-in pick\n• Highest confluence_score in its direction",
+                })
+        return "arbitrator", json.dumps({"final_picks": picks})
+
+    if "Social Context Agent" in text:
+        batch = re.search(r"BATCH MODE: analyze each symbol \(([^)]*)\)", text)
+        if batch:
+            symbols = [s.strip() for s in batch.group(1).split(",") if s.strip()]
+            return "social", json.dumps({s: _social_read(rng) for s in symbols})
+        return "social", json.dumps(_social_read(rng))
+
+    if "STOCK DATA" in text and '"bullish"' in text:
+        stocks = [s for s in (_json_after(text, "STOCK DATA") or []) if isinstance(s, dict) and s.get("symbol")]
+        by_change = sorted(stocks, key=lambda s: s.get("pct_change_30d") or 0, reverse=True)
+        bullish = [s["symbol"] for s in by_change if (s.get("pct_change_30d") or 0) >= 12][:50]
+        bearish = [s["symbol"] for s in reversed(by_change) if (s.get("pct_change_30d") or 0) <= -12][:25]
+        return "prescreen", json.dumps({
+            "bullish": bullish,
+            "bearish": bearish,
+            "summary": f"Synthetic stand-in screen: {len(bullish)} bullish, {len(bearish)} bearish of {len(stocks)}",
+        })
+
+    if "CANDIDATE_SAMPLES" in text or ('"weights"' in text and '"bias"' in text):
+        # Echo the current files – a stand-in run must not move the real weights
+        current = {}
+        for key, name in (("weights", "weights.json"), ("bias", "bias.json")):
+            path = PROMPTS_DIR / name
+            current[key] = json.loads(path.read_text()) if path.exists() else {}
+        return "learner", json.dumps(current)
+
+    return "unknown", json.dumps({"result": "synthetic"})
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+class StandIn:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.cassettes = Cassettes(args.cassettes)
+        self.latency = {"*": parse_latency("fixed:0")}
+        for spec in args.latency:
+            provider, sep, rest = spec.partition("=")
+            self.latency[provider if sep else "*"] = parse_latency(rest if sep else spec)
+        self.stats: Dict[str, int] = {}
+        self._upstream: Optional[httpx.AsyncClient] = None
+
+    def count(self, key: str):
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    def sample_latency(self, provider: str) -> float:
+        return self.latency.get(provider, self.latency["*"])(self.rng)
+
+    async def record(self, provider: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Forward to the real provider (non-streamed) → (status, response JSON)"""
+        base_url, key_env = UPSTREAMS[provider]
+        if self._upstream is None:
+            self._upstream = httpx.AsyncClient(timeout=httpx.Timeout(300.0, connect=10.0))
+        payload = {k: v for k, v in body.items() if k not in ("stream", "stream_options")}
+        resp = await self._upstream.post(
+            f"{base_url}/chat/completions", json=payload,
+            headers={"Authorization": f"Bearer {os.getenv(key_env, '')}"},
+        )
+        return resp.status_code, resp.json() if resp.content else {}
+
+    async def resolve(self, provider: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """(status, {content, usage, source, agent}) for one request – no faults applied"""
+        fp = request_fingerprint(body)
+        entry = self.cassettes.load(fp)
+        if entry:
+            self.count("replayed")
+            return 200, {**entry, "source": "replay"}
+
+        if self.args.record and provider in UPSTREAMS:
+            status, data = await self.record(provider, body)
+            if status != 200:
+                self.count("record_errors")
+                return status, data
+            agent = synthesize(body.get("messages") or [], random.Random(0))[0]
+            entry = {
+                "fingerprint": fp,
+                "provider": provider,
+                "model": body.get("model"),
+                "agent": agent,
+                "content": data["choices"][0]["message"]["content"],
+                "usage": data.get("usage") or {},
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.cassettes.save(fp, entry)
+            self.count("recorded")
+            return 200, {**entry, "source": "record"}
+
+        if self.args.replay_only:
+            self.count("misses")
+            return 404, {"error": {"message": f"No recording for fingerprint {fp}"}}
+
+        messages = body.get("messages") or []
+        agent, content = synthesize(messages, random.Random(int(fp[:16], 16)))
+        text, images = _prompt_text(messages)
+        self.count("synthesized")
+        self.count(f"agent:{agent}")
+        return 200, {
+            "content": content,
+            "agent": agent,
+            "source": "synth",
+            "usage": {
+                "prompt_tokens": len(text) // 4 + images * IMAGE_TOKENS,
+                "completion_tokens": max(1, len(content) // 4),
+            },
+        }
+
+
+def _completion(body: Dict[str, Any], content: str, usage: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": f"standin-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {**usage, "total_tokens": sum(int(v or 0) for k, v in usage.items() if k.endswith("_tokens"))},
+    }
+
+
+def _sse(event: Any) -> str:
+    return f"data: {event if isinstance(event, str) else json.dumps(event)}\n\n"
+
+
+def create_app(standin: StandIn) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        if standin._upstream is not None:
+            await standin._upstream.aclose()
+        logger.info(f"Stand-in stats: {json.dumps(standin.stats, sort_keys=True)}")
+
+    app = FastAPI(title="BullsBears LLM stand-in", lifespan=lifespan)
+
+    @app.get("/stats")
+    async def stats():
+        return standin.stats
+
+    @app.post("/{provider}/chat/completions")
+    async def chat_completions(provider: str, request: Request):
+        body = await request.json()
+        args = standin.args
+        rng = standin.rng
+        latency_s = standin.sample_latency(provider)
+        standin.count("requests")
+
+        if rng.random() < args.rate_429:
+            standin.count("faults:429")
+            await asyncio.sleep(min(latency_s, 0.05))
+            return JSONResponse({"error": {"message": "Rate limited (stand-in)"}}, status_code=429,
+                                headers={"Retry-After": str(args.retry_after)})
+        if rng.random() < args.rate_5xx:
+            standin.count("faults:5xx")
+            await asyncio.sleep(latency_s)
+            return JSONResponse({"error": {"message": "Service unavailable (stand-in)"}}, status_code=503)
+
+        status, result = await standin.resolve(provider, body)
+        if status != 200:
+            return JSONResponse(result, status_code=status)
+
+        content = result["content"]
+        if rng.random() < args.rate_malformed:
+            standin.count("faults:malformed")
+            content = malform(content, rng)
+        usage = result.get("usage") or {}
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency_s)
+            return JSONResponse(_completion(body, content, usage))
+
+        async def events():
+            chunks = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)] or [""]
+            ttft_s = latency_s * args.ttft_frac
+            step_s = (latency_s - ttft_s) / len(chunks)
+            base = {"id": f"standin-{int(time.time() * 1000)}", "object": "chat.completion.chunk",
+                    "created": int(time.time()), "model": body.get("model")}
+            await asyncio.sleep(ttft_s)
+            yield _sse({**base, "choices": [{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}]})
+            for chunk in chunks:
+                yield _sse({**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+                await asyncio.sleep(step_s)
+            yield _sse({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield _sse({**base, "choices": [], "usage": usage})
+            yield _sse("[DONE]")
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--cassettes", default="llm_cassettes", help="Recorded responses directory ('' = none)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", action="store_true", help="Proxy misses to the real providers and save them")
+    mode.add_argument("--replay-only", action="store_true", help="404 on a miss instead of synthesizing")
+    parser.add_argument("--latency", action="append", default=[],
+                        help="fixed:MS | uniform:MIN,MAX | lognormal:P50,SIGMA, optionally PROVIDER=SPEC")
+    parser.add_argument("--ttft-frac", type=float, default=0.3, help="Streamed: first token after this share of latency")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--rate-malformed", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for spec in args.latency:
+        parse_latency(spec.partition("=")[2] if "=" in spec else spec)
+
+    standin = StandIn(args)
+    logger.info(f"LLM stand-in on http://{args.host}:{args.port}/{{fireworks,xai}} – "
+                f"{'record' if args.record else 'replay-only' if args.replay_only else 'replay + synthesize'}, "
+                f"cassettes={args.cassettes or 'none'}")
+    uvicorn.run(create_app(standin), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+BullsBears Confluence Backtest
+Replays the 3-tier confluence calculator at every historical bar and reports
+target-hit / stop-out rates per confluence score.
+
+Usage:
+  python -m scripts.run_backtest                          # prime_ohlc_90d, all symbols
+  python -m scripts.run_backtest --csv-dir data/history   # multi-year CSV exports
+  python -m scripts.run_backtest --symbols AAPL NVDA --horizon 20 --output bt.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+
+async def _load_from_db(symbols, table):
+    from app.core.database import close_asyncpg_pool
+    from app.services.confluence_backtest import load_bars_from_db
+
+    try:
+        return await load_bars_from_db(symbols, table=table)
+    finally:
+        await close_asyncpg_pool()
+
+
+def main():
+    from app.services.confluence_backtest import BacktestConfig, load_bars_from_csv_dir, run_backtest
+
+    parser = argparse.ArgumentParser(description="Confluence target backtest")
+    parser.add_argument("--csv-dir", help="Directory of <SYMBOL>.csv files (default: load from DB)")
+    parser.add_argument("--table", default="prime_ohlc_90d", help="OHLC table when loading from DB")
+    parser.add_argument("--symbols", nargs="*", help="Restrict to these symbols")
+    parser.add_argument("--lookback", type=int, default=90)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="Write full JSON report here")
+    args = parser.parse_args()
+
+    if args.csv_dir:
+        data = load_bars_from_csv_dir(args.csv_dir, args.symbols)
+    else:
+        data = asyncio.run(_load_from_db(args.symbols, args.table))
+
+    if not data.symbols:
+        logger.error("No bars loaded")
+        sys.exit(1)
+
+    logger.info(f"Loaded {len(data.symbols)} symbols / {int(data.offsets[-1])} bars")
+    report = run_backtest(data, BacktestConfig(
+        lookback=args.lookback,
+        horizon=args.horizon,
+        step=args.step,
+        workers=args.workers,
+    ))
+
+    print(f"\n{'dir':8} {'score':>5} {'signals':>8} {'invalid':>8} {'hit1':>6} {'hit2':>6} {'hit3':>6} {'stop':>6} {'exp%':>7}")
+    for r in report["by_score"]:
+        print(f"{r['direction']:8} {r['confluence_score']:>5} {r['signals']:>8} {r['invalid_signals']:>8} "
+              f"{r['hit_rate_primary']:>6.1%} {r['hit_rate_medium']:>6.1%} {r['hit_rate_moonshot']:>6.1%} "
+              f"{r['stop_rate']:>6.1%} {r['expectancy_pct']:>7.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
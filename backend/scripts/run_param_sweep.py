@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+BullsBears Confluence Parameter Sweep
+Grid or random search over fib_calculator thresholds (swing min_pct/min_bars,
+pivot and Gann alignment tolerance) against historical bars.
+
+Usage:
+  python -m scripts.run_param_sweep                              # default grid, DB bars
+  python -m scripts.run_param_sweep --mode random --samples 200
+  python -m scripts.run_param_sweep --csv-dir data/history --write-params
+  python -m scripts.run_param_sweep --csv-dir data/history --split-date 2025-01-01 --apply
+
+Configs are ranked in-sample, the in-sample leaders are re-scored on a
+validation date range to pick a candidate, and the candidate is only
+accepted if it beats the current params on a final test range that played
+no part in picking it (walk-forward). --write-params saves it to
+prompts/confluence_params.candidate.json; --apply writes the production
+prompts/confluence_params.json instead.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+
+async def _load_from_db(symbols, table):
+    from app.core.database import close_asyncpg_pool
+    from app.services.confluence_backtest import load_bars_from_db
+
+    try:
+        return await load_bars_from_db(symbols, table=table)
+    finally:
+        await close_asyncpg_pool()
+
+
+def main():
+    from app.services.confluence_backtest import BacktestConfig, load_bars_from_csv_dir
+    from app.services.confluence_sweep import build_grid, run_sweep, sample_random, write_best_params
+
+    parser = argparse.ArgumentParser(description="Confluence threshold sweep")
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=100, help="Random mode sample count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv-dir", help="Directory of <SYMBOL>.csv files (default: load from DB)")
+    parser.add_argument("--table", default="prime_ohlc_90d")
+    parser.add_argument("--symbols", nargs="*")
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-score", type=int, default=2, help="Rank on signals with confluence ≥ this")
+    parser.add_argument("--min-signals", type=int, default=30)
+    parser.add_argument("--holdout", type=float, default=0.3, help="Fraction of bars held out (latest dates)")
+    parser.add_argument("--split-date", help="Held-out range starts here (overrides --holdout)")
+    parser.add_argument("--test", type=float, default=0.15,
+                        help="Fraction of bars in the final test window (latest dates, part of --holdout)")
+    parser.add_argument("--test-date", help="Test window starts here (overrides --test)")
+    parser.add_argument("--shortlist", type=int, default=10, help="In-sample leaders re-scored on validation bars")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", help="Write full ranked JSON here")
+    parser.add_argument("--write-params", action="store_true",
+                        help="Save the accepted winner to prompts/confluence_params.candidate.json")
+    parser.add_argument("--apply", action="store_true",
+                        help="Save the accepted winner to the production prompts/confluence_params.json")
+    args = parser.parse_args()
+
+    if args.csv_dir:
+        data = load_bars_from_csv_dir(args.csv_dir, args.symbols)
+    else:
+        data = asyncio.run(_load_from_db(args.symbols, args.table))
+    if not data.symbols:
+        logger.error("No bars loaded")
+        sys.exit(1)
+
+    params_list = build_grid() if args.mode == "grid" else sample_random(args.samples, seed=args.seed)
+    result = run_sweep(
+        data, params_list,
+        BacktestConfig(horizon=args.horizon, step=args.step, workers=args.workers),
+        min_score=args.min_score, min_signals=args.min_signals,
+        holdout=args.holdout, split_date=args.split_date, shortlist=args.shortlist,
+        test=args.test, test_date=args.test_date,
+    )
+
+    print(f"\nIn-sample (signals before {result['split_date']}):")
+    print(f"{'#':>3} {'min%':>5} {'bars':>4} {'pivot':>5} {'gann':>5} {'signals':>8} {'hit':>6} {'stop':>6} {'exp%':>7}")
+    for r in result["ranked"][:args.top]:
+        p = r["params"]
+        print(f"{r['rank']:>3} {p['swing_min_pct']:>5} {p['swing_min_bars']:>4} {p['pivot_threshold_pct']:>5} "
+              f"{p['gann_threshold_pct']:>5} {r['signals']:>8} {r['hit_rate']:>6.1%} {r['stop_rate']:>6.1%} "
+              f"{r['expectancy_pct']:>7.2f}{'' if r['sufficient'] else '  (few signals)'}")
+
+    current = result["baseline"]["params"]
+    sections = [
+        (f"Validation (signals {result['split_date']} – {result['test_date']}):", result["validation"]),
+        (f"Test (signals from {result['test_date']}):", result["test"]),
+    ]
+    for title, rows in sections:
+        print(f"\n{title}")
+        for r in rows:
+            p = r["params"]
+            tag = "  (current)" if p == current else ("  ← winner" if r is result["best"] else "")
+            print(f"{r['rank']:>3} {p['swing_min_pct']:>5} {p['swing_min_bars']:>4} {p['pivot_threshold_pct']:>5} "
+                  f"{p['gann_threshold_pct']:>5} {r['signals']:>8} {r['hit_rate']:>6.1%} {r['stop_rate']:>6.1%} "
+                  f"{r['expectancy_pct']:>7.2f}{tag}{'' if r['sufficient'] else '  (few signals)'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        logger.info(f"Ranked table written to {args.output}")
+
+    if args.write_params or args.apply:
+        write_best_params(result, apply=args.apply)
+
+
+if __name__ == "__main__":
+    main()